@@ -0,0 +1,498 @@
+"""
+Microbenchmarks the data processing pipeline: each step of the step-by-step
+pipeline (the one used to train the model), the whole step-by-step pipeline,
+the feature plan (`data_processing_inference`) and the single record path
+(`data_processing_record`), on synthetic persons drawn from the `Person`
+schema's ranges, at several batch sizes. Each benchmark reports its median
+(and minimum) time per call, its peak traced memory and its net allocated
+memory blocks as JSON.
+
+The results are compared to a baseline saved on the same machine (by default,
+`benchmarks/baselines/preprocessing.json`, which isn't versioned, since its
+timings only make sense on the machine that measured them), and the command
+fails if any benchmark's minimum time is slower than its baseline's by more
+than the threshold.
+
+Usage (from the `src` folder, so the configured paths are valid):
+
+    PYTHONPATH=.. python -m benchmarks.preprocessing [--batch-sizes N ...]
+        [--benchmarks NAME ...] [--min-time SECONDS] [--max-repeats N]
+        [--output FILE] [--baseline FILE] [--save-baseline]
+        [--threshold PERCENT]
+"""
+import argparse
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import typing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.config.model import model_settings
+from src.config.settings import general_settings
+from src.data import processing
+from src.data.utils import artifact_registry
+from src.schema.person import Person
+
+from .utils import git_commit
+
+DEFAULT_BASELINE_PATH = (
+    pathlib.Path(__file__).parent / "baselines" / "preprocessing.json"
+)
+DEFAULT_BATCH_SIZES = [1, 10, 1000, 100000]
+
+# the schema's ranges that are narrowed, since the pipeline isn't defined for
+# the whole range (e.g., the IBW, which is log transformed, is negative for
+# heights below 1.02 m)
+NARROWED_RANGES = {"Height": (1.2, 2.5)}
+
+
+def synthesize_persons(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Draws random persons from the `Person` schema: the numerical fields are
+    uniformly drawn from their valid ranges (see `NARROWED_RANGES`) and the
+    categorical fields from their valid values.
+
+    Args:
+        n_rows (int): the number of persons.
+        seed (int): the random seed. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: the persons (with the dtypes of a loaded dataset).
+    """
+    generator = np.random.default_rng(seed)
+    columns = {}
+
+    for name, field in Person.model_fields.items():
+        choices = typing.get_args(field.default)
+
+        if choices:
+            columns[name] = generator.choice(np.array(choices, dtype=object), n_rows)
+            continue
+
+        lower, upper = NARROWED_RANGES.get(
+            name,
+            (
+                next(item.ge for item in field.metadata if hasattr(item, "ge")),
+                next(item.le for item in field.metadata if hasattr(item, "le")),
+            ),
+        )
+
+        if field.annotation is int:
+            columns[name] = generator.integers(lower, upper, n_rows, endpoint=True)
+        else:
+            columns[name] = generator.uniform(lower, upper, n_rows)
+
+    return pd.DataFrame(columns)
+
+
+def _build_benchmarks() -> Dict[str, Tuple[Optional[str], Callable[[Any], Any]]]:
+    """Builds the benchmarked functions. Each step receives the output of the
+    previous one (named by the benchmark's input), so it runs on the same data
+    as in the pipeline.
+
+    Returns:
+        Dict[str, Tuple[Optional[str], Callable[[Any], Any]]]: the benchmarks,
+            with the name of the step whose output is their input (None for
+            the raw persons) and their function.
+    """
+    # the steps are the processing module's private functions, which are
+    # benchmarked on their own
+    # pylint: disable=protected-access
+    age_bins, encoders, scalers = (
+        artifact_registry.load(
+            path=general_settings.ARTIFACTS_PATH, feature_name=feature_name
+        )
+        for feature_name in ["qcut_bins", "features_ohe", "features_sc"]
+    )
+
+    return {
+        "change_height_units": (None, processing._change_height_units),
+        "create_bmi_feature": ("change_height_units", processing._create_bmi_feature),
+        "create_pal_feature": ("create_bmi_feature", processing._create_pal_feature),
+        "create_bsa_feature": ("create_pal_feature", processing._create_bsa_feature),
+        "create_ibw_feature": ("create_bsa_feature", processing._create_ibw_feature),
+        "create_evemm_feature": (
+            "create_ibw_feature",
+            processing._create_evemm_feature,
+        ),
+        "categorize_numerical_columns": (
+            "create_evemm_feature",
+            lambda dataframe: processing._categorize_numerical_columns(
+                dataframe, age_bins
+            ),
+        ),
+        "transform_numerical_columns": (
+            "categorize_numerical_columns",
+            processing._transform_numerical_columns,
+        ),
+        "scale_numerical_columns": (
+            "transform_numerical_columns",
+            lambda dataframe: processing._scale_numerical_columns(
+                dataframe=dataframe, scalers=scalers
+            ),
+        ),
+        "encode_categorical_columns": (
+            "scale_numerical_columns",
+            lambda dataframe: processing._encode_categorical_columns(
+                dataframe=dataframe, encoders=encoders
+            ),
+        ),
+        "select_features": (
+            "encode_categorical_columns",
+            lambda dataframe: dataframe[model_settings.FEATURES].values,
+        ),
+        "pipeline_steps": (None, processing._data_processing_steps),
+        "pipeline_plan": (None, processing.data_processing_inference),
+    }
+
+
+def _prepare_inputs(
+    persons: pd.DataFrame,
+    benchmarks: Dict[str, Tuple[Optional[str], Callable[[Any], Any]]],
+) -> Dict[Optional[str], pd.DataFrame]:
+    """Runs the steps once (in order) to get the input of each benchmark.
+
+    Args:
+        persons (pd.DataFrame): the raw persons.
+        benchmarks (Dict[str, Tuple[Optional[str], Callable[[Any], Any]]]):
+            the benchmarks.
+
+    Returns:
+        Dict[Optional[str], pd.DataFrame]: the output of each step (and the
+            raw persons, with the None key).
+    """
+    outputs = {None: persons}
+
+    for name, (source, function) in benchmarks.items():
+        if source in outputs and name not in outputs:
+            output = function(outputs[source].copy())
+
+            if isinstance(output, pd.DataFrame):
+                outputs[name] = output
+
+    return outputs
+
+
+def measure(
+    function: Callable[[Any], Any],
+    make_input: Callable[[], Any],
+    min_time: float,
+    max_repeats: int,
+    memory: bool = True,
+) -> Dict[str, Any]:
+    """Measures a function, calling it until it ran for `min_time` seconds (at
+    least 3 and at most `max_repeats` times). Each call gets a new input (as
+    the steps change their input in place), which isn't timed.
+
+    Args:
+        function (Callable[[Any], Any]): the benchmarked function.
+        make_input (Callable[[], Any]): builds the function's input.
+        min_time (float): the minimum measured time (in seconds).
+        max_repeats (int): the maximum number of calls.
+        memory (bool): whether the memory is traced (in an extra call, since
+            tracing slows the calls down). Defaults to True.
+
+    Returns:
+        Dict[str, Any]: the number of calls, the median and minimum time per
+            call (in milliseconds), the peak traced memory (in bytes) and the
+            net number of allocated memory blocks (those still alive after
+            the call, e.g., its output).
+    """
+    # the first call isn't measured (e.g., it loads the artifacts)
+    function(make_input())
+    durations = []
+
+    while len(durations) < max_repeats and (
+        len(durations) < 3 or sum(durations) < min_time
+    ):
+        value = make_input()
+        start = time.perf_counter()
+        function(value)
+        durations.append(time.perf_counter() - start)
+
+    result = {
+        "repeats": len(durations),
+        "median_ms": statistics.median(durations) * 1000,
+        "min_ms": min(durations) * 1000,
+    }
+
+    if memory:
+        value = make_input()
+        tracemalloc.start()
+
+        try:
+            before = tracemalloc.take_snapshot()
+            initial, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            output = function(value)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+        del output
+        result["peak_bytes"] = peak - initial
+        result["net_blocks"] = sum(
+            stat.count_diff for stat in after.compare_to(before, "filename")
+        )
+
+    return result
+
+
+def run(
+    batch_sizes: List[int],
+    names: Optional[List[str]] = None,
+    min_time: float = 0.2,
+    max_repeats: int = 1000,
+    memory: bool = True,
+    seed: int = 0,
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Runs the benchmarks at each batch size.
+
+    Args:
+        batch_sizes (List[int]): the numbers of persons per call.
+        names (Optional[List[str]]): the benchmarks. Defaults to None (all of them).
+        min_time (float): the minimum measured time of each benchmark (in
+            seconds). Defaults to 0.2.
+        max_repeats (int): the maximum number of calls of each benchmark.
+            Defaults to 1000.
+        memory (bool): whether the memory is traced. Defaults to True.
+        seed (int): the random seed of the persons. Defaults to 0.
+
+    Returns:
+        Dict[str, Dict[str, Dict[str, Any]]]: the measurements of each
+            benchmark, by batch size.
+    """
+    benchmarks = _build_benchmarks()
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    for batch_size in batch_sizes:
+        inputs = _prepare_inputs(synthesize_persons(batch_size, seed), benchmarks)
+
+        for name, (source, function) in benchmarks.items():
+            if names is None or name in names:
+                results.setdefault(name, {})[str(batch_size)] = measure(
+                    function,
+                    inputs[source].copy,
+                    min_time,
+                    max_repeats,
+                    memory,
+                )
+
+        if batch_size == 1 and (names is None or "pipeline_record" in names):
+            record = inputs[None].iloc[0].to_dict()
+            results.setdefault("pipeline_record", {})["1"] = measure(
+                processing.data_processing_record,
+                record.copy,
+                min_time,
+                max_repeats,
+                memory,
+            )
+
+    return results
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_delta_ms: float = 0.005,
+) -> List[str]:
+    """Compares the results to a baseline (measured on the same machine). The
+    minimum times are compared, since they're the least affected by the other
+    processes of the machine (the medians are only reported).
+
+    Args:
+        results (Dict[str, Any]): the current results.
+        baseline (Dict[str, Any]): the baseline's results.
+        threshold (float): the tolerated slowdown (in percent).
+        min_delta_ms (float): the tolerated slowdown (in milliseconds) of the
+            fastest benchmarks, whose timings are noisier. Defaults to 0.005.
+
+    Returns:
+        List[str]: the regressions (empty if there are none).
+    """
+    regressions = []
+    tolerance = 1 + threshold / 100
+
+    for name, batch_sizes in results["benchmarks"].items():
+        for batch_size, current in batch_sizes.items():
+            previous = baseline["benchmarks"].get(name, {}).get(batch_size)
+
+            if previous is None:
+                continue
+
+            if (
+                current["min_ms"] > previous["min_ms"] * tolerance
+                and current["min_ms"] - previous["min_ms"] > min_delta_ms
+            ):
+                regressions.append(
+                    f"{name} (batch size {batch_size}): {current['min_ms']:.4f} ms "
+                    f"(baseline {previous['min_ms']:.4f} ms)"
+                )
+
+    return regressions
+
+
+def _parse_arguments(arguments: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parses the command line arguments.
+
+    Args:
+        arguments (Optional[List[str]]): the arguments. Defaults to None (the
+            command line's arguments).
+
+    Returns:
+        argparse.Namespace: the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Microbenchmarks the data processing pipeline."
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_BATCH_SIZES,
+        help="the numbers of persons per call",
+    )
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        default=None,
+        help="the benchmarks' names (defaults to all of them)",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="the minimum measured time (in seconds) of each benchmark",
+    )
+    parser.add_argument(
+        "--max-repeats",
+        type=int,
+        default=1000,
+        help="the maximum number of calls of each benchmark",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="doesn't trace the memory"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="the persons' random seed")
+    parser.add_argument(
+        "--output", type=pathlib.Path, default=None, help="the results' JSON file"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=pathlib.Path,
+        default=None,
+        help=(
+            f"the baseline's JSON file (defaults to {DEFAULT_BASELINE_PATH.name} in"
+            " the 'benchmarks/baselines' folder, which is skipped if it doesn't exist)"
+        ),
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="saves the results as the baseline (instead of comparing them)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=20,
+        help="the tolerated slowdown (in percent) compared to the baseline",
+    )
+    return parser.parse_args(arguments)
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Runs the benchmarks, saves their results and compares them to the baseline.
+
+    Args:
+        arguments (Optional[List[str]]): the arguments. Defaults to None (the
+            command line's arguments).
+
+    Returns:
+        int: the exit code (1 if there are regressions and 2 if the given
+            baseline doesn't exist).
+    """
+    args = _parse_arguments(arguments)
+    baseline_path = (
+        args.baseline if args.baseline is not None else DEFAULT_BASELINE_PATH
+    )
+
+    # a baseline that was explicitly given must exist (the regression gate
+    # would always pass otherwise)
+    if (
+        args.baseline is not None
+        and not args.save_baseline
+        and not baseline_path.exists()
+    ):
+        print(f"ERROR the baseline {baseline_path} doesn't exist", file=sys.stderr)
+        return 2
+
+    # the logs would be most of the measured time of the smallest batches
+    logger.disable("src")
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "config": {
+            "batch_sizes": args.batch_sizes,
+            "min_time": args.min_time,
+            "max_repeats": args.max_repeats,
+            "seed": args.seed,
+        },
+        "benchmarks": run(
+            batch_sizes=args.batch_sizes,
+            names=args.benchmarks,
+            min_time=args.min_time,
+            max_repeats=args.max_repeats,
+            memory=not args.no_memory,
+            seed=args.seed,
+        ),
+    }
+    output = json.dumps(results, indent=2, default=float)
+
+    if args.output is not None:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(output + "\n", encoding="utf-8")
+        return 0
+
+    if not baseline_path.exists():
+        print(
+            f"WARNING there's no baseline at {baseline_path}, so the results "
+            "weren't compared (run with --save-baseline to save one)",
+            file=sys.stderr,
+        )
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+
+    if baseline.get("machine") != results["machine"]:
+        print(
+            f"WARNING the baseline was measured on {baseline.get('machine')}",
+            file=sys.stderr,
+        )
+
+    regressions = compare(results, baseline, args.threshold)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
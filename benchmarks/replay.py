@@ -0,0 +1,455 @@
+"""
+Replays recorded `Person` payloads against the API in-process (over ASGI, with
+the MLflow model replaced by a local stand-in), at a given concurrency and
+request rate, and reports the throughput, the latency percentiles and the
+error rate of each endpoint as JSON, optionally comparing them to a baseline.
+
+Usage (from the `src` folder, so the configured paths are valid):
+
+    PYTHONPATH=.. python -m benchmarks.replay [--payloads FILE] [--endpoints ...]
+        [--requests N] [--concurrency N] [--rate R] [--batch-size N]
+        [--output FILE] [--baseline FILE] [--threshold PERCENT]
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from src.config import api as api_config
+from src.config import reports as reports_config
+from src.config import settings as general_config
+from src.config.model import model_settings
+from src.config.settings import general_settings
+from src.data.utils import load_feature
+from src.schema.person import Person
+
+from .utils import git_commit
+
+# the benchmarked endpoints (their method and path)
+ENDPOINTS = {
+    "predict": ("POST", "/predict"),
+    "predict_batch": ("POST", "/predict/batch"),
+    "drift_metrics": ("GET", "/monitor/metrics"),
+}
+
+
+class StandInModel:
+    """A local stand-in for the MLflow model, which predicts the class with
+    the highest score of a fixed random linear projection of the features
+    (so its cost doesn't depend on a trained model).
+    """
+
+    def __init__(self, n_features: int, n_classes: int, seed: int = 0) -> None:
+        """Stand-in's instance initializer.
+
+        Args:
+            n_features (int): the number of features.
+            n_classes (int): the number of classes.
+            seed (int): the projection's random seed. Defaults to 0.
+        """
+        self.weights = np.random.default_rng(seed).normal(size=(n_features, n_classes))
+
+    def predict(self, features: np.ndarray, **_: Any) -> np.ndarray:
+        """Predicts the class indexes of the given features.
+
+        Args:
+            features (np.ndarray): the features array.
+
+        Returns:
+            np.ndarray: the predicted class indexes.
+        """
+        return np.argmax(np.asarray(features) @ self.weights, axis=1)
+
+
+def load_payloads(path: Optional[pathlib.Path], limit: int) -> List[Dict[str, Any]]:
+    """Loads the recorded payloads: a JSONL file (one person per line) or a CSV
+    file (e.g., a spilled live traffic block or a dataset). The fields are
+    coerced to the `Person` schema's types.
+
+    Args:
+        path (Optional[pathlib.Path]): the payloads' file. Defaults to None
+            (the current dataset).
+        limit (int): the maximum number of payloads.
+
+    Returns:
+        List[Dict[str, Any]]: the payloads.
+    """
+    if path is None:
+        path = pathlib.Path.joinpath(
+            general_settings.DATA_PATH, general_settings.CURRENT_FILE_NAME
+        )
+
+    if pathlib.Path(path).suffix == ".jsonl":
+        with open(path, "r", encoding="utf-8") as file:
+            records = [json.loads(line) for line in file if line.strip()]
+    else:
+        records = pd.read_csv(path, nrows=limit).to_dict(orient="records")
+
+    return [
+        {
+            name: (
+                int(round(record[name]))
+                if field.annotation is int
+                else field.annotation(record[name])
+            )
+            for name, field in Person.model_fields.items()
+        }
+        for record in records[:limit]
+    ]
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    payloads: List[Dict[str, Any]],
+    n_requests: int,
+    concurrency: int,
+    rate: float,
+    batch_size: int,
+) -> Dict[str, Any]:
+    """Sends the requests of an endpoint and summarizes their latencies.
+
+    When a rate is given, each request has an intended send time, and its
+    latency is measured from that time (so the delays caused by the previous
+    requests are included instead of hidden).
+
+    Args:
+        client (httpx.AsyncClient): the client (bound to the API).
+        endpoint (str): the endpoint's name (see `ENDPOINTS`).
+        payloads (List[Dict[str, Any]]): the payloads (replayed in a loop).
+        n_requests (int): the number of requests.
+        concurrency (int): the maximum number of concurrent requests.
+        rate (float): the requests per second (0 sends them as fast as possible).
+        batch_size (int): the number of persons per batch prediction request.
+
+    Returns:
+        Dict[str, Any]: the endpoint's results.
+    """
+    method, path = ENDPOINTS[endpoint]
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+    start = time.perf_counter()
+
+    async def _worker() -> None:
+        nonlocal errors, next_index
+
+        while next_index < n_requests:
+            index = next_index
+            next_index += 1
+            intended = start + index / rate if rate else time.perf_counter()
+            delay = intended - time.perf_counter()
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                response = await client.request(
+                    method,
+                    path,
+                    **_build_request(endpoint, payloads, index, batch_size),
+                )
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+
+            latencies.append(time.perf_counter() - intended)
+            errors += failed
+
+    await asyncio.gather(*[_worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    percentiles = np.percentile(latencies, [50, 95, 99]) * 1000
+
+    return {
+        "requests": n_requests,
+        "errors": errors,
+        "error_rate": errors / n_requests,
+        "throughput_rps": n_requests / elapsed,
+        "rows_per_second": (
+            n_requests * (batch_size if endpoint == "predict_batch" else 1) / elapsed
+        ),
+        "latency_ms": {
+            "p50": percentiles[0],
+            "p95": percentiles[1],
+            "p99": percentiles[2],
+            "mean": float(np.mean(latencies)) * 1000,
+            "max": float(np.max(latencies)) * 1000,
+        },
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Compares the results to a baseline (e.g., the results of another commit).
+
+    Args:
+        results (Dict[str, Any]): the current results.
+        baseline (Dict[str, Any]): the baseline's results.
+        threshold (float): the tolerated regression (in percent).
+
+    Returns:
+        List[str]: the regressions (empty if there are none).
+    """
+    regressions = []
+    tolerance = 1 + threshold / 100
+
+    for endpoint, current in results["endpoints"].items():
+        previous = baseline["endpoints"].get(endpoint)
+
+        if previous is None:
+            continue
+
+        if current["latency_ms"]["p95"] > previous["latency_ms"]["p95"] * tolerance:
+            regressions.append(
+                f"{endpoint}: p95 latency {current['latency_ms']['p95']:.2f} ms "
+                f"(baseline {previous['latency_ms']['p95']:.2f} ms)"
+            )
+
+        if current["throughput_rps"] * tolerance < previous["throughput_rps"]:
+            regressions.append(
+                f"{endpoint}: throughput {current['throughput_rps']:.1f} req/s "
+                f"(baseline {previous['throughput_rps']:.1f} req/s)"
+            )
+
+        if current["error_rate"] > previous["error_rate"]:
+            regressions.append(
+                f"{endpoint}: error rate {current['error_rate']:.2%} "
+                f"(baseline {previous['error_rate']:.2%})"
+            )
+
+    return regressions
+
+
+def _build_request(
+    endpoint: str, payloads: List[Dict[str, Any]], index: int, batch_size: int
+) -> Dict[str, Any]:
+    """Builds the arguments of an endpoint's request.
+
+    Args:
+        endpoint (str): the endpoint's name.
+        payloads (List[Dict[str, Any]]): the payloads.
+        index (int): the request's index.
+        batch_size (int): the number of persons per batch prediction request.
+
+    Returns:
+        Dict[str, Any]: the request's arguments (its body or parameters).
+    """
+    if endpoint == "predict":
+        return {"json": payloads[index % len(payloads)]}
+
+    if endpoint == "predict_batch":
+        first = index * batch_size
+        return {
+            "json": [
+                payloads[(first + offset) % len(payloads)]
+                for offset in range(batch_size)
+            ]
+        }
+
+    return {"params": {"window_size": 1000}}
+
+
+def _prepare_api(output_path: pathlib.Path) -> Any:
+    """Replaces the MLflow model by the stand-in, redirects the files written
+    by the API to a temporary folder (so the real profiles and reports aren't
+    touched) and imports the API.
+
+    Args:
+        output_path (pathlib.Path): the temporary folder.
+
+    Returns:
+        Any: the FastAPI app.
+    """
+    # pylint: disable=import-outside-toplevel
+    import mlflow.lightgbm
+
+    label_encoder = load_feature(
+        path=general_settings.ARTIFACTS_PATH, feature_name="label_ohe"
+    )
+    stand_in = StandInModel(
+        n_features=len(model_settings.FEATURES),
+        n_classes=len(label_encoder.classes_),
+    )
+    mlflow.lightgbm.load_model = lambda _: stand_in
+
+    # the API's modules read the settings when they're imported, so they use
+    # these copies (and the shared settings aren't modified)
+    general_config.general_settings = general_settings.model_copy(
+        update={"PROFILES_PATH": pathlib.Path.joinpath(output_path, "profiles")}
+    )
+    reports_config.report_settings = reports_config.report_settings.model_copy(
+        update={"REPORTS_CACHE_PATH": pathlib.Path.joinpath(output_path, "reports")}
+    )
+    api_config.api_settings = api_config.api_settings.model_copy(
+        update={"MONITORING_TRAFFIC_SPILL_ENABLED": False}
+    )
+
+    from src.api.main import app
+
+    return app
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Runs the benchmark of each endpoint.
+
+    Args:
+        args (argparse.Namespace): the command line arguments.
+
+    Returns:
+        Dict[str, Any]: the results.
+    """
+    payloads = load_payloads(args.payloads, args.max_payloads)
+
+    with tempfile.TemporaryDirectory() as output_path:
+        app = _prepare_api(pathlib.Path(output_path))
+        transport = httpx.ASGITransport(app=app)
+        results = {}
+
+        async with app.router.lifespan_context(app), httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", timeout=None
+        ) as client:
+            for endpoint in args.endpoints:
+                if args.warmup:
+                    await replay(
+                        client,
+                        endpoint,
+                        payloads,
+                        args.warmup,
+                        args.concurrency,
+                        0,
+                        args.batch_size,
+                    )
+
+                results[endpoint] = await replay(
+                    client,
+                    endpoint,
+                    payloads,
+                    args.requests,
+                    args.concurrency,
+                    args.rate,
+                    args.batch_size,
+                )
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "config": {
+            "payloads": len(payloads),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "batch_size": args.batch_size,
+            "warmup": args.warmup,
+        },
+        "endpoints": results,
+    }
+
+
+def _parse_arguments(arguments: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parses the command line arguments.
+
+    Args:
+        arguments (Optional[List[str]]): the arguments. Defaults to None (the
+            command line's arguments).
+
+    Returns:
+        argparse.Namespace: the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Replays payloads against the API.")
+    parser.add_argument(
+        "--payloads",
+        type=pathlib.Path,
+        default=None,
+        help="a JSONL or CSV file of persons (defaults to the current dataset)",
+    )
+    parser.add_argument(
+        "--max-payloads", type=int, default=10000, help="the maximum number of payloads"
+    )
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        choices=list(ENDPOINTS),
+        default=["predict", "predict_batch"],
+        help="the benchmarked endpoints",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="the requests per endpoint"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="the concurrent requests"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0,
+        help="the requests per second (0 sends them as fast as possible)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=100, help="the persons per batch request"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=50, help="the unrecorded requests per endpoint"
+    )
+    parser.add_argument(
+        "--output", type=pathlib.Path, default=None, help="the results' JSON file"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=pathlib.Path,
+        default=None,
+        help="the results' JSON file of a previous run to compare to",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="the tolerated regression (in percent) compared to the baseline",
+    )
+    return parser.parse_args(arguments)
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Runs the benchmark, saves its results and compares them to the baseline.
+
+    Args:
+        arguments (Optional[List[str]]): the arguments. Defaults to None (the
+            command line's arguments).
+
+    Returns:
+        int: the exit code (1 if there are regressions).
+    """
+    args = _parse_arguments(arguments)
+    results = asyncio.run(_run(args))
+    output = json.dumps(results, indent=2, default=float)
+
+    if args.output is not None:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if args.baseline is None:
+        return 0
+
+    regressions = compare(
+        results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold
+    )
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
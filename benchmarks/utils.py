@@ -0,0 +1,22 @@
+"""
+Stores the functions shared by the benchmarks.
+"""
+import subprocess
+from typing import Optional
+
+
+def git_commit() -> Optional[str]:
+    """Gets the current commit (to identify the results).
+
+    Returns:
+        Optional[str]: the commit's hash or None if it isn't available.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -6,12 +6,24 @@ from pathlib import Path
 import mlflow
 from loguru import logger
 
-from ..data.processing import load_dataset
+from ..data.processing import load_dataset, load_dataset_reader
 from ..data.utils import download_dataset
+from ..config.api import api_settings
 from ..config.aws import aws_credentials
 from ..config.model import model_settings
+from ..config.reports import report_settings
 from ..config.settings import general_settings
+from ..model.batching import MicroBatcher
+from ..model.cache import PredictionCache
+from ..model.executor import InferenceExecutor
 from ..model.inference import ModelServe
+from ..monitoring.buffer import TrafficBuffer
+from ..monitoring.jobs import ReportJobManager
+from ..monitoring.profile import load_reference_profile
+from ..monitoring.reports import ReportCache
+from ..monitoring.sketch import SketchWindows
+from ..monitoring.window import WindowCache, fingerprint_dataframe
+from ..schema.person import Person
 
 use_aws = bool(aws_credentials.S3 != "YOUR_S3_BUCKET_URL")
 
@@ -33,20 +45,90 @@ if not Path.exists(
         file_type="current",
     )
 
-logger.info(f"Loading the {general_settings.CURRENT_FILE_NAME} dataset.")
-current_dataset = load_dataset(
-    path=Path.joinpath(general_settings.DATA_PATH, general_settings.CURRENT_FILE_NAME),
-    from_aws=use_aws,
-)
+numerical_columns = [
+    name
+    for name, field in Person.model_fields.items()
+    if field.annotation in [int, float]
+]
+categorical_columns = [
+    name for name, field in Person.model_fields.items() if field.annotation is str
+]
+
+if api_settings.MONITORING_STREAM_CURRENT_DATA:
+    logger.info(f"Indexing the {general_settings.CURRENT_FILE_NAME} dataset.")
+    current_dataset = load_dataset_reader(
+        path=Path.joinpath(
+            general_settings.DATA_PATH, general_settings.CURRENT_FILE_NAME
+        ),
+        from_aws=use_aws,
+        dtype={column: "float64" for column in numerical_columns},
+        index_stride=api_settings.MONITORING_STREAM_INDEX_STRIDE,
+    )
+    current_fingerprint = current_dataset.fingerprint
+else:
+    logger.info(f"Loading the {general_settings.CURRENT_FILE_NAME} dataset.")
+    current_dataset = load_dataset(
+        path=Path.joinpath(
+            general_settings.DATA_PATH, general_settings.CURRENT_FILE_NAME
+        ),
+        from_aws=use_aws,
+    )
+    current_fingerprint = fingerprint_dataframe(current_dataset)
 
 logger.info(f"Loading {model_settings.MODEL_NAME} pre-trained model.")
 loaded_model = ModelServe(
     model_name=model_settings.MODEL_NAME,
     model_flavor=model_settings.MODEL_FLAVOR,
     model_version=model_settings.VERSION,
+    num_threads=api_settings.MODEL_NUM_THREADS,
 )
 loaded_model.load()
 
+inference_executor = InferenceExecutor(
+    max_workers=api_settings.INFERENCE_WORKERS,
+    max_queue_size=api_settings.INFERENCE_QUEUE_SIZE,
+)
+micro_batcher = MicroBatcher(
+    model=loaded_model,
+    executor=inference_executor,
+    max_batch_size=api_settings.MICRO_BATCHING_MAX_BATCH_SIZE,
+    max_wait_time=api_settings.MICRO_BATCHING_MAX_WAIT_MS / 1000,
+)
+prediction_cache = PredictionCache(
+    max_size=api_settings.PREDICTION_CACHE_MAX_SIZE,
+    ttl=api_settings.PREDICTION_CACHE_TTL_SECONDS,
+)
+window_cache = WindowCache(max_size=api_settings.MONITORING_WINDOW_CACHE_SIZE)
+report_cache = ReportCache(
+    path=report_settings.REPORTS_CACHE_PATH,
+    max_bytes=report_settings.REPORTS_CACHE_MAX_BYTES,
+    min_age=report_settings.REPORTS_CACHE_MIN_AGE_SECONDS,
+)
+report_jobs = ReportJobManager(
+    max_workers=api_settings.REPORT_JOBS_WORKERS,
+    max_queue_size=api_settings.REPORT_JOBS_QUEUE_SIZE,
+    max_finished_jobs=api_settings.REPORT_JOBS_MAX_FINISHED,
+)
+traffic_buffer = TrafficBuffer(
+    capacity=api_settings.MONITORING_TRAFFIC_CAPACITY,
+    numerical_columns=numerical_columns,
+    categorical_columns=categorical_columns,
+    spill_path=(
+        general_settings.TRAFFIC_PATH
+        if api_settings.MONITORING_TRAFFIC_SPILL_ENABLED
+        else None
+    ),
+    spill_block_size=api_settings.MONITORING_TRAFFIC_SPILL_BLOCK_SIZE,
+)
+dataset_sketches = SketchWindows(
+    bucket_size=api_settings.MONITORING_SKETCH_BUCKET_SIZE,
+    max_buckets=api_settings.MONITORING_SKETCH_MAX_BUCKETS,
+)
+traffic_sketches = SketchWindows(
+    bucket_size=api_settings.MONITORING_SKETCH_BUCKET_SIZE,
+    max_buckets=api_settings.MONITORING_SKETCH_MAX_BUCKETS,
+)
+
 logger.info("Loading the reference data and filtering its columns.")
 reference_data = load_dataset(
     path=Path.joinpath(
@@ -60,3 +142,17 @@ reference_data = reference_data[
 reference_data["prediction"] = loaded_model.predict(
     reference_data[model_settings.FEATURES].values
 )
+
+logger.info("Loading the reference data's profile.")
+reference_profile = load_reference_profile(
+    dataframe=reference_data,
+    features=model_settings.FEATURES,
+    target_column=general_settings.TARGET_COLUMN,
+    prediction_column="prediction",
+    labels=loaded_model.labels,
+    n_bins=api_settings.MONITORING_DRIFT_BINS,
+    path=Path.joinpath(
+        general_settings.PROFILES_PATH,
+        f"reference_profile_{model_settings.MODEL_NAME}_{model_settings.VERSION}.pkl",
+    ),
+)
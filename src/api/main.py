@@ -1,12 +1,16 @@
 """
 API's main file.
 """
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Text, Tuple
 
+import numpy as np
 import pandas as pd
-from fastapi import FastAPI, Depends
-from fastapi.responses import FileResponse
+from evidently import ColumnMapping
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
 from loguru import logger
 
 from .utils import (
@@ -15,188 +19,298 @@ from .utils import (
     build_model_performance_report,
     build_target_drift_report,
     get_column_mapping,
+    parse_batch_records,
+    validate_batch_records,
 )
-from ..data.processing import data_processing_inference
+from ..data.processing import data_processing_inference, data_processing_record
+from ..config.api import api_settings
 from ..config.model import model_settings
 from ..config.reports import report_settings
 from ..config.settings import general_settings
 from ..schema.person import Person
 from ..schema.monitoring import Monitoring
-from . import current_dataset, loaded_model, reference_data
-
-app = FastAPI()
+from ..data.utils import artifact_registry
+from ..model.executor import ExecutorSaturatedError
+from ..monitoring.drift import calculate_sketch_drift_metrics
+from ..monitoring.jobs import ReportJob
+from ..monitoring.latency import latency_recorder
+from ..monitoring.reports import CachedReport, etag_matches
+from ..monitoring.sketch import DriftSketch, summarize_window
+from ..monitoring.window import MonitoringWindow, get_window_bounds, slice_window
+from . import (
+    current_dataset,
+    current_fingerprint,
+    dataset_sketches,
+    inference_executor,
+    loaded_model,
+    micro_batcher,
+    prediction_cache,
+    reference_data,
+    reference_profile,
+    report_cache,
+    report_jobs,
+    traffic_buffer,
+    traffic_sketches,
+    window_cache,
+)
 
 
-@app.get("/monitor-model")
-def monitor_model_performance(monitoring: Monitoring = Depends()) -> FileResponse:
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     """
-    This endpoint is used to create a report for monitoring model performance.
+    Processes the whole current dataset (and makes its predictions) when the
+    API starts, so the monitoring endpoints only slice it.
 
-    Returns:
-        FileResponse: the report HTML file.
+    Args:
+        _ (FastAPI): the API (ignored).
     """
-    window_size = monitoring.window_size
+    if (
+        api_settings.MONITORING_PRECOMPUTE_ON_STARTUP
+        and not api_settings.MONITORING_STREAM_CURRENT_DATA
+    ):
+        logger.info("Processing the current data and making its predictions.")
+        _load_processed_dataset()
 
-    logger.info(f"Loading current data and selecting the first {window_size} rows.")
-    current_data = current_dataset.head(window_size).copy()
-    current_data = current_data.drop(columns=[general_settings.TARGET_COLUMN])
+    yield
 
-    features = data_processing_inference(dataframe=current_data)
-    current_data = pd.DataFrame(features, columns=model_settings.FEATURES)
-    current_data[general_settings.TARGET_COLUMN] = current_dataset[
-        general_settings.TARGET_COLUMN
-    ].copy()
 
-    current_data["prediction"] = loaded_model.predict(features)
+app = FastAPI(lifespan=lifespan)
 
-    column_mapping = get_column_mapping(
-        dataframe=current_data,
-        target_column=general_settings.TARGET_COLUMN,
-        features=model_settings.FEATURES,
-        predict_column="prediction",
+
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(
+    _: Request, error: ExecutorSaturatedError
+) -> JSONResponse:
+    """
+    Returns a 503 response (with the 'Retry-After' header) when the inference
+    executor (or the report jobs queue) can't accept more requests.
+
+    Args:
+        _ (Request): the request (ignored).
+        error (ExecutorSaturatedError): the raised error.
+
+    Returns:
+        JSONResponse: the error response.
+    """
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(error)},
+        headers={"Retry-After": str(api_settings.INFERENCE_RETRY_AFTER_SECONDS)},
     )
 
-    logger.info("Building the model performance report.")
-    report_path = build_model_performance_report(
-        current_data=current_data,
-        reference_data=reference_data,
-        column_mapping=column_mapping,
-        report_path=Path.joinpath(
-            report_settings.REPORTS_PATH, report_settings.MODEL_PERFORMANCE_REPORT_NAME
-        ),
+
+@app.get("/monitor-model")
+async def monitor_model_performance(
+    request: Request, monitoring: Monitoring = Depends()
+) -> Response:
+    """
+    This endpoint is used to create a report for monitoring model performance.
+
+    Returns:
+        Response: the report HTML file (or a 304 response if the report
+            hasn't changed since the client's cached version).
+    """
+    job = _submit_report_job(
+        report_name=report_settings.MODEL_PERFORMANCE_REPORT_NAME,
+        window=_select_window(monitoring, requires_target=True),
+        build_report=build_model_performance_report,
     )
+    return _report_response(request=request, report=await job.wait())
 
-    logger.info(f"Returning report as HTML file in location {report_path}.")
-    return FileResponse(report_path)
+
+@app.post("/monitor-model", status_code=202)
+def submit_monitor_model_performance(monitoring: Monitoring = Depends()) -> Dict:
+    """
+    This endpoint is used to enqueue the build of a model performance report.
+
+    Returns:
+        Dict: the report job's status (and its id).
+    """
+    return _submit_report_job(
+        report_name=report_settings.MODEL_PERFORMANCE_REPORT_NAME,
+        window=_select_window(monitoring, requires_target=True),
+        build_report=build_model_performance_report,
+    ).to_dict()
 
 
 @app.get("/monitor-target")
-def monitor_target_drift(monitoring: Monitoring = Depends()) -> FileResponse:
+async def monitor_target_drift(
+    request: Request, monitoring: Monitoring = Depends()
+) -> Response:
     """
     This endpoint is used to create a report for monitoring target drift.
 
     Returns:
-        FileResponse: the report HTML file.
+        Response: the report HTML file (or a 304 response if the report
+            hasn't changed since the client's cached version).
     """
-    window_size = monitoring.window_size
+    job = _submit_report_job(
+        report_name=report_settings.TARGET_DRIFT_REPORT_NAME,
+        window=_select_window(monitoring),
+        build_report=build_target_drift_report,
+    )
+    return _report_response(request=request, report=await job.wait())
 
-    logger.info(f"Loading current data and selecting the first {window_size} rows.")
-    current_data = current_dataset.head(window_size).copy()
-    current_data = current_data.drop(columns=[general_settings.TARGET_COLUMN])
 
-    features = data_processing_inference(dataframe=current_data)
-    current_data = pd.DataFrame(features, columns=model_settings.FEATURES)
-    current_data[general_settings.TARGET_COLUMN] = current_dataset[
-        general_settings.TARGET_COLUMN
-    ].copy()
+@app.post("/monitor-target", status_code=202)
+def submit_monitor_target_drift(monitoring: Monitoring = Depends()) -> Dict:
+    """
+    This endpoint is used to enqueue the build of a target drift report.
 
-    current_data["prediction"] = loaded_model.predict(features)
+    Returns:
+        Dict: the report job's status (and its id).
+    """
+    return _submit_report_job(
+        report_name=report_settings.TARGET_DRIFT_REPORT_NAME,
+        window=_select_window(monitoring),
+        build_report=build_target_drift_report,
+    ).to_dict()
 
-    column_mapping = get_column_mapping(
-        dataframe=current_data,
-        target_column=general_settings.TARGET_COLUMN,
-        features=model_settings.FEATURES,
-        predict_column="prediction",
-    )
 
-    logger.info("Building the target drift report.")
-    report_path = build_target_drift_report(
-        current_data=current_data,
-        reference_data=reference_data,
-        column_mapping=column_mapping,
-        report_path=Path.joinpath(
-            report_settings.REPORTS_PATH, report_settings.TARGET_DRIFT_REPORT_NAME
-        ),
+@app.get("/monitor-data")
+async def monitor_data_drift(
+    request: Request, monitoring: Monitoring = Depends()
+) -> Response:
+    """
+    This endpoint is used to create a report for monitoring data drift.
+
+    Returns:
+        Response: the report HTML file (or a 304 response if the report
+            hasn't changed since the client's cached version).
+    """
+    job = _submit_report_job(
+        report_name=report_settings.DATA_DRIFT_REPORT_NAME,
+        window=_select_window(monitoring),
+        build_report=build_data_drift_report,
     )
+    return _report_response(request=request, report=await job.wait())
 
-    logger.info(f"Returning report as HTML file in location {report_path}.")
-    return FileResponse(report_path)
 
+@app.post("/monitor-data", status_code=202)
+def submit_monitor_data_drift(monitoring: Monitoring = Depends()) -> Dict:
+    """
+    This endpoint is used to enqueue the build of a data drift report.
 
-@app.get("/monitor-data")
-def monitor_data_drift(monitoring: Monitoring = Depends()) -> FileResponse:
+    Returns:
+        Dict: the report job's status (and its id).
     """
-    This endpoint is used to create a report for monitoring data drift.
+    return _submit_report_job(
+        report_name=report_settings.DATA_DRIFT_REPORT_NAME,
+        window=_select_window(monitoring),
+        build_report=build_data_drift_report,
+    ).to_dict()
+
+
+@app.get("/monitor-data-quality")
+async def monitor_data_quality(
+    request: Request, monitoring: Monitoring = Depends()
+) -> Response:
+    """
+    This endpoint is used to create a report for monitoring data quality.
 
     Returns:
-        FileResponse: the report HTML file.
+        Response: the report HTML file (or a 304 response if the report
+            hasn't changed since the client's cached version).
     """
-    window_size = monitoring.window_size
+    job = _submit_report_job(
+        report_name=report_settings.DATA_QUALITY_REPORT_NAME,
+        window=_select_window(monitoring),
+        build_report=build_data_quality_report,
+    )
+    return _report_response(request=request, report=await job.wait())
 
-    logger.info(f"Loading current data and selecting the first {window_size} rows.")
-    current_data = current_dataset.head(window_size).copy()
-    current_data = current_data.drop(columns=[general_settings.TARGET_COLUMN])
 
-    features = data_processing_inference(dataframe=current_data)
-    current_data = pd.DataFrame(features, columns=model_settings.FEATURES)
-    current_data[general_settings.TARGET_COLUMN] = current_dataset[
-        general_settings.TARGET_COLUMN
-    ].copy()
+@app.post("/monitor-data-quality", status_code=202)
+def submit_monitor_data_quality(monitoring: Monitoring = Depends()) -> Dict:
+    """
+    This endpoint is used to enqueue the build of a data quality report.
 
-    current_data["prediction"] = loaded_model.predict(features)
+    Returns:
+        Dict: the report job's status (and its id).
+    """
+    return _submit_report_job(
+        report_name=report_settings.DATA_QUALITY_REPORT_NAME,
+        window=_select_window(monitoring),
+        build_report=build_data_quality_report,
+    ).to_dict()
 
-    column_mapping = get_column_mapping(
-        dataframe=current_data,
-        target_column=general_settings.TARGET_COLUMN,
-        features=model_settings.FEATURES,
-        predict_column="prediction",
-    )
 
-    logger.info("Building the data drift report.")
-    report_path = build_data_drift_report(
-        current_data=current_data,
-        reference_data=reference_data,
-        column_mapping=column_mapping,
-        report_path=Path.joinpath(
-            report_settings.REPORTS_PATH, report_settings.DATA_DRIFT_REPORT_NAME
-        ),
-    )
+@app.get("/monitor/metrics")
+def monitor_metrics(monitoring: Monitoring = Depends()) -> Dict:
+    """
+    This endpoint is used to calculate the drift metrics (PSI, Kolmogorov-Smirnov
+    statistic and Jensen-Shannon distance) and the data quality metrics (missing
+    and out of range values) of each feature, and the target and prediction
+    distribution shifts, without building a report. The metrics are calculated
+    by merging the drift sketches of the window's buckets, so only the rows of
+    its partial buckets are scanned.
+
+    Returns:
+        Dict: the drift metrics.
+    """
+    source, (start, stop) = _select_window(monitoring)
 
-    logger.info(f"Returning report as HTML file in location {report_path}.")
-    return FileResponse(report_path)
+    return {
+        "window": {"source": source, "start": start, "stop": stop},
+        **calculate_sketch_drift_metrics(
+            profile=reference_profile,
+            sketch=_sketch_window((source, (start, stop))),
+            psi_threshold=api_settings.MONITORING_PSI_THRESHOLD,
+        ),
+    }
 
 
-@app.get("/monitor-data-quality")
-def monitor_data_quality(monitoring: Monitoring = Depends()) -> FileResponse:
+@app.get("/reports/jobs/{job_id}")
+def check_report_job(job_id: str) -> Dict:
     """
-    This endpoint is used to create a report for monitoring data quality.
+    This endpoint will return the status of a report job.
+
+    Args:
+        job_id (str): the job's id.
+
+    Raises:
+        HTTPException: raises an error if the job doesn't exist.
 
     Returns:
-        FileResponse: the report HTML file.
+        Dict: the job's status.
     """
-    window_size = monitoring.window_size
+    return _get_report_job(job_id).to_dict()
 
-    logger.info(f"Loading current data and selecting the first {window_size} rows.")
-    current_data = current_dataset.head(window_size).copy()
-    current_data = current_data.drop(columns=[general_settings.TARGET_COLUMN])
 
-    features = data_processing_inference(dataframe=current_data)
-    current_data = pd.DataFrame(features, columns=model_settings.FEATURES)
-    current_data[general_settings.TARGET_COLUMN] = current_dataset[
-        general_settings.TARGET_COLUMN
-    ].copy()
+@app.get("/reports/jobs/{job_id}/result")
+def get_report_job_result(request: Request, job_id: str) -> Response:
+    """
+    This endpoint will return the report built by a report job.
 
-    current_data["prediction"] = loaded_model.predict(features)
+    Args:
+        request (Request): the request (used to read the 'If-None-Match' header).
+        job_id (str): the job's id.
 
-    column_mapping = get_column_mapping(
-        dataframe=current_data,
-        target_column=general_settings.TARGET_COLUMN,
-        features=model_settings.FEATURES,
-        predict_column="prediction",
-    )
+    Raises:
+        HTTPException: raises an error if the job doesn't exist, if it hasn't
+            finished yet or if it has failed.
 
-    logger.info("Building the data quality report.")
-    report_path = build_data_quality_report(
-        current_data=current_data,
-        reference_data=reference_data,
-        column_mapping=column_mapping,
-        report_path=Path.joinpath(
-            report_settings.REPORTS_PATH, report_settings.DATA_QUALITY_REPORT_NAME
-        ),
-    )
+    Returns:
+        Response: the report HTML file (or a 304 response if the report
+            hasn't changed since the client's cached version).
+    """
+    job = _get_report_job(job_id)
+
+    if not job.future.done():
+        raise HTTPException(
+            status_code=409, detail=f"The report job is still {job.status}."
+        )
 
-    logger.info(f"Returning report as HTML file in location {report_path}.")
-    return FileResponse(report_path)
+    if job.future.exception() is not None:
+        raise HTTPException(
+            status_code=500,
+            detail=f"The report job has failed: {job.future.exception()}.",
+        )
+
+    # the job's report never changes, so the client can cache it forever
+    response = _report_response(request=request, report=job.future.result())
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
 
 
 @app.get("/version")
@@ -218,19 +332,529 @@ def check_versions() -> Dict:
     }
 
 
+@app.get("/stats")
+def check_stats() -> Dict:
+    """
+    This endpoint will return the internal statistics of the API, such as
+    the artifacts registry's and the micro-batching scheduler's metrics.
+
+    Returns:
+        Dict: the statistics.
+    """
+    return {
+        "artifacts": artifact_registry.stats(),
+        "micro_batching": micro_batcher.stats(),
+        "inference_executor": inference_executor.stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "monitoring_windows": window_cache.stats(),
+        "reports": report_cache.stats(),
+        "report_jobs": report_jobs.stats(),
+        "traffic": traffic_buffer.stats(),
+        "drift_sketches": {
+            "dataset": dataset_sketches.stats(),
+            "live": traffic_sketches.stats(),
+        },
+    }
+
+
+@app.get("/metrics")
+def check_metrics() -> PlainTextResponse:
+    """
+    This endpoint will return the latency histograms of each processing stage
+    (data processing, model predictions and report builds) in the Prometheus
+    text format.
+
+    Returns:
+        PlainTextResponse: the metrics.
+    """
+    return PlainTextResponse(
+        latency_recorder.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.post("/predict")
-async def prediction(person: Person) -> Dict:
+async def prediction(
+    person: Person, response: Response, return_codes: bool = False
+) -> Dict:
     """
     This endpoint is used to make a prediction (with the trained model)
-    with the given data.
+    with the given data. The durations of its processing stages are returned
+    in the 'Server-Timing' header.
 
     Args:
         person (Person): a person's data.
+        response (Response): the response (used to set the 'Server-Timing' header).
+        return_codes (bool): whether to return the predicted class indexes
+            instead of their labels. Defaults to False.
 
     Returns:
         Dict: the predictions.
     """
-    data = pd.DataFrame.from_dict([person.model_dump()])
-    features = data_processing_inference(data)
+    start_time = time.perf_counter()
+    latency_recorder.start_request()
+    record = person.model_dump()
+    codes = None
+
+    if api_settings.PREDICTION_CACHE_ENABLED:
+        generation = _prediction_generation()
+        codes = prediction_cache.get(record, generation)
+
+    if codes is None:
+        if api_settings.MICRO_BATCHING_ENABLED:
+            codes = np.array([await micro_batcher.predict(record)])
+        else:
+            codes = await inference_executor.run(_predict_record, record)
+
+        if api_settings.PREDICTION_CACHE_ENABLED:
+            prediction_cache.put(record, generation, codes)
+
+    if api_settings.MONITORING_TRAFFIC_ENABLED:
+        traffic_buffer.append(record, codes[0])
+
+    predictions = (codes if return_codes else loaded_model.decode(codes)).tolist()
+
+    if latency_recorder.enabled:
+        total = time.perf_counter() - start_time
+        response.headers["Server-Timing"] = latency_recorder.server_timing(total)
+        latency_recorder.observe("api.predict", total)
+
+    return {"predictions": predictions}
+
+
+@app.post("/predict/batch")
+async def batch_prediction(request: Request, return_codes: bool = False) -> Dict:
+    """
+    This endpoint is used to make predictions (with the trained model) for
+    many persons at once. The request's body must be a JSON list of persons
+    or a NDJSON (using the 'application/x-ndjson' content type). Invalid
+    records don't fail the whole batch.
+
+    Args:
+        request (Request): the request containing the persons' data.
+        return_codes (bool): whether to return the predicted class indexes
+            instead of their labels. Defaults to False.
+
+    Returns:
+        Dict: the predictions (in the input order, with null for the invalid
+            records) and the validation errors of the invalid records.
+    """
+    records = parse_batch_records(
+        body=await request.body(),
+        content_type=request.headers.get("content-type", ""),
+    )
+
+    if len(records) > api_settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"The batch size must be at most {api_settings.MAX_BATCH_SIZE}.",
+        )
+
+    persons, errors = validate_batch_records(records)
+    predictions = [None] * len(records)
+
+    if persons:
+        logger.info(f"Making predictions for a batch of {len(persons)} persons.")
+        valid_records = [person.model_dump() for person in persons.values()]
+        codes = await inference_executor.run(_predict_records, valid_records)
+
+        if api_settings.MONITORING_TRAFFIC_ENABLED:
+            for record, code in zip(valid_records, codes):
+                traffic_buffer.append(record, code)
+
+        for index, label in zip(
+            persons, (codes if return_codes else loaded_model.decode(codes)).tolist()
+        ):
+            predictions[index] = label
+
+    return {"predictions": predictions, "errors": errors}
+
+
+def _predict_record(record: Dict[str, Any]) -> np.ndarray:
+    """
+    Preprocesses a single record and makes its prediction.
+
+    Args:
+        record (Dict[str, Any]): the record (a validated person's data).
+
+    Returns:
+        np.ndarray: the predicted class index (inside an array).
+    """
+    features = data_processing_record(record)
+    return loaded_model.predict(features, transform_to_str=False)
+
+
+def _predict_records(records: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Preprocesses many records and makes their predictions at once.
+
+    Args:
+        records (List[Dict[str, Any]]): the records (validated persons' data).
+
+    Returns:
+        np.ndarray: the predicted class indexes (in the same order as the records).
+    """
+    features = data_processing_inference(pd.DataFrame.from_records(records))
+    return loaded_model.predict(features, transform_to_str=False)
+
+
+def _prediction_generation() -> str:
+    """
+    Builds the prediction cache's generation, which changes whenever the model
+    or the artifacts used to process the data change.
+
+    Returns:
+        str: the model's version and run ID, and the artifacts' hashes.
+    """
+    return "|".join(
+        [loaded_model.model_version, model_settings.RUN_ID]
+        + [
+            artifact_registry.fingerprint(
+                path=general_settings.ARTIFACTS_PATH, feature_name=feature_name
+            )
+            for feature_name in ["qcut_bins", "features_ohe", "features_sc"]
+        ]
+    )
+
+
+def _select_window(
+    monitoring: Monitoring, requires_target: bool = False
+) -> Tuple[str, Tuple[int, int]]:
+    """
+    Selects the current window: the first `window_size` rows of the current
+    dataset or the last `window_size` requests (inside the given time range)
+    recorded in the live traffic buffer.
+
+    Args:
+        monitoring (Monitoring): the monitoring parameters.
+        requires_target (bool): whether the window must have the target (which
+            isn't known for the live traffic). Defaults to False.
+
+    Raises:
+        HTTPException: raises an error if the live window is empty or if it
+            is used when the target is required.
+
+    Returns:
+        Tuple[str, Tuple[int, int]]: the window's source and its first and last
+            (exclusive) rows (or requests' sequence numbers).
+    """
+    if monitoring.source == "dataset":
+        # the streamed dataset's file may have grown (or changed) since it
+        # was indexed
+        if api_settings.MONITORING_STREAM_CURRENT_DATA:
+            current_dataset.refresh()
+
+        return "dataset", get_window_bounds(
+            len(current_dataset), monitoring.window_size
+        )
+
+    if requires_target:
+        raise HTTPException(
+            status_code=422,
+            detail="The live traffic has no target, use the 'dataset' source instead.",
+        )
+
+    start, stop = traffic_buffer.select(
+        last=monitoring.window_size if monitoring.window_type == "sliding" else None,
+        start_time=monitoring.start_time,
+        end_time=monitoring.end_time,
+    )
+
+    if monitoring.window_type == "tumbling":
+        start, stop = traffic_sketches.tumbling_bounds(
+            start, stop, monitoring.window_size
+        )
+
+    if start == stop:
+        raise HTTPException(
+            status_code=422,
+            detail="The live traffic buffer has no requests inside the window.",
+        )
+
+    return "live", (start, stop)
+
+
+def _load_window(window: Tuple[str, Tuple[int, int]]) -> MonitoringWindow:
+    """
+    Loads a processed window, which is sliced from the processed dataset shared
+    by all the monitoring reports (or, when the current dataset is streamed,
+    read and processed on its own) or, for the live traffic, read from the
+    traffic buffer and processed (using the served predictions).
+
+    Args:
+        window (Tuple[str, Tuple[int, int]]): the window's source and bounds.
+
+    Returns:
+        MonitoringWindow: the processed window.
+    """
+    source, (start, stop) = window
+
+    if source == "dataset" and api_settings.MONITORING_STREAM_CURRENT_DATA:
+        return window_cache.get(
+            bounds=(start, stop),
+            generation=_prediction_generation(),
+            fingerprint=_current_fingerprint(),
+            compute=_process_current_window,
+        )
+
+    if source == "dataset":
+        return slice_window(_load_processed_dataset(), start, stop)
+
+    logger.info(f"Processing the live traffic requests from {start} to {stop}.")
+    requests = traffic_buffer.read(start, stop)
+
+    return MonitoringWindow(
+        features=data_processing_inference(dataframe=requests.records),
+        target=None,
+        predictions=requests.predictions,
+    )
+
+
+def _sketch_window(window: Tuple[str, Tuple[int, int]]) -> DriftSketch:
+    """
+    Gets the drift sketch of a window, merging the sketches of its buckets
+    (each complete bucket is summarized only once per generation).
+
+    Args:
+        window (Tuple[str, Tuple[int, int]]): the window's source and bounds.
+
+    Returns:
+        DriftSketch: the window's sketch.
+    """
+    source, (start, stop) = window
+    sketches = traffic_sketches if source == "live" else dataset_sketches
+    generation = _prediction_generation()
+
+    # the requests recorded in the live traffic buffer never change
+    if source == "dataset":
+        generation = f"{generation}|{_current_fingerprint()}"
+
+    return sketches.sketch(
+        start=start,
+        stop=stop,
+        generation=generation,
+        summarize=lambda first, last: summarize_window(
+            profile=reference_profile,
+            window=_load_window((source, (first, last))),
+            decode=loaded_model.decode,
+        ),
+    )
+
+
+def _load_current_window(
+    window: Tuple[str, Tuple[int, int]]
+) -> Tuple[pd.DataFrame, ColumnMapping]:
+    """
+    Loads the processed current window (the features, the target, if it is
+    known, and the predictions).
+
+    Args:
+        window (Tuple[str, Tuple[int, int]]): the window's source and bounds.
+
+    Returns:
+        Tuple[pd.DataFrame, ColumnMapping]: the current data and its column mapping.
+    """
+    logger.info(f"Loading current data and selecting the {window} window.")
+    processed_window = _load_window(window)
+    target_column: Optional[str] = None
+
+    current_data = pd.DataFrame(
+        processed_window.features, columns=model_settings.FEATURES
+    )
+
+    if processed_window.target is not None:
+        target_column = general_settings.TARGET_COLUMN
+        current_data[target_column] = processed_window.target
+
+    current_data["prediction"] = loaded_model.decode(processed_window.predictions)
+
+    column_mapping = get_column_mapping(
+        dataframe=current_data,
+        target_column=target_column,
+        features=model_settings.FEATURES,
+        predict_column="prediction",
+    )
+    return current_data, column_mapping
+
+
+def _load_processed_dataset() -> MonitoringWindow:
+    """
+    Loads the whole processed current dataset, which is processed only once
+    (at startup or on first use) and again whenever the model's version or the
+    processing artifacts change.
+
+    Returns:
+        MonitoringWindow: the processed current dataset.
+    """
+    return window_cache.get(
+        bounds=(0, len(current_dataset)),
+        generation=_prediction_generation(),
+        fingerprint=_current_fingerprint(),
+        compute=_process_current_window,
+    )
+
+
+def _process_current_window(start: int, stop: int) -> MonitoringWindow:
+    """
+    Processes a window of the current dataset and makes its predictions.
+
+    Args:
+        start (int): the window's first row.
+        stop (int): the window's last row (exclusive).
+
+    Returns:
+        MonitoringWindow: the processed window.
+    """
+    logger.info(f"Processing the current data rows from {start} to {stop}.")
+
+    if api_settings.MONITORING_STREAM_CURRENT_DATA:
+        current_data = current_dataset.read(start, stop)
+    else:
+        current_data = current_dataset.iloc[start:stop]
+
+    features = data_processing_inference(
+        dataframe=current_data.drop(columns=[general_settings.TARGET_COLUMN])
+    )
+    return MonitoringWindow(
+        features=features,
+        target=current_data[general_settings.TARGET_COLUMN].values,
+        predictions=loaded_model.predict(features, transform_to_str=False),
+    )
+
+
+def _submit_report_job(
+    report_name: str,
+    window: Tuple[str, Tuple[int, int]],
+    build_report: Callable[..., Text],
+) -> ReportJob:
+    """
+    Submits the build of a monitoring report, reusing the in-flight job that
+    builds the same report (same type, window, model's version and current data).
+
+    Args:
+        report_name (str): the report's file name (which identifies its type).
+        window (Tuple[str, Tuple[int, int]]): the window's source and bounds.
+        build_report (Callable[..., Text]): the function that builds the report.
+
+    Returns:
+        ReportJob: the report's job.
+    """
+    key = (report_name, window, _prediction_generation(), _window_fingerprint(window))
+    return report_jobs.submit(
+        key, _build_report, key, report_name, window, build_report
+    )
+
+
+def _window_fingerprint(window: Tuple[str, Tuple[int, int]]) -> str:
+    """
+    Identifies the data of a window's source: the current dataset's fingerprint
+    or, for the live traffic, the traffic buffer's identifier (its sequence
+    numbers restart in each process, while the reports cache is persisted and
+    shared by the API's workers).
+
+    Args:
+        window (Tuple[str, Tuple[int, int]]): the window's source and bounds.
+
+    Returns:
+        str: the source's fingerprint.
+    """
+    if window[0] == "live":
+        return f"live:{traffic_buffer.instance_id}"
+
+    return _current_fingerprint()
+
+
+def _current_fingerprint() -> str:
+    """
+    Gets the current dataset's fingerprint. The streamed dataset's fingerprint
+    changes whenever its file changes (see `_select_window`), while the dataset
+    kept in memory never changes.
+
+    Returns:
+        str: the current dataset's fingerprint.
+    """
+    if api_settings.MONITORING_STREAM_CURRENT_DATA:
+        return current_dataset.fingerprint
+
+    return current_fingerprint
+
+
+def _build_report(
+    key: Tuple,
+    report_name: str,
+    window: Tuple[str, Tuple[int, int]],
+    build_report: Callable[..., Text],
+) -> CachedReport:
+    """
+    Builds a monitoring report (in a unique temporary path, which is then
+    moved into the reports cache), unless the same report is already cached.
+
+    Args:
+        key (Tuple): the report's inputs.
+        report_name (str): the report's file name (which identifies its type).
+        window (Tuple[str, Tuple[int, int]]): the window's source and bounds.
+        build_report (Callable[..., Text]): the function that builds the report.
+
+    Returns:
+        CachedReport: the cached report.
+    """
+    report = report_cache.get(key)
+
+    if report is None:
+        current_data, column_mapping = _load_current_window(window)
+
+        logger.info(f"Building the {Path(report_name).stem} report.")
+        report_path = build_report(
+            current_data=current_data,
+            reference_data=reference_data,
+            column_mapping=column_mapping,
+            report_path=report_cache.temporary_path(),
+        )
+        report = report_cache.put(key, report_path)
+
+        # the latest report of each type is also kept in the reports folder
+        report_cache.publish(
+            report, Path.joinpath(report_settings.REPORTS_PATH, report_name)
+        )
+
+    return report
+
+
+def _get_report_job(job_id: str) -> ReportJob:
+    """
+    Gets a report job by its id.
+
+    Args:
+        job_id (str): the job's id.
+
+    Raises:
+        HTTPException: raises an error if the job doesn't exist.
+
+    Returns:
+        ReportJob: the report's job.
+    """
+    job = report_jobs.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="The report job doesn't exist.")
+
+    return job
+
+
+def _report_response(request: Request, report: CachedReport) -> Response:
+    """
+    Returns a cached monitoring report.
+
+    Args:
+        request (Request): the request (used to read the 'If-None-Match' header).
+        report (CachedReport): the cached report.
+
+    Returns:
+        Response: the report HTML file (or a 304 response if the report
+            hasn't changed since the client's cached version).
+    """
+    if etag_matches(request.headers.get("if-none-match"), report.etag):
+        return Response(status_code=304, headers={"ETag": report.etag})
 
-    return {"predictions": loaded_model.predict(features).tolist()}
+    logger.info(f"Returning report as HTML file in location {report.path}.")
+    return FileResponse(report.path, headers={"ETag": report.etag})
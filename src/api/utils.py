@@ -1,7 +1,11 @@
 """
-Auxiliary functions used to generate monitoring reports.
+Auxiliary functions used to generate monitoring reports and to parse the batch
+prediction requests.
 """
-from typing import List, Text
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Text, Tuple
 from pathlib import Path
 
 import pandas as pd
@@ -22,11 +26,87 @@ from evidently.metric_preset import (
     TargetDriftPreset,
 )
 from evidently.report import Report
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from ..data.utils import remove_file
+from ..monitoring.latency import latency_recorder
+from ..schema.person import Person
+
+
+def parse_batch_records(body: bytes, content_type: str) -> List[Any]:
+    """
+    Splits a batch prediction request's body into its records. The body
+    might be a JSON list or a NDJSON (one JSON record per line).
+
+    Args:
+        body (bytes): the request's body.
+        content_type (str): the request's content type.
+
+    Raises:
+        HTTPException: raises an error if the body is not a valid JSON list.
+
+    Returns:
+        List[Any]: the records (the raw lines, when the body is a NDJSON).
+    """
+    if "ndjson" in content_type:
+        return [line for line in body.splitlines() if line.strip()]
+
+    try:
+        records = json.loads(body)
+    except json.JSONDecodeError as error:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid JSON: {error}."
+        ) from error
+
+    if not isinstance(records, list):
+        raise HTTPException(
+            status_code=422, detail="The request's body must be a list of persons."
+        )
+
+    return records
+
+
+def validate_batch_records(
+    records: List[Any],
+) -> Tuple[Dict[int, Person], List[Dict]]:
+    """
+    Validates each record of a batch prediction request, so invalid records
+    don't fail the whole batch.
+
+    Args:
+        records (List[Any]): the records (or the raw NDJSON lines).
+
+    Returns:
+        Tuple[Dict[int, Person], List[Dict]]: the valid persons (indexed by
+            their position in the batch) and the validation errors.
+    """
+    persons = {}
+    errors = []
+
+    for index, record in enumerate(records):
+        try:
+            if isinstance(record, (bytes, str)):
+                persons[index] = Person.model_validate_json(record)
+            else:
+                persons[index] = Person.model_validate(record)
+        except ValidationError as error:
+            errors.append(
+                {
+                    "index": index,
+                    "detail": [
+                        {"loc": e["loc"], "msg": e["msg"], "type": e["type"]}
+                        for e in error.errors()
+                    ],
+                }
+            )
+
+    return persons, errors
 
 
 def get_column_mapping(
     dataframe: pd.DataFrame,
-    target_column: str,
+    target_column: Optional[str],
     features: List[str],
     predict_column: str,
 ) -> ColumnMapping:
@@ -36,7 +116,8 @@ def get_column_mapping(
 
     Args:
         dataframe (pd.DataFrame): the current dataframe.
-        target_column (str): the target column's name.
+        target_column (Optional[str]): the target column's name (None if
+            the target is unknown, e.g., for the live traffic).
         features (List[str]): a list containing all the features that
             are being used.
         predict_column (str): the prediction column's name.
@@ -62,6 +143,29 @@ def get_column_mapping(
     return column_mapping
 
 
+def save_report(report: Report, report_path: Path) -> None:
+    """
+    Saves a report as an HTML file, writing it to a temporary file that is
+    atomically renamed (so a partially written report is never exposed).
+
+    Args:
+        report (Report): the report (after running it).
+        report_path (Path): where the report will be saved.
+    """
+    report_path = Path(report_path)
+    temporary_path = report_path.with_name(
+        f".{report_path.name}.{uuid.uuid4().hex}.tmp"
+    )
+
+    try:
+        with latency_recorder.time("report.save"):
+            report.save_html(str(temporary_path))
+
+        os.replace(temporary_path, report_path)
+    finally:
+        remove_file(temporary_path)
+
+
 def build_model_performance_report(
     current_data: pd.DataFrame,
     reference_data: pd.DataFrame,
@@ -89,13 +193,14 @@ def build_model_performance_report(
             ClassificationQualityByClass(),
         ]
     )
-    model_performance_report.run(
-        reference_data=reference_data,
-        current_data=current_data,
-        column_mapping=column_mapping,
-    )
+    with latency_recorder.time("report.model_performance"):
+        model_performance_report.run(
+            reference_data=reference_data,
+            current_data=current_data,
+            column_mapping=column_mapping,
+        )
 
-    model_performance_report.save_html(str(report_path))
+    save_report(report=model_performance_report, report_path=report_path)
     return report_path
 
 
@@ -119,13 +224,14 @@ def build_target_drift_report(
         Text: the reported path.
     """
     target_drift_report = Report(metrics=[TargetDriftPreset()])
-    target_drift_report.run(
-        reference_data=reference_data,
-        current_data=current_data,
-        column_mapping=column_mapping,
-    )
+    with latency_recorder.time("report.target_drift"):
+        target_drift_report.run(
+            reference_data=reference_data,
+            current_data=current_data,
+            column_mapping=column_mapping,
+        )
 
-    target_drift_report.save_html(str(report_path))
+    save_report(report=target_drift_report, report_path=report_path)
     return report_path
 
 
@@ -149,13 +255,14 @@ def build_data_drift_report(
         Text: the reported path.
     """
     data_drift_report = Report(metrics=[DataDriftPreset()])
-    data_drift_report.run(
-        reference_data=reference_data,
-        current_data=current_data,
-        column_mapping=column_mapping,
-    )
+    with latency_recorder.time("report.data_drift"):
+        data_drift_report.run(
+            reference_data=reference_data,
+            current_data=current_data,
+            column_mapping=column_mapping,
+        )
 
-    data_drift_report.save_html(str(report_path))
+    save_report(report=data_drift_report, report_path=report_path)
     return report_path
 
 
@@ -186,11 +293,12 @@ def build_data_quality_report(
             DatasetSummaryMetric(),
         ]
     )
-    data_quality_report.run(
-        reference_data=reference_data,
-        current_data=current_data,
-        column_mapping=column_mapping,
-    )
+    with latency_recorder.time("report.data_quality"):
+        data_quality_report.run(
+            reference_data=reference_data,
+            current_data=current_data,
+            column_mapping=column_mapping,
+        )
 
-    data_quality_report.save_html(str(report_path))
+    save_report(report=data_quality_report, report_path=report_path)
     return report_path
@@ -0,0 +1,58 @@
+"""
+Creates a Pydantic's base model for the API settings.
+"""
+from pathlib import Path
+
+from pydantic import (
+    BaseModel,
+    NonNegativeFloat,
+    NonNegativeInt,
+    PositiveFloat,
+    PositiveInt,
+)
+
+from . import read_yaml_credentials_file
+
+
+class APISettings(BaseModel):
+    """Creates a Pydantic's base model for the API settings.
+
+    Args:
+        BaseModel (pydantic.BaseModel): Pydantic base model instance.
+    """
+
+    MAX_BATCH_SIZE: PositiveInt
+    MICRO_BATCHING_ENABLED: bool
+    MICRO_BATCHING_MAX_BATCH_SIZE: PositiveInt
+    MICRO_BATCHING_MAX_WAIT_MS: NonNegativeFloat
+    INFERENCE_WORKERS: PositiveInt
+    INFERENCE_QUEUE_SIZE: NonNegativeInt
+    INFERENCE_RETRY_AFTER_SECONDS: PositiveInt
+    MODEL_NUM_THREADS: NonNegativeInt
+    PREDICTION_CACHE_ENABLED: bool
+    PREDICTION_CACHE_MAX_SIZE: PositiveInt
+    PREDICTION_CACHE_TTL_SECONDS: PositiveFloat
+    MONITORING_WINDOW_CACHE_SIZE: PositiveInt
+    MONITORING_PRECOMPUTE_ON_STARTUP: bool
+    MONITORING_STREAM_CURRENT_DATA: bool
+    MONITORING_STREAM_INDEX_STRIDE: PositiveInt
+    REPORT_JOBS_WORKERS: PositiveInt
+    REPORT_JOBS_QUEUE_SIZE: NonNegativeInt
+    REPORT_JOBS_MAX_FINISHED: PositiveInt
+    MONITORING_DRIFT_BINS: PositiveInt
+    MONITORING_PSI_THRESHOLD: PositiveFloat
+    MONITORING_TRAFFIC_ENABLED: bool
+    MONITORING_TRAFFIC_CAPACITY: PositiveInt
+    MONITORING_TRAFFIC_SPILL_ENABLED: bool
+    MONITORING_TRAFFIC_SPILL_BLOCK_SIZE: PositiveInt
+    MONITORING_SKETCH_BUCKET_SIZE: PositiveInt
+    MONITORING_SKETCH_MAX_BUCKETS: PositiveInt
+    LATENCY_METRICS_ENABLED: bool
+
+
+api_settings = APISettings(
+    **read_yaml_credentials_file(
+        file_path=Path(__file__).resolve().parents[0],
+        file_name="api.yaml",
+    )
+)
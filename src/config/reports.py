@@ -4,7 +4,7 @@ Creates a Pydantic's base model for the reports settings.
 import os
 from pathlib import Path
 
-from pydantic import BaseModel, DirectoryPath
+from pydantic import BaseModel, DirectoryPath, NonNegativeFloat, PositiveInt
 
 from . import read_yaml_credentials_file
 
@@ -21,6 +21,9 @@ class ReportSettings(BaseModel):
     DATA_DRIFT_REPORT_NAME: str
     DATA_QUALITY_REPORT_NAME: str
     MODEL_PERFORMANCE_REPORT_NAME: str
+    REPORTS_CACHE_PATH: Path
+    REPORTS_CACHE_MAX_BYTES: PositiveInt
+    REPORTS_CACHE_MIN_AGE_SECONDS: NonNegativeFloat
 
 
 report_settings = ReportSettings(
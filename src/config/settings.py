@@ -22,6 +22,9 @@ class GeneralSettings(BaseModel):
     FEATURES_PATH: DirectoryPath
     TARGET_COLUMN: str
     RESEARCH_ENVIRONMENT_PATH: DirectoryPath
+    PROFILES_PATH: Path
+    TRAFFIC_PATH: Path
+    COLUMNAR_CACHE_PATH: Path
 
 
 general_settings = GeneralSettings(
@@ -0,0 +1,282 @@
+"""
+Stores the columnar dataset cache, a binary sidecar of each CSV dataset (one
+`.npy` file per column and a JSON schema with the columns' dtypes, where the
+string columns are saved as categorical codes), which is rebuilt only when the
+CSV file changes. Loading a sidecar reads the binary columns without parsing
+any text, but the columns are still copied into the dataframe.
+"""
+import json
+import os
+import pathlib
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .utils import hash_file
+
+SCHEMA_VERSION = 1
+SCHEMA_FILE_NAME = "schema.json"
+
+
+def load_columnar_dataset(
+    path: pathlib.Path,
+    cache_path: pathlib.Path,
+    categorical: bool = False,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Loads a CSV dataset from its columnar sidecar, building the sidecar
+    (from the CSV file) if it doesn't exist or if the CSV file has changed.
+
+    The string columns are returned as object columns by default (as read by
+    `pd.read_csv`, which the data processing functions expect), so the
+    dataframe takes about as much memory as the parsed CSV file. Categorical
+    string columns take much less memory and are faster to load.
+
+    Args:
+        path (pathlib.Path): the CSV file's path.
+        cache_path (pathlib.Path): the folder where the sidecars are kept (each
+            dataset has its own folder, named after the CSV file).
+        categorical (bool): whether the string columns are returned as
+            categoricals. Defaults to False.
+        columns (Optional[List[str]]): the loaded columns (only their files
+            are read). Defaults to None (all the columns).
+
+    Returns:
+        pd.DataFrame: the dataframe.
+    """
+    path = pathlib.Path(path)
+    folder = pathlib.Path.joinpath(pathlib.Path(cache_path), path.stem)
+    schema = _read_schema(folder)
+
+    if schema is not None and columns is not None:
+        missing = set(columns) - {column["name"] for column in schema["columns"]}
+
+        if missing:
+            raise KeyError(f"The columns {sorted(missing)} don't exist.")
+
+    if schema is not None and _is_fresh(schema, path, folder):
+        try:
+            return _read_columns(folder, schema, categorical, columns)
+        except (OSError, ValueError, KeyError) as error:
+            logger.warning(f"Couldn't read the columnar dataset {folder}: {error}.")
+
+    logger.info(f"Building the columnar dataset of {path}.")
+    source = _describe_source(path)
+    dataframe = pd.read_csv(path, sep=",")
+
+    try:
+        _write_columns(categorize_dataframe(dataframe), folder, source)
+    except OSError as error:
+        logger.warning(f"Couldn't save the columnar dataset {folder}: {error}.")
+
+    if columns is not None:
+        dataframe = dataframe[columns]
+
+    return categorize_dataframe(dataframe) if categorical else dataframe
+
+
+def categorize_dataframe(dataframe: pd.DataFrame) -> pd.DataFrame:
+    """Transforms the string (object) columns of a dataframe into categoricals.
+
+    Args:
+        dataframe (pd.DataFrame): the dataframe.
+
+    Returns:
+        pd.DataFrame: the dataframe with categorical string columns.
+    """
+    return dataframe.astype(
+        {
+            column: "category"
+            for column in dataframe.columns
+            if pd.api.types.is_object_dtype(dataframe[column])
+        }
+    )
+
+
+def _describe_source(path: pathlib.Path) -> Dict[str, Any]:
+    """Describes a CSV file (used to check whether its sidecar is up to date).
+
+    Args:
+        path (pathlib.Path): the CSV file's path.
+
+    Returns:
+        Dict[str, Any]: the file's path, size, modification time and hash.
+    """
+    file_stat = os.stat(path)
+
+    return {
+        "path": str(path.resolve()),
+        "size": file_stat.st_size,
+        "mtime_ns": file_stat.st_mtime_ns,
+        "sha256": hash_file(str(path)),
+    }
+
+
+def _is_fresh(schema: Dict[str, Any], path: pathlib.Path, folder: pathlib.Path) -> bool:
+    """Checks whether a sidecar matches its CSV file. The file is hashed only
+    when its size is the same but its modification time has changed (e.g.,
+    when the file was copied again).
+
+    Args:
+        schema (Dict[str, Any]): the sidecar's schema.
+        path (pathlib.Path): the CSV file's path.
+        folder (pathlib.Path): the sidecar's folder.
+
+    Returns:
+        bool: whether the sidecar is up to date.
+    """
+    source = schema["source"]
+    file_stat = os.stat(path)
+
+    if source["path"] != str(path.resolve()) or source["size"] != file_stat.st_size:
+        return False
+
+    if source["mtime_ns"] == file_stat.st_mtime_ns:
+        return True
+
+    if source["sha256"] != hash_file(str(path)):
+        return False
+
+    # the file was touched, but its content is still the same
+    try:
+        _save_schema(
+            folder, {**schema, "source": {**source, "mtime_ns": file_stat.st_mtime_ns}}
+        )
+    except OSError:
+        pass
+
+    return True
+
+
+def _read_schema(folder: pathlib.Path) -> Optional[Dict[str, Any]]:
+    """Reads a sidecar's schema.
+
+    Args:
+        folder (pathlib.Path): the sidecar's folder.
+
+    Returns:
+        Optional[Dict[str, Any]]: the schema or None if it doesn't exist (or
+            if it was saved with another version).
+    """
+    try:
+        with open(
+            pathlib.Path.joinpath(folder, SCHEMA_FILE_NAME), "r", encoding="utf-8"
+        ) as file:
+            schema = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    return schema if schema.get("version") == SCHEMA_VERSION else None
+
+
+def _read_columns(
+    folder: pathlib.Path,
+    schema: Dict[str, Any],
+    categorical: bool,
+    columns: Optional[List[str]],
+) -> pd.DataFrame:
+    """Reads a sidecar's columns.
+
+    Args:
+        folder (pathlib.Path): the sidecar's folder.
+        schema (Dict[str, Any]): the sidecar's schema.
+        categorical (bool): whether the string columns are returned as categoricals.
+        columns (Optional[List[str]]): the loaded columns (None for all of them).
+
+    Returns:
+        pd.DataFrame: the dataframe.
+    """
+    schema_columns = {column["name"]: column for column in schema["columns"]}
+    values_by_column = {}
+
+    for name in columns if columns is not None else list(schema_columns):
+        column = schema_columns[name]
+        values = np.load(
+            pathlib.Path.joinpath(folder, column["file"]), allow_pickle=False
+        )
+
+        if column["dtype"] == "category" and categorical:
+            values = pd.Categorical.from_codes(values, categories=column["categories"])
+        elif column["dtype"] == "category":
+            # the code -1 (a missing value) takes the last item
+            values = np.array(column["categories"] + [np.nan], dtype=object)[values]
+        elif str(values.dtype) != column["dtype"]:
+            raise ValueError(f"The column {column['name']} has an unexpected dtype.")
+
+        values_by_column[name] = values
+
+    # raises ValueError if a column doesn't have the expected number of rows
+    return pd.DataFrame(values_by_column, index=pd.RangeIndex(schema["rows"]))
+
+
+def _write_columns(
+    dataframe: pd.DataFrame, folder: pathlib.Path, source: Dict[str, Any]
+) -> None:
+    """Saves a dataframe's columns (each one in its own `.npy` file) and its
+    schema, which is written last (and atomically), so the sidecar is never
+    read while it's incomplete.
+
+    Args:
+        dataframe (pd.DataFrame): the dataframe (with categorical string columns).
+        folder (pathlib.Path): the sidecar's folder.
+        source (Dict[str, Any]): the CSV file's description.
+    """
+    os.makedirs(folder, exist_ok=True)
+    build_id = uuid.uuid4().hex
+    columns = []
+
+    for index, (name, series) in enumerate(dataframe.items()):
+        file_name = f"{build_id}_{index}.npy"
+        column = {"name": name, "dtype": str(series.dtype), "file": file_name}
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            column["categories"] = series.cat.categories.tolist()
+            values = series.cat.codes.values
+        else:
+            values = series.values
+
+        np.save(pathlib.Path.joinpath(folder, file_name), values, allow_pickle=False)
+        columns.append(column)
+
+    _save_schema(
+        folder,
+        {
+            "version": SCHEMA_VERSION,
+            "source": source,
+            "rows": len(dataframe),
+            "columns": columns,
+        },
+    )
+
+    # removing the files of the previous builds
+    for file_path in folder.glob("*.npy"):
+        if not file_path.name.startswith(build_id):
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+
+def _save_schema(folder: pathlib.Path, schema: Dict[str, Any]) -> None:
+    """Saves a sidecar's schema (writing it to a temporary file that is
+    atomically renamed).
+
+    Args:
+        folder (pathlib.Path): the sidecar's folder.
+        schema (Dict[str, Any]): the schema.
+    """
+    temporary_path = pathlib.Path.joinpath(
+        folder, f".{SCHEMA_FILE_NAME}.{uuid.uuid4().hex}.tmp"
+    )
+
+    try:
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(schema, file, indent=2)
+
+        os.replace(temporary_path, pathlib.Path.joinpath(folder, SCHEMA_FILE_NAME))
+    finally:
+        if temporary_path.exists():
+            os.remove(temporary_path)
@@ -0,0 +1,138 @@
+"""
+Stores a precomputed (compiled) version of the fitted one hot encoders, which
+maps each category directly to its position in the encoded output.
+"""
+import threading
+import warnings
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder
+
+UNKNOWN_CATEGORY = "__unknown_category__"
+
+
+class OneHotLayout:
+    """The output layout of a fitted OneHotEncoder."""
+
+    def __init__(self, column: str, encoder: OneHotEncoder) -> None:
+        """Layout's instance initializer.
+
+        The position of every category is obtained by transforming each category
+        (and an unknown one) with the fitted encoder, so dropped, infrequent and
+        unknown categories are mapped exactly like the encoder itself does.
+
+        Args:
+            column (str): the encoded column's name.
+            encoder (OneHotEncoder): the fitted encoder.
+        """
+        self.column = column
+        self.categories = pd.Index(encoder.categories_[0])
+        self.feature_names = [
+            f"{column}_{name}" for name in encoder.get_feature_names_out()
+        ]
+
+        with warnings.catch_warnings():
+            # transforming an unknown category raises a warning
+            warnings.simplefilter("ignore")
+            encoded = encoder.transform(
+                np.array(
+                    self.categories.tolist() + [UNKNOWN_CATEGORY], dtype=object
+                ).reshape(-1, 1)
+            )
+
+        encoded = np.asarray(encoded)
+        positions = np.where(encoded.any(axis=1), encoded.argmax(axis=1), -1)
+
+        # the position of each category in the encoded output (-1 means that
+        # the category is encoded as all zeros, e.g., the dropped category)
+        self.positions = positions[:-1]
+        self.unknown_position = int(positions[-1])
+        self.index: Dict[Any, int] = dict(
+            zip(self.categories.tolist(), self.positions.tolist())
+        )
+
+    @property
+    def width(self) -> int:
+        """The number of columns of the encoded output.
+
+        Returns:
+            int: the encoded output's width.
+        """
+        return len(self.feature_names)
+
+    def encode_positions(self, values: np.ndarray) -> np.ndarray:
+        """Maps each value to its position in the encoded output.
+
+        Args:
+            values (np.ndarray): the column's values.
+
+        Returns:
+            np.ndarray: the output position of each value (-1 means all zeros).
+        """
+        codes = self.categories.get_indexer(values)
+        positions = self.positions[codes]
+        positions[codes == -1] = self.unknown_position
+        return positions
+
+
+_layouts_lock = threading.Lock()
+_layouts_cache: Dict[int, Tuple[OneHotEncoder, OneHotLayout]] = {}
+
+
+def get_layout(column: str, encoder: OneHotEncoder) -> OneHotLayout:
+    """Gets the layout of a fitted encoder, compiling it only once per encoder.
+
+    Args:
+        column (str): the encoded column's name.
+        encoder (OneHotEncoder): the fitted encoder.
+
+    Returns:
+        OneHotLayout: the encoder's layout.
+    """
+    with _layouts_lock:
+        cached = _layouts_cache.get(id(encoder))
+
+        # the encoder is kept in the cache, so its id can't be reused
+        if cached is not None and cached[0] is encoder and cached[1].column == column:
+            return cached[1]
+
+        layout = OneHotLayout(column, encoder)
+        _layouts_cache[id(encoder)] = (encoder, layout)
+        return layout
+
+
+def compile_encoders(encoders: Dict[str, OneHotEncoder]) -> Dict[str, OneHotLayout]:
+    """Compiles the fitted encoders into their output layouts.
+
+    Args:
+        encoders (Dict[str, OneHotEncoder]): a dict containing the corresponding
+            encoder for each feature.
+
+    Returns:
+        Dict[str, OneHotLayout]: a dict containing the layout of each encoder.
+    """
+    return {
+        column: OneHotLayout(column, encoder) for column, encoder in encoders.items()
+    }
+
+
+def find_encoded_feature(
+    feature: str, layouts: Dict[str, OneHotLayout]
+) -> Optional[Tuple[str, int]]:
+    """Finds which encoder (and which output position) generates a feature.
+
+    Args:
+        feature (str): the encoded feature's name (e.g., 'Gender_x0_Male').
+        layouts (Dict[str, OneHotLayout]): the encoders' layouts.
+
+    Returns:
+        Optional[Tuple[str, int]]: the encoded column's name and the feature's
+            output position, or None if no encoder generates that feature.
+    """
+    for column, layout in layouts.items():
+        if feature in layout.feature_names:
+            return column, layout.feature_names.index(feature)
+
+    return None
@@ -0,0 +1,397 @@
+"""
+Stores the feature plan, a precomputed version of the data processing pipeline
+that turns the raw data directly into the model's features (following the
+`model_settings.FEATURES` order).
+"""
+import bisect
+import math
+import threading
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from ..config.model import model_settings
+from ..config.settings import general_settings
+from ..monitoring.latency import latency_recorder
+from .encoding import compile_encoders, find_encoded_feature
+from .utils import artifact_registry
+
+AGE_LABELS = ["q1", "q2", "q3", "q4"]
+NUMERICAL_COLUMNS = [
+    "Height",
+    "Weight",
+    "FCVC",
+    "NCP",
+    "CH2O",
+    "FAF",
+    "TUE",
+    "BMI",
+    "PAL",
+    "BSA",
+    "IBW",
+]
+NOT_LOG_TRANSFORMED_COLUMNS = ["PAL"]
+
+
+class FeaturePlan:
+    """The precomputed data processing pipeline's class."""
+
+    def __init__(
+        self,
+        features: List[str],
+        bins: np.ndarray,
+        encoders: Dict[str, OneHotEncoder],
+        scalers: Dict[str, StandardScaler],
+        epsilon: float = 1e-10,
+    ) -> None:
+        """Plan's instance initializer.
+
+        Args:
+            features (List[str]): the features used by the model (in order).
+            bins (np.ndarray): the bins used to categorize the 'Age' column.
+            encoders (Dict[str, OneHotEncoder]): a dict containing the corresponding
+                encoder for each feature.
+            scalers (Dict[str, StandardScaler]): a dict containing the corresponding
+                scaler for each feature.
+            epsilon (float): a really small value (called epsilon) used to avoid
+                calculate the log of 0. Defaults to 1e-10.
+
+        Raises:
+            ValueError: raises ValueError if a feature can't be generated by the
+                data processing pipeline.
+        """
+        self.features = list(features)
+        self.bins = [float(value) for value in bins]
+        self.epsilon = epsilon
+        self.layouts = compile_encoders(encoders)
+
+        # numerical features: (output position, column, log transform, mean, scale)
+        self.numerical: List[Tuple[int, str, bool, float, float]] = []
+
+        # categorical features: column -> (category -> output position, unknown
+        # category's output position), where -1 means that nothing is set
+        self.categorical: Dict[str, Tuple[Dict[Any, int], int]] = {}
+
+        # categorical features: column -> output position of each encoded column
+        # (with an extra -1 at the end, used by the all zeros categories)
+        self.categorical_positions: Dict[str, np.ndarray] = {}
+        selected: Dict[str, Dict[int, int]] = {}
+
+        for position, feature in enumerate(self.features):
+            if feature in scalers and feature in NUMERICAL_COLUMNS:
+                scaler = scalers[feature]
+                self.numerical.append(
+                    (
+                        position,
+                        feature,
+                        feature not in NOT_LOG_TRANSFORMED_COLUMNS,
+                        float(scaler.mean_[0]) if scaler.with_mean else 0.0,
+                        float(scaler.scale_[0]) if scaler.with_std else 1.0,
+                    )
+                )
+                continue
+
+            encoded_feature = find_encoded_feature(feature, self.layouts)
+
+            if encoded_feature is None:
+                raise ValueError(
+                    f"The feature '{feature}' can't be generated by the data processing pipeline."
+                )
+
+            column, output_position = encoded_feature
+            selected.setdefault(column, {})[output_position] = position
+
+        for column, positions in selected.items():
+            layout = self.layouts[column]
+            self.categorical[column] = (
+                {
+                    category: positions.get(output_position, -1)
+                    for category, output_position in layout.index.items()
+                },
+                positions.get(layout.unknown_position, -1),
+            )
+            self.categorical_positions[column] = np.array(
+                [positions.get(index, -1) for index in range(layout.width)] + [-1]
+            )
+
+    def transform(self, dataframe: pd.DataFrame) -> np.ndarray:
+        """Transforms the raw dataframe into the model's features in a single pass,
+        writing only the selected features into a preallocated array (the columns
+        that are not used by the model are never computed).
+
+        Args:
+            dataframe (pd.DataFrame): the raw dataframe (it is not modified).
+
+        Returns:
+            np.ndarray: the features array.
+        """
+        features = np.zeros((len(dataframe), len(self.features)))
+        columns: Dict[str, np.ndarray] = {}
+
+        with latency_recorder.time("processing.numerical"):
+            for position, column, log_transform, mean, scale in self.numerical:
+                output = features[:, position]
+                values = self._numerical_column(dataframe, column, columns)
+
+                if log_transform:
+                    np.log(values + self.epsilon, out=output)
+                else:
+                    output[:] = values
+
+                # same operations (and order) as the `StandardScaler.transform`
+                output -= mean
+                output /= scale
+
+        with latency_recorder.time("processing.categorical"):
+            for column, positions in self.categorical_positions.items():
+                encoded_positions = positions[
+                    self.layouts[column].encode_positions(
+                        self._categorical_column(dataframe, column, columns)
+                    )
+                ]
+                rows = np.flatnonzero(encoded_positions >= 0)
+                features[rows, encoded_positions[rows]] = 1.0
+
+        return features
+
+    def transform_record(self, record: Dict[str, Any]) -> np.ndarray:
+        """Transforms a single raw record (e.g., a validated `Person`) into the
+        model's features without using pandas.
+
+        Args:
+            record (Dict[str, Any]): the raw record.
+
+        Returns:
+            np.ndarray: the features array (with shape (1, number of features)).
+        """
+        features = np.zeros((1, len(self.features)))
+        row = features[0]
+
+        with latency_recorder.time("processing.numerical"):
+            values = self._record_numerical_values(record)
+            log = math.log
+            epsilon = self.epsilon
+
+            for position, column, log_transform, mean, scale in self.numerical:
+                value = values[column]
+
+                if log_transform:
+                    value = log(value + epsilon)
+
+                row[position] = (value - mean) / scale
+
+        with latency_recorder.time("processing.categorical"):
+            for column, (index, unknown_position) in self.categorical.items():
+                position = index.get(
+                    self._record_categorical_value(record, column), unknown_position
+                )
+
+                if position >= 0:
+                    row[position] = 1.0
+
+        return features
+
+    @staticmethod
+    def _numerical_column(
+        dataframe: pd.DataFrame, column: str, columns: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """Gets (calculating it, if it is an engineered column) a numerical column.
+
+        Args:
+            dataframe (pd.DataFrame): the raw dataframe.
+            column (str): the numerical column's name.
+            columns (Dict[str, np.ndarray]): the columns already calculated.
+
+        Returns:
+            np.ndarray: the column's values.
+        """
+        if column in columns:
+            return columns[column]
+
+        def _get(name: str) -> np.ndarray:
+            return FeaturePlan._numerical_column(dataframe, name, columns)
+
+        if column == "Height":
+            values = np.asarray(dataframe["Height"].values, dtype=np.float64) * 100
+        elif column == "BMI":
+            values = _get("Weight") / (_get("Height") ** 2)
+        elif column == "PAL":
+            values = _get("FAF") - _get("TUE")
+        elif column == "BSA":
+            values = calculate_bsa(
+                dataframe["Gender"].values == "Female", _get("Height"), _get("Weight")
+            )
+        elif column == "IBW":
+            values = calculate_ibw(
+                dataframe["Gender"].values == "Female", _get("Height")
+            )
+        else:
+            values = np.asarray(dataframe[column].values, dtype=np.float64)
+
+        columns[column] = values
+        return values
+
+    def _categorical_column(
+        self, dataframe: pd.DataFrame, column: str, columns: Dict[str, np.ndarray]
+    ) -> np.ndarray:
+        """Gets (calculating it, if it is a categorized column) a categorical column.
+
+        Args:
+            dataframe (pd.DataFrame): the raw dataframe.
+            column (str): the categorical column's name.
+            columns (Dict[str, np.ndarray]): the columns already calculated.
+
+        Returns:
+            np.ndarray: the column's values.
+        """
+        if column == "Age":
+            # same as `pd.cut` (right-closed intervals), where values outside
+            # the bins are treated as unknown categories
+            bin_indexes = (
+                np.searchsorted(
+                    self.bins,
+                    np.asarray(dataframe["Age"].values, dtype=np.float64),
+                    side="left",
+                )
+                - 1
+            )
+            bin_indexes[(bin_indexes < 0) | (bin_indexes >= len(AGE_LABELS))] = -1
+            return np.array(AGE_LABELS + [None], dtype=object)[bin_indexes]
+
+        if column == "EVEMM":
+            return (
+                self._numerical_column(dataframe, "FCVC", columns)
+                >= self._numerical_column(dataframe, "NCP", columns)
+            ).astype(int)
+
+        return np.asarray(dataframe[column].values, dtype=object)
+
+    @staticmethod
+    def _record_numerical_values(record: Dict[str, Any]) -> Dict[str, float]:
+        """Calculates the numerical columns (including the engineered ones) of
+        a single raw record.
+
+        Args:
+            record (Dict[str, Any]): the raw record.
+
+        Returns:
+            Dict[str, float]: the value of each numerical column.
+        """
+        height = record["Height"] * 100
+        weight = record["Weight"]
+
+        # Schlich (BSA) and B. J. Devine (IBW) formulas
+        if record["Gender"] == "Female":
+            bsa = 0.000975482 * (weight**0.46) * (height**1.08)
+            ibw = 45.5 + 0.9 * (height - 152)
+        else:
+            bsa = 0.000579479 * (weight**0.38) * (height**1.24)
+            ibw = 50.0 + 0.9 * (height - 152)
+
+        return {
+            "Height": height,
+            "Weight": weight,
+            "FCVC": record["FCVC"],
+            "NCP": record["NCP"],
+            "CH2O": record["CH2O"],
+            "FAF": record["FAF"],
+            "TUE": record["TUE"],
+            "BMI": weight / (height**2),
+            "PAL": record["FAF"] - record["TUE"],
+            "BSA": bsa,
+            "IBW": ibw,
+        }
+
+    def _record_categorical_value(self, record: Dict[str, Any], column: str) -> Any:
+        """Gets the category of a single raw record for a given column.
+
+        Args:
+            record (Dict[str, Any]): the raw record.
+            column (str): the categorical column's name.
+
+        Returns:
+            Any: the record's category.
+        """
+        if column == "Age":
+            # same as `pd.cut` (right-closed intervals)
+            bin_index = bisect.bisect_left(self.bins, record["Age"]) - 1
+            return AGE_LABELS[bin_index] if 0 <= bin_index < len(AGE_LABELS) else None
+
+        if column == "EVEMM":
+            return int(record["FCVC"] >= record["NCP"])
+
+        return record[column]
+
+
+def calculate_bsa(
+    female: np.ndarray, height: np.ndarray, weight: np.ndarray
+) -> np.ndarray:
+    """Calculates the Body Surface Area (BSA) based on the Schlich's formula,
+    selecting the gender-specific coefficients.
+
+    Args:
+        female (np.ndarray): whether each person is a female or not.
+        height (np.ndarray): the persons' heights (in centimeters).
+        weight (np.ndarray): the persons' weights.
+
+    Returns:
+        np.ndarray: the BSA values.
+    """
+    return (
+        np.where(female, 0.000975482, 0.000579479)
+        * np.power(weight, np.where(female, 0.46, 0.38))
+        * np.power(height, np.where(female, 1.08, 1.24))
+    )
+
+
+def calculate_ibw(female: np.ndarray, height: np.ndarray) -> np.ndarray:
+    """Calculates the Ideal Body Weight (IBW) based on the B. J. Devine's formula,
+    selecting the gender-specific coefficient.
+
+    Args:
+        female (np.ndarray): whether each person is a female or not.
+        height (np.ndarray): the persons' heights (in centimeters).
+
+    Returns:
+        np.ndarray: the IBW values.
+    """
+    return np.where(female, 45.5, 50.0) + 0.9 * (height - 152)
+
+
+_feature_plan_lock = threading.Lock()
+_feature_plan_cache: Dict[str, Any] = {"artifacts": (), "plan": None}
+
+
+def load_feature_plan() -> FeaturePlan:
+    """Loads the feature plan, building it again only when the artifacts used
+    to build it (bins, encoders, and scalers) have changed.
+
+    Returns:
+        FeaturePlan: the feature plan.
+    """
+    artifacts = tuple(
+        artifact_registry.load(
+            path=general_settings.ARTIFACTS_PATH, feature_name=feature_name
+        )
+        for feature_name in ["qcut_bins", "features_ohe", "features_sc"]
+    )
+
+    with _feature_plan_lock:
+        cached_artifacts = _feature_plan_cache["artifacts"]
+
+        if _feature_plan_cache["plan"] is None or any(
+            artifact is not cached_artifact
+            for artifact, cached_artifact in zip(artifacts, cached_artifacts)
+        ):
+            bins, encoders, scalers = artifacts
+            _feature_plan_cache["plan"] = FeaturePlan(
+                features=model_settings.FEATURES,
+                bins=bins,
+                encoders=encoders,
+                scalers=scalers,
+            )
+            _feature_plan_cache["artifacts"] = artifacts
+
+        return _feature_plan_cache["plan"]
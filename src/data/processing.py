@@ -4,7 +4,7 @@ enconding categorical columns, and so on.
 """
 import os
 import pathlib
-from typing import List, Dict
+from typing import Any, Dict, Iterator, List, Optional, Union
 
 import boto3
 import numpy as np
@@ -15,11 +15,53 @@ from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from ..config.aws import aws_credentials
 from ..config.model import model_settings
 from ..config.settings import general_settings
-from .utils import load_feature
+from ..monitoring.latency import latency_recorder
+from .columnar import load_columnar_dataset
+from .encoding import get_layout
+from .plan import calculate_bsa, calculate_ibw, load_feature_plan
+from .streaming import WindowedReader, iter_dataset_chunks
+from .utils import artifact_registry
 
 
 def data_processing_inference(dataframe: pd.DataFrame) -> np.ndarray:
-    """Applies the data processing pipeline.
+    """Applies the data processing pipeline using the precomputed feature plan,
+    which fuses the feature engineering, log transformation, scaling and encoding
+    steps into a single pass over the data.
+
+    Args:
+        dataframe (pd.DataFrame): the dataframe.
+
+    Returns:
+        np.ndarray: the features array.
+    """
+    logger.info(
+        f"Applying the feature plan, keeping only {model_settings.FEATURES} columns."
+    )
+    with latency_recorder.time("processing.artifacts"):
+        feature_plan = load_feature_plan()
+
+    return feature_plan.transform(dataframe)
+
+
+def data_processing_record(record: Dict[str, Any]) -> np.ndarray:
+    """Applies the data processing pipeline to a single record (e.g., a validated
+    `Person`) using the precomputed feature plan, without building a dataframe.
+
+    Args:
+        record (Dict[str, Any]): the record.
+
+    Returns:
+        np.ndarray: the features array (with a single row).
+    """
+    with latency_recorder.time("processing.artifacts"):
+        feature_plan = load_feature_plan()
+
+    return feature_plan.transform_record(record)
+
+
+def _data_processing_steps(dataframe: pd.DataFrame) -> np.ndarray:
+    """Applies the data processing pipeline step by step (the same steps used
+    to train the model), which is slower than the feature plan.
 
     Args:
         dataframe (pd.DataFrame): the dataframe.
@@ -55,7 +97,7 @@ def data_processing_inference(dataframe: pd.DataFrame) -> np.ndarray:
     # Feature transformation step)
     # Transforming the AGE and EVEMM columns in categorical
     logger.info("Categorizing the numerical columns 'Age' and 'EVEMM'.")
-    age_bins = load_feature(
+    age_bins = artifact_registry.load(
         path=general_settings.ARTIFACTS_PATH, feature_name="qcut_bins"
     )
     dataframe = _categorize_numerical_columns(dataframe, age_bins)
@@ -67,14 +109,14 @@ def data_processing_inference(dataframe: pd.DataFrame) -> np.ndarray:
     logger.info(
         f"Loading encoders 'features_ohe' from path {general_settings.ARTIFACTS_PATH}."
     )
-    encoders = load_feature(
+    encoders = artifact_registry.load(
         path=general_settings.ARTIFACTS_PATH, feature_name="features_ohe"
     )
 
     logger.info(
         f"Loading scalers 'features_sc' from path {general_settings.ARTIFACTS_PATH}."
     )
-    scalers = load_feature(
+    scalers = artifact_registry.load(
         path=general_settings.ARTIFACTS_PATH, feature_name="features_sc"
     )
 
@@ -155,7 +197,7 @@ def _create_evemm_feature(dataframe: pd.DataFrame) -> pd.DataFrame:
 
 
 def _create_bsa_feature(dataframe: pd.DataFrame) -> pd.DataFrame:
-    """Calculates the Body Surface Area (BSA) feature.
+    """Calculates the Body Surface Area (BSA) feature based on the Schlich's formula.
 
     Args:
         dataframe (pd.DataFrame): the dataframe.
@@ -164,33 +206,16 @@ def _create_bsa_feature(dataframe: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: the dataframe with a new column corresponding to the
             value of BSA for each data.
     """
-
-    def _calculate_bsa(gender: str, height: float, weight: float) -> float:
-        """
-        Auxiliary function that calculates the BSA based on the Schlich's formula.
-
-        Args:
-            gender (str): the person's gender.
-            height (float): the person's height.
-            weight (float): the person's weight.
-
-        Returns:
-            float: the BSA value for that person.
-        """
-        # Schlich formula
-        if gender == "Female":
-            return 0.000975482 * (weight**0.46) * (height**1.08)
-
-        return 0.000579479 * (weight**0.38) * (height**1.24)
-
-    dataframe["BSA"] = dataframe.apply(
-        lambda x: _calculate_bsa(x["Gender"], x["Height"], x["Weight"]), axis=1
+    dataframe["BSA"] = calculate_bsa(
+        female=dataframe["Gender"].values == "Female",
+        height=dataframe["Height"].values.astype(np.float64),
+        weight=dataframe["Weight"].values.astype(np.float64),
     )
     return dataframe
 
 
 def _create_ibw_feature(dataframe: pd.DataFrame) -> pd.DataFrame:
-    """Calculates the Ideal Body Weight (IBW) feature.
+    """Calculates the Ideal Body Weight (IBW) feature based on the B. J. Devine's formula.
 
     Args:
         dataframe (pd.DataFrame): the dataframe.
@@ -199,26 +224,9 @@ def _create_ibw_feature(dataframe: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: the dataframe with a new column corresponding to the
             value of IBW for each data.
     """
-
-    def calculate_ibw(gender: str, height: float) -> float:
-        """
-        Auxiliary function that calculates the IBW based on the B. J. Devine's formula.
-
-        Args:
-            gender (str): the person's gender.
-            height (float): the person's height.
-
-        Returns:
-            float: the IBW value for that person.
-        """
-        # B. J. Devine formula
-        if gender == "Female":
-            return 45.5 + 0.9 * (height - 152)
-
-        return 50 + 0.9 * (height - 152)
-
-    dataframe["IBW"] = dataframe.apply(
-        lambda x: calculate_ibw(x["Gender"], x["Height"]), axis=1
+    dataframe["IBW"] = calculate_ibw(
+        female=dataframe["Gender"].values == "Female",
+        height=dataframe["Height"].values.astype(np.float64),
     )
     return dataframe
 
@@ -309,18 +317,27 @@ def _encode_categorical_columns(
     categorical_columns = dataframe.select_dtypes(include="object").columns.tolist()
     logger.info(f"Encoding the {categorical_columns} columns.")
 
-    new_dataframe = pd.DataFrame()
+    # building the full output (of all encoders) at once and filling the
+    # one hot positions with integer indexing
+    layouts = [get_layout(column, encoders[column]) for column in categorical_columns]
+    encoded = np.zeros((dataframe.shape[0], sum(layout.width for layout in layouts)))
+    feature_names = []
+    offset = 0
 
-    for column in categorical_columns:
-        train_categorical_features = pd.DataFrame(
-            encoders[column].transform(dataframe[column].values.reshape(-1, 1)),
-            columns=encoders[column].get_feature_names_out(),
-        )
-        train_categorical_features = train_categorical_features.add_prefix(column + "_")
-        new_dataframe = pd.concat([new_dataframe, train_categorical_features], axis=1)
+    for layout in layouts:
+        positions = layout.encode_positions(dataframe[layout.column].values)
+        rows = np.flatnonzero(positions >= 0)
+        encoded[rows, offset + positions[rows]] = 1.0
+
+        feature_names += layout.feature_names
+        offset += layout.width
 
     new_dataframe = pd.concat(
-        [new_dataframe, dataframe.drop(columns=categorical_columns)], axis=1
+        [
+            pd.DataFrame(encoded, columns=feature_names),
+            dataframe.drop(columns=categorical_columns),
+        ],
+        axis=1,
     )
     return new_dataframe
 
@@ -337,21 +354,100 @@ def _drop_features(dataframe: pd.DataFrame, features: List) -> pd.DataFrame:
     return dataframe.drop(columns=features).reset_index(drop=True)
 
 
-def load_dataset(path: pathlib.Path, from_aws: bool) -> pd.DataFrame:
-    """Loads a dataset from a specific path.
+def load_dataset(
+    path: pathlib.Path,
+    from_aws: bool,
+    columnar_cache: bool = True,
+    chunk_size: Optional[int] = None,
+    usecols: Optional[List[str]] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Loads a dataset (a CSV or a Parquet file) from a specific path.
 
     Args:
         path (pathlib.Path): the path where the dataset is located.
         from_aws (bool): whether the dataset is located in an AWS S3 bucket.
+        columnar_cache (bool): whether the dataset is read from its columnar
+            sidecar (inside the `COLUMNAR_CACHE_PATH` folder), which is built
+            only when the CSV file changes, instead of parsing the CSV file.
+            It's ignored when the dataset is read in chunks or when it is a
+            Parquet file. Defaults to True.
+        chunk_size (Optional[int]): the number of rows of each chunk, if the
+            dataset is streamed instead of being loaded at once. Defaults to None.
+        usecols (Optional[List[str]]): the columns that are loaded. Defaults
+            to None (all the columns).
+        dtype (Optional[Dict[str, Any]]): the columns' dtypes. Defaults to None
+            (inferred).
 
     Returns:
-        pd.DataFrame: the dataframe.
+        Union[pd.DataFrame, Iterator[pd.DataFrame]]: the dataframe or, if
+            `chunk_size` is given, an iterator over its chunks.
     """
     logger.info(f"Loading dataset from path {path}.")
 
-    if not from_aws:
-        return pd.read_csv(path, sep=",")
+    if from_aws:
+        path = _download_from_aws(path)
+
+    if chunk_size is not None:
+        return iter_dataset_chunks(
+            path=path, chunk_size=chunk_size, usecols=usecols, dtype=dtype
+        )
+
+    if pathlib.Path(path).suffix == ".parquet":
+        dataframe = pd.read_parquet(path, columns=usecols)
+        return dataframe.astype(dtype) if dtype is not None else dataframe
+
+    if not columnar_cache:
+        return pd.read_csv(path, sep=",", usecols=usecols, dtype=dtype)
+
+    dataframe = load_columnar_dataset(
+        path=path, cache_path=general_settings.COLUMNAR_CACHE_PATH, columns=usecols
+    )
+    return dataframe.astype(dtype) if dtype is not None else dataframe
+
+
+def load_dataset_reader(
+    path: pathlib.Path,
+    from_aws: bool,
+    usecols: Optional[List[str]] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+    index_stride: int = 1000,
+) -> WindowedReader:
+    """Opens a windowed reader of a dataset, which reads any range of rows
+    without loading the whole dataset.
+
+    Args:
+        path (pathlib.Path): the path where the dataset is located.
+        from_aws (bool): whether the dataset is located in an AWS S3 bucket.
+        usecols (Optional[List[str]]): the columns that are read. Defaults
+            to None (all the columns).
+        dtype (Optional[Dict[str, Any]]): the columns' dtypes. Defaults to None
+            (inferred).
+        index_stride (int): the number of rows between two indexed rows.
+            Defaults to 1000.
+
+    Returns:
+        WindowedReader: the reader.
+    """
+    logger.info(f"Opening a windowed reader of the dataset from path {path}.")
+
+    if from_aws:
+        path = _download_from_aws(path)
+
+    return WindowedReader(
+        path=path, usecols=usecols, dtype=dtype, index_stride=index_stride
+    )
+
+
+def _download_from_aws(path: str) -> pathlib.Path:
+    """Downloads a dataset from an AWS S3 bucket into the `DATA_PATH` folder.
+
+    Args:
+        path (str): the dataset's path inside the bucket.
 
+    Returns:
+        pathlib.Path: the downloaded dataset's path.
+    """
     # configuring AWS credentials
     os.environ["AWS_ACCESS_KEY_ID"] = aws_credentials.AWS_ACCESS_KEY
     os.environ["AWS_SECRET_ACCESS_KEY"] = aws_credentials.AWS_SECRET_KEY
@@ -363,8 +459,10 @@ def load_dataset(path: pathlib.Path, from_aws: bool) -> pd.DataFrame:
         aws_secret_access_key=aws_credentials.AWS_SECRET_KEY,
     )
 
-    upload_path = pathlib.Path.joinpath(general_settings.DATA_PATH, path.split("/")[-1])
+    upload_path = pathlib.Path.joinpath(
+        general_settings.DATA_PATH, str(path).split("/")[-1]
+    )
 
     s3.download_file(path, upload_path)
 
-    return load_dataset(path=upload_path, from_aws=False)
+    return upload_path
@@ -0,0 +1,238 @@
+"""
+Stores the streaming dataset readers, used when a dataset is too large to be
+kept in memory: a reader that yields it (a CSV or a Parquet file) in fixed-size
+chunks and a windowed reader that reads any range of rows of a CSV file through
+a row-offset index.
+"""
+import os
+import pathlib
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .utils import hash_file
+
+INDEX_BLOCK_SIZE = 1 << 22
+
+
+def iter_dataset_chunks(
+    path: pathlib.Path,
+    chunk_size: int,
+    usecols: Optional[List[str]] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Reads a dataset in fixed-size chunks. Parquet files (with the '.parquet'
+    extension) require the `pyarrow` package.
+
+    Args:
+        path (pathlib.Path): the CSV or Parquet file's path.
+        chunk_size (int): the number of rows of each chunk (the last one may
+            be smaller).
+        usecols (Optional[List[str]]): the columns that are read (the others
+            aren't parsed). Defaults to None (all the columns).
+        dtype (Optional[Dict[str, Any]]): the columns' dtypes, so all the
+            chunks have the same dtypes. Defaults to None (inferred per chunk).
+
+    Yields:
+        Iterator[pd.DataFrame]: the chunks (with a continuous index).
+    """
+    if pathlib.Path(path).suffix == ".parquet":
+        yield from _iter_parquet_chunks(path, chunk_size, usecols, dtype)
+        return
+
+    with pd.read_csv(
+        path, sep=",", chunksize=chunk_size, usecols=usecols, dtype=dtype
+    ) as reader:
+        yield from reader
+
+
+def _iter_parquet_chunks(
+    path: pathlib.Path,
+    chunk_size: int,
+    usecols: Optional[List[str]],
+    dtype: Optional[Dict[str, Any]],
+) -> Iterator[pd.DataFrame]:
+    """Reads a Parquet dataset in fixed-size chunks (see `iter_dataset_chunks`).
+
+    Args:
+        path (pathlib.Path): the Parquet file's path.
+        chunk_size (int): the number of rows of each chunk.
+        usecols (Optional[List[str]]): the columns that are read.
+        dtype (Optional[Dict[str, Any]]): the columns' dtypes.
+
+    Yields:
+        Iterator[pd.DataFrame]: the chunks (with a continuous index).
+    """
+    # pyarrow is only needed to read Parquet files
+    import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+
+    rows = 0
+
+    for batch in pyarrow.parquet.ParquetFile(path).iter_batches(
+        batch_size=chunk_size, columns=usecols
+    ):
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(rows, rows + len(chunk))
+        rows += len(chunk)
+        yield chunk.astype(dtype) if dtype is not None else chunk
+
+
+class WindowedReader:
+    """The windowed dataset reader's class.
+
+    The file is scanned once (as bytes, without parsing it) to build a sparse
+    index with the byte offset of every `index_stride`-th row, so a window of
+    rows is read by seeking to the closest indexed row and parsing only the
+    window. The index covers the rows written when it was built (call `refresh`
+    to index the rows appended afterwards). The rows must not contain quoted
+    line breaks.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        usecols: Optional[List[str]] = None,
+        dtype: Optional[Dict[str, Any]] = None,
+        index_stride: int = 1000,
+    ) -> None:
+        """Reader's instance initializer.
+
+        Args:
+            path (pathlib.Path): the CSV file's path.
+            usecols (Optional[List[str]]): the columns that are read. Defaults
+                to None (all the columns).
+            dtype (Optional[Dict[str, Any]]): the columns' dtypes, so all the
+                windows have the same dtypes. Defaults to None (inferred per window).
+            index_stride (int): the number of rows between two indexed rows
+                (the index keeps `rows / index_stride` offsets, and reading a
+                window parses up to `index_stride - 1` extra rows). Defaults to 1000.
+        """
+        self.path = pathlib.Path(path)
+        self.usecols = usecols
+        self.dtype = dtype
+        self.index_stride = index_stride
+
+        self.columns: List[str] = []
+        self.rows = 0
+        self.fingerprint = ""
+        self._offsets = np.zeros(0, np.int64)
+        self._signature: Tuple[int, int] = (-1, -1)
+        self._lock = threading.Lock()
+
+        self.refresh()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def refresh(self) -> bool:
+        """Rebuilds the row-offset index if the file has changed.
+
+        Returns:
+            bool: whether the index was rebuilt.
+        """
+        file_stat = os.stat(self.path)
+        signature = (file_stat.st_mtime_ns, file_stat.st_size)
+
+        with self._lock:
+            if signature == self._signature:
+                return False
+
+            logger.info(f"Indexing the rows of {self.path}.")
+            self.columns = pd.read_csv(self.path, sep=",", nrows=0).columns.tolist()
+            self._offsets, self.rows = self._build_index(file_stat.st_size)
+            self.fingerprint = hash_file(str(self.path))
+            self._signature = signature
+
+        return True
+
+    def read(self, start: int, stop: int) -> pd.DataFrame:
+        """Reads a window of rows.
+
+        Args:
+            start (int): the window's first row.
+            stop (int): the window's last row (exclusive).
+
+        Returns:
+            pd.DataFrame: the window (indexed by the rows' positions).
+        """
+        with self._lock:
+            start = min(max(start, 0), self.rows)
+            stop = min(max(stop, start), self.rows)
+            anchor = start // self.index_stride
+            offset = int(self._offsets[anchor]) if start < stop else 0
+            columns = self.columns
+
+        if start == stop:
+            window = pd.read_csv(
+                self.path, sep=",", nrows=0, usecols=self.usecols, dtype=self.dtype
+            )
+        else:
+            with open(self.path, "rb") as file:
+                file.seek(offset)
+                window = pd.read_csv(
+                    file,
+                    sep=",",
+                    header=None,
+                    names=columns,
+                    skiprows=start - anchor * self.index_stride,
+                    nrows=stop - start,
+                    usecols=self.usecols,
+                    dtype=self.dtype,
+                )
+
+        window.index = pd.RangeIndex(start, start + len(window))
+        return window
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the reader's metrics.
+
+        Returns:
+            Dict[str, Any]: the number of rows, the index's size and stride.
+        """
+        return {
+            "rows": self.rows,
+            "index_stride": self.index_stride,
+            "index_bytes": self._offsets.nbytes,
+        }
+
+    def _build_index(self, size: int) -> Tuple[np.ndarray, int]:
+        """Scans the file to find the byte offset of every `index_stride`-th row.
+
+        Args:
+            size (int): the file's size (the bytes written afterwards are ignored).
+
+        Returns:
+            Tuple[np.ndarray, int]: the offsets and the number of rows.
+        """
+        with open(self.path, "rb") as file:
+            header = file.readline()
+            position = len(header)
+
+            if position >= size:
+                return np.zeros(0, np.int64), 0
+
+            # the first row starts right after the header
+            offsets = [np.array([position], np.int64)]
+            rows = 1
+
+            while position < size:
+                block = file.read(min(INDEX_BLOCK_SIZE, size - position))
+
+                if not block:
+                    break
+
+                starts = (
+                    np.flatnonzero(np.frombuffer(block, np.uint8) == ord("\n"))
+                    + position
+                    + 1
+                )
+                starts = starts[starts < size]
+                numbers = np.arange(rows, rows + len(starts))
+                offsets.append(starts[numbers % self.index_stride == 0])
+                rows += len(starts)
+                position += len(block)
+
+        return np.concatenate(offsets), rows
@@ -2,9 +2,11 @@
 Stores auxiliary functions (such as for loading features or downloading the dataset)
 that will be used with the main data processing functions.
 """
+import hashlib
 import pathlib
 import os
-from typing import Union
+import threading
+from typing import Any, Dict, NamedTuple, Tuple, Union
 
 import boto3
 import joblib
@@ -33,6 +35,166 @@ def load_feature(
     return joblib.load(pathlib.PosixPath.joinpath(path, f"{feature_name}.pkl"))
 
 
+class _Artifact(NamedTuple):
+    """An artifact kept in memory by the artifact registry."""
+
+    signature: Tuple[int, int]
+    content_hash: str
+    content: Any
+
+
+class ArtifactRegistry:
+    """Process-wide registry that keeps the loaded features/encoders/scalers in
+    memory, so they are unpickled only once instead of on every call.
+
+    An artifact is reloaded only when its file changes: the file's modification
+    time and size are checked on every access and, when they differ, the content
+    hash is compared to decide whether the artifact must be loaded again.
+    """
+
+    def __init__(self) -> None:
+        """Registry's instance initializer."""
+        self._artifacts: Dict[str, _Artifact] = {}
+        self._file_paths: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def load(
+        self,
+        path: pathlib.Path,
+        feature_name: str,
+    ) -> Union[np.ndarray, StandardScaler, OneHotEncoder]:
+        """Loads a given feature from memory, reading it from disk only when
+        it was not loaded yet or when its file has changed.
+
+        Args:
+            path (pathlib.Path): the path of the desired feature.
+            feature_name (str): the feature file's name.
+
+        Returns:
+            Union[np.ndarray, StandardScaler, OneHotEncoder]: the feature's content.
+        """
+        return self._get(path=path, feature_name=feature_name).content
+
+    def fingerprint(self, path: pathlib.Path, feature_name: str) -> str:
+        """Returns the content hash of a given feature.
+
+        Args:
+            path (pathlib.Path): the path of the desired feature.
+            feature_name (str): the feature file's name.
+
+        Returns:
+            str: the SHA-256 hash of the feature file's content.
+        """
+        return self._get(path=path, feature_name=feature_name).content_hash
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the registry's hit, miss and reload counts.
+
+        Returns:
+            Dict[str, int]: the registry's counters.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "artifacts": len(self._artifacts),
+        }
+
+    def clear(self) -> None:
+        """Removes all the artifacts from memory and resets the counters."""
+        with self._lock:
+            self._artifacts.clear()
+            self.hits = 0
+            self.misses = 0
+            self.reloads = 0
+
+    def _get(self, path: pathlib.Path, feature_name: str) -> _Artifact:
+        """Returns the in-memory artifact, (re)loading it if needed.
+
+        Args:
+            path (pathlib.Path): the path of the desired feature.
+            feature_name (str): the feature file's name.
+
+        Returns:
+            _Artifact: the in-memory artifact.
+        """
+        file_path = self._file_paths.get((str(path), feature_name))
+
+        if file_path is None:
+            file_path = str(pathlib.Path(path).joinpath(f"{feature_name}.pkl"))
+            self._file_paths[(str(path), feature_name)] = file_path
+
+        file_stat = os.stat(file_path)
+        signature = (file_stat.st_mtime_ns, file_stat.st_size)
+
+        with self._lock:
+            artifact = self._artifacts.get(file_path)
+
+            if artifact is not None and artifact.signature == signature:
+                self.hits += 1
+                return artifact
+
+            content_hash = hash_file(file_path)
+
+            # the file was touched, but its content is still the same
+            if artifact is not None and artifact.content_hash == content_hash:
+                artifact = artifact._replace(signature=signature)
+                self._artifacts[file_path] = artifact
+                self.hits += 1
+                return artifact
+
+            if artifact is None:
+                self.misses += 1
+            else:
+                logger.info(f"Artifact {file_path} has changed, reloading it.")
+                self.reloads += 1
+
+            artifact = _Artifact(
+                signature=signature,
+                content_hash=content_hash,
+                content=load_feature(path=path, feature_name=feature_name),
+            )
+            self._artifacts[file_path] = artifact
+            return artifact
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """Calculates the SHA-256 hash of a file's content.
+
+    Args:
+        file_path (str): the file's path.
+        block_size (int): the number of bytes read at once. Defaults to 1 MiB.
+
+    Returns:
+        str: the file's content hash.
+    """
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def remove_file(file_path: pathlib.Path) -> None:
+    """Removes a file, ignoring it if it was already removed.
+
+    Args:
+        file_path (pathlib.Path): the file's path.
+    """
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+artifact_registry = ArtifactRegistry()
+
+
 @logger.catch
 def download_dataset(
     name: str,
@@ -0,0 +1,342 @@
+"""
+Offline batch scoring: reads a dataset (a CSV or a Parquet file) in chunks,
+processes and scores them in a pool of processes (each one loads the model only
+once) and writes the predictions in the input's order. Each scored chunk is
+saved as a part file, so an interrupted run resumes from the missing chunks.
+
+Usage (from the `src` folder, so the configured paths are valid):
+
+    PYTHONPATH=.. python -m src.model.batch_score INPUT OUTPUT [--chunk-size N]
+        [--workers N] [--num-threads N] [--parts-path PATH]
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import pathlib
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from ..config.model import model_settings
+from ..config.settings import general_settings
+from ..data.processing import data_processing_inference, load_dataset
+from .inference import ModelServe
+
+PREDICTION_COLUMN = "prediction"
+MANIFEST_FILE_NAME = "manifest.json"
+
+# the model loaded by each worker process (see `_init_worker`)
+_worker_model: Optional[ModelServe] = None
+
+
+def batch_score(
+    input_path: pathlib.Path,
+    output_path: pathlib.Path,
+    chunk_size: int = 50000,
+    workers: int = 1,
+    num_threads: int = 1,
+    parts_path: Optional[pathlib.Path] = None,
+) -> int:
+    """Scores a dataset, writing its rows and their predictions to a CSV file.
+
+    Args:
+        input_path (pathlib.Path): the dataset's path (a CSV or a Parquet file).
+        output_path (pathlib.Path): the output CSV file's path.
+        chunk_size (int): the number of rows scored by each task. Defaults to 50000.
+        workers (int): the number of worker processes. Defaults to 1.
+        num_threads (int): the number of threads used by the model in each
+            worker. Defaults to 1.
+        parts_path (Optional[pathlib.Path]): the folder where the scored chunks
+            are kept until the output is written. Defaults to None (the output's
+            path with the '.parts' suffix).
+
+    Returns:
+        int: the number of scored rows.
+    """
+    input_path = pathlib.Path(input_path)
+    output_path = pathlib.Path(output_path)
+    parts_path = (
+        pathlib.Path(parts_path)
+        if parts_path is not None
+        else output_path.with_name(f"{output_path.name}.parts")
+    )
+    chunks = _load_chunks(input_path, chunk_size)
+    completed = _prepare_parts(parts_path, _describe_run(input_path, chunk_size))
+
+    if completed:
+        logger.info(f"Resuming the batch scoring ({len(completed)} chunks done).")
+
+    progress = {"chunks": 0, "rows": 0, "start": time.perf_counter()}
+    pending: Set[Future] = set()
+    # the input's chunks and rows (each chunk's part has the same rows, but
+    # counting them in the part files would miss the quoted line breaks)
+    totals = {"chunks": 0, "rows": 0}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(num_threads,),
+    ) as executor:
+        for index, chunk in enumerate(chunks):
+            totals["chunks"] += 1
+            totals["rows"] += len(chunk)
+
+            if index in completed:
+                continue
+
+            # bounding the submitted chunks, so the input is never fully in memory
+            while len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _report_progress(done, progress)
+
+            pending.add(executor.submit(_score_chunk, index, chunk, parts_path))
+
+        done, _ = wait(pending)
+        _report_progress(done, progress)
+
+    _merge_parts(parts_path, output_path, totals["chunks"])
+    shutil.rmtree(parts_path)
+    logger.info(f"Saved the predictions of {totals['rows']} rows to {output_path}.")
+    return totals["rows"]
+
+
+def _load_chunks(input_path: pathlib.Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Loads a dataset in chunks, making sure it has rows to score (an empty
+    dataset would be merged into an output without even a header).
+
+    Args:
+        input_path (pathlib.Path): the dataset's path.
+        chunk_size (int): the number of rows of each chunk.
+
+    Raises:
+        ValueError: raises ValueError if the dataset has no rows.
+
+    Returns:
+        Iterator[pd.DataFrame]: the dataset's chunks.
+    """
+    chunks = load_dataset(path=input_path, from_aws=False, chunk_size=chunk_size)
+    first_chunk = next(chunks, None)
+
+    if first_chunk is None or first_chunk.empty:
+        raise ValueError(f"The dataset {input_path} has no rows to score.")
+
+    return itertools.chain([first_chunk], chunks)
+
+
+def _describe_run(input_path: pathlib.Path, chunk_size: int) -> Dict[str, Any]:
+    """Describes a batch scoring run, so a run is only resumed with the same
+    input, chunk size and model.
+
+    Args:
+        input_path (pathlib.Path): the dataset's path.
+        chunk_size (int): the number of rows of each chunk.
+
+    Returns:
+        Dict[str, Any]: the run's description.
+    """
+    file_stat = os.stat(input_path)
+
+    return {
+        "input": str(input_path.resolve()),
+        "size": file_stat.st_size,
+        "mtime_ns": file_stat.st_mtime_ns,
+        "chunk_size": chunk_size,
+        "model": [
+            model_settings.MODEL_NAME,
+            model_settings.VERSION,
+            model_settings.RUN_ID,
+        ],
+    }
+
+
+def _prepare_parts(parts_path: pathlib.Path, run: Dict[str, Any]) -> Set[int]:
+    """Prepares the parts folder, removing the parts of a different run.
+
+    Args:
+        parts_path (pathlib.Path): the parts folder.
+        run (Dict[str, Any]): the run's description.
+
+    Returns:
+        Set[int]: the indexes of the chunks that were already scored.
+    """
+    manifest_path = pathlib.Path.joinpath(parts_path, MANIFEST_FILE_NAME)
+
+    if parts_path.exists():
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as file:
+                previous_run = json.load(file)
+        except (OSError, ValueError):
+            previous_run = None
+
+        if previous_run == run:
+            return {
+                int(path.stem.split("_")[1]) for path in parts_path.glob("part_*.csv")
+            }
+
+        logger.warning(f"Removing the parts of a different run from {parts_path}.")
+        shutil.rmtree(parts_path)
+
+    os.makedirs(parts_path)
+
+    with open(manifest_path, "w", encoding="utf-8") as file:
+        json.dump(run, file, indent=2)
+
+    return set()
+
+
+def _init_worker(num_threads: int) -> None:
+    """Loads the model once in each worker process.
+
+    Args:
+        num_threads (int): the number of threads used by the model.
+
+    Raises:
+        RuntimeError: raises RuntimeError if the model couldn't be loaded.
+    """
+    global _worker_model  # pylint: disable=global-statement
+
+    model = ModelServe(
+        model_name=model_settings.MODEL_NAME,
+        model_flavor=model_settings.MODEL_FLAVOR,
+        model_version=model_settings.VERSION,
+        num_threads=num_threads,
+    )
+    model.load()
+
+    if model.model is None:
+        raise RuntimeError(f"Couldn't load the model {model_settings.MODEL_NAME}.")
+
+    _worker_model = model
+
+
+def _score_chunk(
+    index: int, chunk: pd.DataFrame, parts_path: pathlib.Path
+) -> Tuple[int, int]:
+    """Processes and scores a chunk (in a worker process), saving it (with
+    its predictions) as a part file.
+
+    Args:
+        index (int): the chunk's index.
+        chunk (pd.DataFrame): the chunk.
+        parts_path (pathlib.Path): the parts folder.
+
+    Returns:
+        Tuple[int, int]: the chunk's index and its number of rows.
+    """
+    features = data_processing_inference(
+        dataframe=chunk.drop(columns=[general_settings.TARGET_COLUMN], errors="ignore")
+    )
+    chunk[PREDICTION_COLUMN] = _worker_model.predict(features)
+
+    # the part is written to a temporary file, so it's never read while incomplete
+    temporary_path = pathlib.Path.joinpath(parts_path, f".part_{index:06d}.tmp")
+    chunk.to_csv(temporary_path, index=False)
+    os.replace(
+        temporary_path, pathlib.Path.joinpath(parts_path, f"part_{index:06d}.csv")
+    )
+
+    return index, len(chunk)
+
+
+def _report_progress(done: Set[Future], progress: Dict[str, Any]) -> None:
+    """Logs the scored chunks (raising the error of any failed chunk).
+
+    Args:
+        done (Set[Future]): the finished tasks.
+        progress (Dict[str, Any]): the run's counters (updated in place).
+    """
+    for future in done:
+        index, rows = future.result()
+        progress["chunks"] += 1
+        progress["rows"] += rows
+        elapsed = time.perf_counter() - progress["start"]
+
+        logger.info(
+            f"Scored chunk {index} ({progress['chunks']} chunks, {progress['rows']} "
+            f"rows, {progress['rows'] / max(elapsed, 1e-9):.0f} rows/s)."
+        )
+
+
+def _merge_parts(
+    parts_path: pathlib.Path, output_path: pathlib.Path, n_chunks: int
+) -> None:
+    """Concatenates the part files (in the input's order) into the output file.
+
+    Args:
+        parts_path (pathlib.Path): the parts folder.
+        output_path (pathlib.Path): the output CSV file's path.
+        n_chunks (int): the number of chunks.
+    """
+    temporary_path = output_path.with_name(f".{output_path.name}.tmp")
+
+    with open(temporary_path, "wb") as output:
+        for index in range(n_chunks):
+            with open(
+                pathlib.Path.joinpath(parts_path, f"part_{index:06d}.csv"), "rb"
+            ) as part:
+                header = part.readline()
+
+                if index == 0:
+                    output.write(header)
+
+                shutil.copyfileobj(part, output, 1 << 20)
+
+    os.replace(temporary_path, output_path)
+
+
+def _parse_arguments(arguments: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parses the command line arguments.
+
+    Args:
+        arguments (Optional[List[str]]): the arguments. Defaults to None (the
+            command line's arguments).
+
+    Returns:
+        argparse.Namespace: the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Scores a dataset (a CSV or a Parquet file) with the configured model."
+    )
+    parser.add_argument("input", type=pathlib.Path, help="the dataset's path")
+    parser.add_argument("output", type=pathlib.Path, help="the output CSV file's path")
+    parser.add_argument(
+        "--chunk-size", type=int, default=50000, help="the number of rows per chunk"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="the number of worker processes",
+    )
+    parser.add_argument(
+        "--num-threads",
+        type=int,
+        default=1,
+        help="the number of threads used by the model in each worker",
+    )
+    parser.add_argument(
+        "--parts-path",
+        type=pathlib.Path,
+        default=None,
+        help="the folder where the scored chunks are kept (to resume the run)",
+    )
+    return parser.parse_args(arguments)
+
+
+if __name__ == "__main__":
+    args = _parse_arguments()
+    batch_score(
+        input_path=args.input,
+        output_path=args.output,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        num_threads=args.num_threads,
+        parts_path=args.parts_path,
+    )
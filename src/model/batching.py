@@ -0,0 +1,206 @@
+"""
+Stores a micro-batching scheduler that groups concurrent prediction requests,
+so they share a single (vectorized) preprocessing and model call.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from ..data.processing import data_processing_inference
+from ..monitoring.latency import latency_recorder
+from .executor import InferenceExecutor
+from .inference import ModelServe
+
+WAIT_TIME_BUCKETS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1]
+
+
+class MicroBatcher:
+    """The micro-batching scheduler's class."""
+
+    def __init__(
+        self,
+        model: ModelServe,
+        executor: InferenceExecutor,
+        max_batch_size: int,
+        max_wait_time: float,
+    ) -> None:
+        """Micro-batcher's instance initializer.
+
+        Args:
+            model (ModelServe): the model used to make the predictions.
+            executor (InferenceExecutor): the executor where the batches are
+                processed (outside of the event loop).
+            max_batch_size (int): the maximum number of requests per batch.
+            max_wait_time (float): the maximum time (in seconds) that a request
+                waits for other requests before the batch is flushed.
+        """
+        self.model = model
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_time = max_wait_time
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # the event loop only keeps weak references to the tasks
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+        # metrics: batch size distribution and queue wait time histograms
+        self.batch_sizes: Dict[int, int] = {}
+        self.wait_time_counts = [0] * (len(WAIT_TIME_BUCKETS) + 1)
+        self.wait_time_sum = 0.0
+        self.wait_time_max = 0.0
+        self.requests = 0
+        self.batches = 0
+
+    async def predict(self, record: Dict[str, Any]) -> Any:
+        """Queues a single record and waits for its prediction. The durations
+        of the batch's stages are added to the request's durations (all the
+        requests of a batch share them).
+
+        Args:
+            record (Dict[str, Any]): the record (e.g., a validated `Person`).
+
+        Returns:
+            Any: the record's predicted class index.
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((record, time.perf_counter(), future))
+        prediction, timings = await future
+        latency_recorder.add_request_timings(timings)
+        return prediction
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the batch size distribution and the queue wait time metrics.
+
+        Returns:
+            Dict[str, Any]: the micro-batcher's metrics.
+        """
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "wait_time_seconds": {
+                "sum": self.wait_time_sum,
+                "max": self.wait_time_max,
+                "buckets": dict(
+                    zip(
+                        [str(bucket) for bucket in WAIT_TIME_BUCKETS] + ["+Inf"],
+                        np.cumsum(self.wait_time_counts).tolist(),
+                    )
+                ),
+            },
+        }
+
+    def _ensure_started(self) -> None:
+        """Starts the scheduler's background task in the running event loop."""
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Collects the queued requests and flushes them when the batch is full
+        or when the first request has waited for the maximum wait time."""
+        # the task copied the context of the request that started it, whose
+        # stage durations must not include the following batches
+        latency_recorder.end_request()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = batch[0][1] + self.max_wait_time
+
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+
+                timeout = deadline - time.perf_counter()
+
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # the batch is processed in the background, so the next batch
+            # can be collected in the meantime
+            flush_task = self._loop.create_task(self._flush(batch))
+            self._flush_tasks.add(flush_task)
+            flush_task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(
+        self, batch: List[Tuple[Dict[str, Any], float, asyncio.Future]]
+    ) -> None:
+        """Makes the predictions of a batch and resolves each request's future.
+
+        Args:
+            batch (List[Tuple[Dict[str, Any], float, asyncio.Future]]): the queued
+                requests (the record, the time it was queued and its future).
+        """
+        now = time.perf_counter()
+        self._record_metrics(wait_times=[now - queued_at for _, queued_at, _ in batch])
+        # the batch's stage durations (the executor's thread copies this context)
+        latency_recorder.start_request()
+
+        try:
+            predictions = await self.executor.run(
+                self._predict, [record for record, _, _ in batch]
+            )
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning(f"Couldn't make the predictions of a batch: {error}.")
+
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        timings = latency_recorder.request_timings()
+
+        for (_, _, future), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result((prediction, timings))
+
+    def _predict(self, records: List[Dict[str, Any]]) -> List[Any]:
+        """Preprocesses the records (as a single dataframe) and makes their
+        predictions at once.
+
+        Args:
+            records (List[Dict[str, Any]]): the records.
+
+        Returns:
+            List[Any]: the predicted class indexes (in the same order as the records).
+        """
+        features = data_processing_inference(pd.DataFrame.from_records(records))
+        return self.model.predict(features, transform_to_str=False).tolist()
+
+    def _record_metrics(self, wait_times: List[float]) -> None:
+        """Updates the batch size and queue wait time metrics.
+
+        Args:
+            wait_times (List[float]): the time each request waited in the queue.
+        """
+        self.requests += len(wait_times)
+        self.batches += 1
+        self.batch_sizes[len(wait_times)] = self.batch_sizes.get(len(wait_times), 0) + 1
+
+        for bucket, count in zip(
+            *np.unique(
+                np.searchsorted(WAIT_TIME_BUCKETS, wait_times, side="left"),
+                return_counts=True,
+            )
+        ):
+            self.wait_time_counts[bucket] += int(count)
+
+        self.wait_time_sum += float(sum(wait_times))
+        self.wait_time_max = max(self.wait_time_max, *wait_times)
@@ -0,0 +1,135 @@
+"""
+Stores a bounded (LRU) prediction cache, used to skip the data processing and
+the model predictions for repeated records.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class PredictionCache:
+    """The prediction cache's class.
+
+    The records are keyed by a canonical hash of their fields, and the cache
+    is cleared whenever the generation (e.g., the model's version and the
+    artifacts' hashes) changes.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """Cache's instance initializer.
+
+        Args:
+            max_size (int): the maximum number of cached predictions.
+            ttl (float): the time (in seconds) a prediction is kept in the cache.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._generation: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, record: Dict[str, Any], generation: str) -> Optional[Any]:
+        """Gets the cached prediction of a given record.
+
+        Args:
+            record (Dict[str, Any]): the record (e.g., a validated `Person`).
+            generation (str): the current generation.
+
+        Returns:
+            Optional[Any]: the cached prediction or None if it isn't cached.
+        """
+        key = _hash_record(record)
+
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, record: Dict[str, Any], generation: str, prediction: Any) -> None:
+        """Caches the prediction of a given record, evicting the least recently
+        used prediction if the cache is full.
+
+        Args:
+            record (Dict[str, Any]): the record (e.g., a validated `Person`).
+            generation (str): the generation used to make the prediction.
+            prediction (Any): the record's prediction.
+        """
+        key = _hash_record(record)
+
+        with self._lock:
+            self._check_generation(generation)
+            self._entries[key] = (prediction, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the cache's metrics.
+
+        Returns:
+            Dict[str, Any]: the cache's size, hit ratio and counters.
+        """
+        requests = self.hits + self.misses
+
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _check_generation(self, generation: str) -> None:
+        """Clears the cache if the generation has changed (must be called
+        while holding the lock).
+
+        Args:
+            generation (str): the current generation.
+        """
+        if generation != self._generation:
+            if self._generation is not None:
+                self.invalidations += 1
+
+            self._entries.clear()
+            self._generation = generation
+
+
+def _hash_record(record: Dict[str, Any]) -> str:
+    """Calculates the canonical hash of a record.
+
+    Args:
+        record (Dict[str, Any]): the record.
+
+    Returns:
+        str: the record's hash.
+    """
+    return hashlib.sha256(
+        json.dumps(record, sort_keys=True, separators=(",", ":"), default=str).encode()
+    ).hexdigest()
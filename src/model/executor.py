@@ -0,0 +1,98 @@
+"""
+Stores an execution layer that runs the CPU-bound inference code (data
+processing and model predictions) outside of the API's event loop.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when the inference executor can't accept more tasks."""
+
+
+class InferenceExecutor:
+    """The inference executor's class, which runs the tasks in a bounded
+    thread pool with a bounded queue of pending tasks."""
+
+    def __init__(self, max_workers: int, max_queue_size: int) -> None:
+        """Executor's instance initializer.
+
+        Args:
+            max_workers (int): the number of worker threads.
+            max_queue_size (int): the maximum number of tasks waiting for a
+                worker thread. When the queue is full, new tasks are rejected.
+        """
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="inference"
+        )
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, function: Callable, *args: Any) -> Any:
+        """Runs a function in the thread pool, without blocking the event loop.
+
+        Args:
+            function (Callable): the function.
+            *args (Any): the function's arguments.
+
+        Raises:
+            ExecutorSaturatedError: raises ExecutorSaturatedError if all workers
+                are busy and the queue is full.
+
+        Returns:
+            Any: the function's output.
+        """
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue_size:
+                self.rejected += 1
+                raise ExecutorSaturatedError(
+                    "The inference executor is saturated, try again later."
+                )
+
+            self.pending += 1
+
+        context = contextvars.copy_context()
+
+        try:
+            future = self._executor.submit(context.run, function, *args)
+        except RuntimeError:  # the executor was shut down
+            self._task_done(None)
+            raise
+
+        # the task is only done when its thread finishes (even if the awaiting
+        # request is cancelled), so the bound counts the real work
+        future.add_done_callback(self._task_done)
+        return await asyncio.wrap_future(future)
+
+    def _task_done(self, _: Optional[Future]) -> None:
+        """Updates the counters when a task finishes (called by its thread).
+
+        Args:
+            _ (Optional[Future]): the task's future.
+        """
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the executor's metrics.
+
+        Returns:
+            Dict[str, int]: the number of workers, and of pending, completed
+                and rejected tasks.
+        """
+        return {
+            "workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -2,6 +2,8 @@
 Stores a model serve class that will be used to make predictions with
 the trained model.
 """
+from typing import Optional
+
 import mlflow
 import numpy as np
 from loguru import logger
@@ -10,10 +12,7 @@ from ..config.aws import aws_credentials
 from ..config.model import model_settings
 from ..config.settings import general_settings
 from ..data.utils import load_feature
-
-label_encoder = load_feature(
-    path=general_settings.ARTIFACTS_PATH, feature_name="label_ohe"
-)
+from ..monitoring.latency import latency_recorder
 
 if aws_credentials.EC2 != "YOUR_EC2_INSTANCE_URL":
     mlflow.set_tracking_uri(f"http://{aws_credentials.EC2}:5000")
@@ -29,6 +28,7 @@ class ModelServe:
         model_name: str,
         model_flavor: str,
         model_version: str,
+        num_threads: Optional[int] = None,
     ) -> None:
         """Model's instance initializer.
 
@@ -36,11 +36,15 @@ class ModelServe:
             model_name (str): the model's name.
             model_flavor (str): the model's MLflow flavor.
             model_version (str): the model's version.
+            num_threads (Optional[int]): the number of threads used by the model
+                to make predictions. Defaults to None (the model's default).
         """
         self.model_name = model_name
         self.model_flavor = model_flavor
         self.model_version = model_version
+        self.num_threads = num_threads
         self.model = None
+        self.labels = None
 
     @logger.catch
     def load(self) -> None:
@@ -54,6 +58,12 @@ class ModelServe:
             f"Loading the model {model_settings.MODEL_NAME} from run ID {model_settings.RUN_ID}."
         )
 
+        # precomputing the class index -> label array used to decode the predictions
+        label_encoder = load_feature(
+            path=general_settings.ARTIFACTS_PATH, feature_name="label_ohe"
+        )
+        self.labels = np.asarray(label_encoder.classes_)
+
         if self.model_flavor == "lightgbm":
             model_uri = f"runs:/{model_settings.RUN_ID}/{model_settings.MODEL_NAME}"
             self.model = mlflow.lightgbm.load_model(model_uri)
@@ -76,12 +86,26 @@ class ModelServe:
         Returns:
             np.ndarray: the predictions array.
         """
-        prediction = self.model.predict(features)
+        with latency_recorder.time("model.predict"):
+            if self.num_threads:
+                prediction = self.model.predict(features, num_threads=self.num_threads)
+            else:
+                prediction = self.model.predict(features)
 
         if transform_to_str:
-            one_hot = np.zeros((prediction.size, prediction.max() + 1))
-            one_hot[np.arange(prediction.size), prediction] = 1
-            prediction = label_encoder.inverse_transform(one_hot)
+            prediction = self.decode(prediction)
 
         logger.info(f"Prediction: {prediction}.")
         return prediction
+
+    def decode(self, prediction: np.ndarray) -> np.ndarray:
+        """Transforms the predicted class indexes into their labels.
+
+        Args:
+            prediction (np.ndarray): the predicted class indexes.
+
+        Returns:
+            np.ndarray: the predicted labels.
+        """
+        with latency_recorder.time("model.decode"):
+            return self.labels[prediction]
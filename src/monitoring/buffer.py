@@ -0,0 +1,329 @@
+"""
+Stores the live traffic buffer, a fixed-capacity ring buffer (backed by NumPy
+arrays) that records the requests served by the prediction endpoints, so they
+can be used as the current data by the monitoring endpoints.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+class BufferedRequests(NamedTuple):
+    """The requests read from the live traffic buffer (in chronological order)."""
+
+    records: pd.DataFrame
+    predictions: np.ndarray
+    timestamps: np.ndarray
+
+
+class TrafficBuffer:
+    """The live traffic buffer's class.
+
+    Each request is stored in a preallocated row (the numerical fields as
+    64-bit floats, the categorical fields as codes of a per-column vocabulary,
+    the predicted class index and the timestamp), so appending is O(1) and
+    doesn't allocate memory. The numerical fields keep their full precision, so
+    the features derived from them when a window is read are the served ones.
+    Every request gets a sequence number, which is used to select the windows.
+    When the buffer is full, the oldest requests are overwritten and, if a
+    spill folder is given, written to disk beforehand.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        numerical_columns: List[str],
+        categorical_columns: List[str],
+        spill_path: Optional[Path] = None,
+        spill_block_size: int = 1000,
+    ) -> None:
+        """Buffer's instance initializer.
+
+        Args:
+            capacity (int): the maximum number of requests kept in memory.
+            numerical_columns (List[str]): the numerical fields of a request.
+            categorical_columns (List[str]): the categorical fields of a request.
+            spill_path (Optional[Path]): the folder where the overwritten requests
+                are saved (in blocks). Defaults to None (nothing is saved).
+            spill_block_size (int): the number of requests saved per file. It
+                must divide the capacity. Defaults to 1000.
+
+        Raises:
+            ValueError: raises ValueError if the spill block size doesn't divide
+                the capacity.
+        """
+        if spill_path is not None and capacity % spill_block_size != 0:
+            raise ValueError(
+                "The spill block size must divide the traffic buffer's capacity."
+            )
+
+        self.capacity = capacity
+        self.numerical_columns = list(numerical_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.spill_path = Path(spill_path) if spill_path is not None else None
+        self.spill_block_size = spill_block_size
+
+        self._numerical = np.zeros((capacity, len(numerical_columns)), np.float64)
+        self._categorical = np.zeros((capacity, len(categorical_columns)), np.int16)
+        self._predictions = np.zeros(capacity, np.int16)
+        self._timestamps = np.zeros(capacity, np.float64)
+        self._vocabularies: List[Dict[Any, int]] = [{} for _ in categorical_columns]
+        self._lock = threading.Lock()
+        self._spill_executor: Optional[ThreadPoolExecutor] = None
+
+        # the sequence numbers only identify a request inside this buffer, so
+        # they're combined with its identifier when they're used as keys
+        self.instance_id = uuid.uuid4().hex
+        # the sequence number of the next request (the number of appended requests)
+        self.appended = 0
+        self.spilled = 0
+
+        if self.spill_path is not None:
+            os.makedirs(self.spill_path, exist_ok=True)
+            self._spill_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="traffic-spill"
+            )
+
+    def append(self, record: Dict[str, Any], prediction: int) -> None:
+        """Records a served request.
+
+        Args:
+            record (Dict[str, Any]): the request's record (e.g., a validated `Person`).
+            prediction (int): the predicted class index.
+        """
+        numerical = [record[column] for column in self.numerical_columns]
+        categorical = [
+            self._encode(index, record[column])
+            for index, column in enumerate(self.categorical_columns)
+        ]
+
+        with self._lock:
+            position = self.appended % self.capacity
+
+            if self.appended >= self.capacity:
+                self._spill(position)
+
+            self._numerical[position] = numerical
+            self._categorical[position] = categorical
+            self._predictions[position] = prediction
+            self._timestamps[position] = time.time()
+            self.appended += 1
+
+    def select(
+        self,
+        last: Optional[int] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+    ) -> Tuple[int, int]:
+        """Selects the sequence numbers of a window of requests.
+
+        Args:
+            last (Optional[int]): the number of most recent requests. Defaults
+                to None (all the requests kept in memory).
+            start_time (Optional[float]): the window's first timestamp (Unix
+                time, in seconds). Defaults to None.
+            end_time (Optional[float]): the window's last timestamp (exclusive).
+                Defaults to None.
+
+        Returns:
+            Tuple[int, int]: the window's first and last (exclusive) sequence numbers.
+        """
+        with self._lock:
+            stop = self.appended
+            first = max(stop - self.capacity, 0)
+            timestamps = self._chronological(self._timestamps, first, stop)
+
+        if start_time is not None:
+            first += int(np.searchsorted(timestamps, start_time, side="left"))
+
+        if end_time is not None:
+            stop -= len(timestamps) - int(
+                np.searchsorted(timestamps, end_time, side="left")
+            )
+
+        if last is not None:
+            first = max(first, stop - last)
+
+        return first, max(first, stop)
+
+    def read(self, first: int, stop: int) -> BufferedRequests:
+        """Reads the requests with the given sequence numbers (the requests that
+        were already overwritten are skipped).
+
+        Args:
+            first (int): the window's first sequence number.
+            stop (int): the window's last (exclusive) sequence number.
+
+        Returns:
+            BufferedRequests: the requests (in chronological order).
+        """
+        with self._lock:
+            first = max(first, self.appended - self.capacity, 0)
+            stop = max(min(stop, self.appended), first)
+            numerical = self._chronological(self._numerical, first, stop)
+            categorical = self._chronological(self._categorical, first, stop)
+            predictions = self._chronological(self._predictions, first, stop)
+            timestamps = self._chronological(self._timestamps, first, stop)
+            vocabularies = [list(vocabulary) for vocabulary in self._vocabularies]
+
+        return BufferedRequests(
+            records=self._to_dataframe(numerical, categorical, vocabularies),
+            predictions=predictions.astype(np.int64),
+            timestamps=timestamps,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the buffer's metrics.
+
+        Returns:
+            Dict[str, Any]: the buffer's capacity, size and counters.
+        """
+        return {
+            "capacity": self.capacity,
+            "size": min(self.appended, self.capacity),
+            "appended": self.appended,
+            "spilled": self.spilled,
+        }
+
+    def close(self) -> None:
+        """Waits for the pending blocks to be saved (the buffer can't spill
+        more requests afterwards).
+        """
+        if self._spill_executor is not None:
+            self._spill_executor.shutdown(wait=True)
+            self._spill_executor = None
+
+    def _encode(self, index: int, value: Any) -> int:
+        """Gets the code of a categorical value, adding it to the column's
+        vocabulary if it is new (values beyond the codes' range are encoded
+        as -1, which means unknown).
+
+        Args:
+            index (int): the categorical column's index.
+            value (Any): the value.
+
+        Returns:
+            int: the value's code.
+        """
+        vocabulary = self._vocabularies[index]
+        code = vocabulary.get(value)
+
+        if code is None:
+            with self._lock:
+                code = vocabulary.get(value)
+
+                if code is None:
+                    code = (
+                        len(vocabulary)
+                        if len(vocabulary) < np.iinfo(np.int16).max
+                        else -1
+                    )
+
+                    if code >= 0:
+                        vocabulary[value] = code
+
+        return code
+
+    def _chronological(self, array: np.ndarray, first: int, stop: int) -> np.ndarray:
+        """Copies the rows with the given sequence numbers in chronological
+        order (must be called while holding the lock).
+
+        Args:
+            array (np.ndarray): the buffer's array.
+            first (int): the first sequence number.
+            stop (int): the last (exclusive) sequence number.
+
+        Returns:
+            np.ndarray: the rows.
+        """
+        start_position = first % self.capacity
+        stop_position = start_position + (stop - first)
+
+        if stop_position <= self.capacity:
+            return array[start_position:stop_position].copy()
+
+        return np.concatenate(
+            [array[start_position:], array[: stop_position - self.capacity]]
+        )
+
+    def _to_dataframe(
+        self,
+        numerical: np.ndarray,
+        categorical: np.ndarray,
+        vocabularies: List[List[Any]],
+    ) -> pd.DataFrame:
+        """Decodes the stored requests into a dataframe of records.
+
+        Args:
+            numerical (np.ndarray): the numerical fields.
+            categorical (np.ndarray): the categorical codes.
+            vocabularies (List[List[Any]]): the values of each categorical column.
+
+        Returns:
+            pd.DataFrame: the records.
+        """
+        records = pd.DataFrame(numerical, columns=self.numerical_columns)
+
+        for index, column in enumerate(self.categorical_columns):
+            records[column] = np.array(vocabularies[index] + [None], dtype=object)[
+                categorical[:, index]
+            ]
+
+        return records
+
+    def _spill(self, position: int) -> None:
+        """Saves the block of requests that starts at a given position, before
+        it is overwritten (must be called while holding the lock).
+
+        Args:
+            position (int): the position of the next overwritten request.
+        """
+        if self._spill_executor is None or position % self.spill_block_size != 0:
+            return
+
+        block = slice(position, position + self.spill_block_size)
+        first = self.appended - self.capacity
+        arrays = {
+            "sequence_numbers": np.arange(first, first + self.spill_block_size),
+            "numerical": self._numerical[block].copy(),
+            "categorical": self._categorical[block].copy(),
+            "predictions": self._predictions[block].copy(),
+            "timestamps": self._timestamps[block].copy(),
+        }
+        vocabularies = [list(vocabulary) for vocabulary in self._vocabularies]
+        self._spill_executor.submit(self._save_block, first, arrays, vocabularies)
+        self.spilled += self.spill_block_size
+
+    def _save_block(
+        self, first: int, arrays: Dict[str, np.ndarray], vocabularies: List[List[Any]]
+    ) -> None:
+        """Saves a block of requests to the spill folder.
+
+        Args:
+            first (int): the block's first sequence number.
+            arrays (Dict[str, np.ndarray]): the block's arrays.
+            vocabularies (List[List[Any]]): the values of each categorical column.
+        """
+        try:
+            records = self._to_dataframe(
+                arrays["numerical"], arrays["categorical"], vocabularies
+            )
+            records["prediction"] = arrays["predictions"]
+            records["timestamp"] = arrays["timestamps"]
+            records["sequence_number"] = arrays["sequence_numbers"]
+
+            temporary_path = Path.joinpath(self.spill_path, f".traffic_{first}.tmp")
+            records.to_csv(temporary_path, index=False)
+            os.replace(
+                temporary_path, Path.joinpath(self.spill_path, f"traffic_{first}.csv")
+            )
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning(f"Couldn't save the traffic block {first}: {error}.")
@@ -0,0 +1,226 @@
+"""
+Stores the drift metrics (PSI, Kolmogorov-Smirnov statistic and Jensen-Shannon
+distance) computed with vectorized NumPy operations, comparing a processed
+window (or its sketch) against the reference profile (which is calculated
+only once).
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .profile import ReferenceProfile
+from .sketch import DriftSketch
+
+
+def population_stability_index(
+    reference: np.ndarray, current: np.ndarray, epsilon: float = 1e-4
+) -> np.ndarray:
+    """Calculates the Population Stability Index (PSI) of each distribution.
+
+    Args:
+        reference (np.ndarray): the reference's distributions (one per row).
+        current (np.ndarray): the current distributions (one per row).
+        epsilon (float): the minimum share of each bin (used to avoid
+            calculating the log of 0). Defaults to 1e-4.
+
+    Returns:
+        np.ndarray: the PSI of each distribution.
+    """
+    reference = np.maximum(reference, epsilon)
+    current = np.maximum(current, epsilon)
+    return np.sum((current - reference) * np.log(current / reference), axis=-1)
+
+
+def jensen_shannon_distance(reference: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """Calculates the Jensen-Shannon distance (the square root of the base 2
+    divergence, which ranges from 0 to 1) of each distribution.
+
+    Args:
+        reference (np.ndarray): the reference's distributions (one per row).
+        current (np.ndarray): the current distributions (one per row).
+
+    Returns:
+        np.ndarray: the Jensen-Shannon distance of each distribution.
+    """
+    middle = (reference + current) / 2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        divergence = 0.5 * np.sum(
+            np.where(reference > 0, reference * np.log2(reference / middle), 0.0),
+            axis=-1,
+        ) + 0.5 * np.sum(
+            np.where(current > 0, current * np.log2(current / middle), 0.0), axis=-1
+        )
+
+    return np.sqrt(np.clip(divergence, 0.0, 1.0))
+
+
+def ks_statistics(profile: ReferenceProfile, sketch: DriftSketch) -> np.ndarray:
+    """Calculates the Kolmogorov-Smirnov statistic of each feature, using the
+    reference's quantiles as a (weighted) sample of the reference.
+
+    Both cumulative distributions are step functions and the reference's one
+    only steps at its quantiles, so the largest difference is found right at
+    (or right before) one of them, where the sketch counts the values.
+
+    Args:
+        profile (ReferenceProfile): the reference profile.
+        sketch (DriftSketch): the window's sketch.
+
+    Returns:
+        np.ndarray: each feature's statistic.
+    """
+    statistics = np.zeros(len(profile.feature_names))
+
+    for index, quantiles in enumerate(profile.quantiles):
+        rows = sketch.histograms[index].sum()
+
+        if rows == 0:
+            continue
+
+        below, at_or_below = (
+            np.cumsum(sketch.quantile_counts[:, index], axis=-1)[:, :-1] / rows
+        )[::-1]
+        statistics[index] = max(
+            np.max(
+                np.abs(
+                    below
+                    - np.searchsorted(quantiles, quantiles, side="left")
+                    / len(quantiles)
+                )
+            ),
+            np.max(
+                np.abs(
+                    at_or_below
+                    - np.searchsorted(quantiles, quantiles, side="right")
+                    / len(quantiles)
+                )
+            ),
+        )
+
+    return statistics
+
+
+def calculate_drift_metrics(
+    profile: ReferenceProfile,
+    features: np.ndarray,
+    target: Optional[np.ndarray],
+    predictions: np.ndarray,
+    psi_threshold: float = 0.2,
+) -> Dict[str, Any]:
+    """Calculates the drift (and data quality) metrics of a processed window.
+
+    Args:
+        profile (ReferenceProfile): the reference profile.
+        features (np.ndarray): the window's features.
+        target (Optional[np.ndarray]): the window's target labels (if known).
+        predictions (np.ndarray): the window's predicted labels.
+        psi_threshold (float): the PSI above which a feature is considered
+            drifted. Defaults to 0.2.
+
+    Returns:
+        Dict[str, Any]: the metrics of each feature, of the target and of
+            the predictions.
+    """
+    return calculate_sketch_drift_metrics(
+        profile=profile,
+        sketch=DriftSketch.build(
+            profile=profile, features=features, predictions=predictions, target=target
+        ),
+        psi_threshold=psi_threshold,
+    )
+
+
+def calculate_sketch_drift_metrics(
+    profile: ReferenceProfile, sketch: DriftSketch, psi_threshold: float = 0.2
+) -> Dict[str, Any]:
+    """Calculates the drift (and data quality) metrics of a window's sketch
+    (e.g., the merged sketches of its buckets).
+
+    Args:
+        profile (ReferenceProfile): the reference profile.
+        sketch (DriftSketch): the window's sketch.
+        psi_threshold (float): the PSI above which a feature is considered
+            drifted. Defaults to 0.2.
+
+    Returns:
+        Dict[str, Any]: the metrics of each feature, of the target (if the
+            sketch has it) and of the predictions.
+    """
+    histograms = sketch.histograms / np.maximum(
+        sketch.histograms.sum(axis=1, keepdims=True), 1
+    )
+    psi = population_stability_index(profile.histograms, histograms)
+    js_distance = jensen_shannon_distance(profile.histograms, histograms)
+    ks = ks_statistics(profile, sketch)
+    drifted = psi > psi_threshold
+
+    # data quality: missing values and values outside the reference's range
+    rows = max(sketch.rows, 1)
+    missing_share = sketch.missing_counts / rows
+    out_of_range_share = sketch.out_of_range_counts / rows
+
+    metrics = {
+        "rows": sketch.rows,
+        "share_of_drifted_features": float(drifted.mean()) if drifted.size else 0.0,
+        "features": {
+            name: {
+                "psi": float(psi[index]),
+                "ks": float(ks[index]),
+                "js_distance": float(js_distance[index]),
+                "drifted": bool(drifted[index]),
+                "missing_share": float(missing_share[index]),
+                "reference_missing_share": profile.missing_share(name),
+                "out_of_range_share": float(out_of_range_share[index]),
+            }
+            for index, name in enumerate(profile.feature_names)
+        },
+        "prediction": _label_shift(
+            profile.prediction_distribution,
+            _label_distribution(sketch.prediction_counts),
+            profile.labels,
+        ),
+    }
+
+    if sketch.target_counts is not None:
+        metrics["target"] = _label_shift(
+            profile.target_distribution,
+            _label_distribution(sketch.target_counts),
+            profile.labels,
+        )
+
+    return metrics
+
+
+def _label_shift(
+    reference: np.ndarray, current: np.ndarray, labels: np.ndarray
+) -> Dict[str, Any]:
+    """Calculates the shift between two label distributions.
+
+    Args:
+        reference (np.ndarray): the reference's label distribution.
+        current (np.ndarray): the current label distribution.
+        labels (np.ndarray): the classes' labels.
+
+    Returns:
+        Dict[str, Any]: the PSI, the Jensen-Shannon distance and both
+            distributions.
+    """
+    return {
+        "psi": float(population_stability_index(reference, current)),
+        "js_distance": float(jensen_shannon_distance(reference, current)),
+        "reference": dict(zip(labels.tolist(), reference.tolist())),
+        "current": dict(zip(labels.tolist(), current.tolist())),
+    }
+
+
+def _label_distribution(counts: np.ndarray) -> np.ndarray:
+    """Transforms the number of labels of each class into their shares.
+
+    Args:
+        counts (np.ndarray): the number of labels of each class.
+
+    Returns:
+        np.ndarray: the share of each class' label.
+    """
+    return counts / max(counts.sum(), 1)
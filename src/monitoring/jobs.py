@@ -0,0 +1,213 @@
+"""
+Stores the report jobs manager, which builds the monitoring reports in a bounded
+thread pool (so long report builds don't block the API's threads) and coalesces
+identical in-flight requests onto a single job.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from loguru import logger
+
+from ..model.executor import ExecutorSaturatedError
+
+
+class ReportJob:
+    """A report build job."""
+
+    def __init__(self, key: Hashable, future: Future) -> None:
+        """Job's instance initializer.
+
+        Args:
+            key (Hashable): the report's inputs (used to coalesce the jobs).
+            future (Future): the job's future, which holds its result.
+        """
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.future = future
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        """The job's status ('queued', 'running', 'succeeded' or 'failed').
+
+        Returns:
+            str: the job's status.
+        """
+        if not self.future.done():
+            return "queued" if self.started_at is None else "running"
+
+        return "failed" if self.future.exception() is not None else "succeeded"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the job's status and timings.
+
+        Returns:
+            Dict[str, Any]: the job's information.
+        """
+        status = self.status
+
+        return {
+            "job_id": self.id,
+            "status": status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": str(self.future.exception()) if status == "failed" else None,
+        }
+
+    async def wait(self) -> Any:
+        """Waits for the job's result without blocking the event loop. The job
+        is shared by every coalesced request, so cancelling a waiter (e.g.,
+        when its client disconnects) doesn't cancel the job.
+
+        Returns:
+            Any: the job's result.
+        """
+        return await asyncio.shield(asyncio.wrap_future(self.future))
+
+
+class ReportJobManager:
+    """The report jobs manager's class."""
+
+    def __init__(
+        self, max_workers: int, max_queue_size: int, max_finished_jobs: int
+    ) -> None:
+        """Manager's instance initializer.
+
+        Args:
+            max_workers (int): the number of worker threads.
+            max_queue_size (int): the maximum number of jobs waiting for a
+                worker thread. When the queue is full, new jobs are rejected.
+            max_finished_jobs (int): the maximum number of finished jobs kept
+                (so their status and result can still be requested).
+        """
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.max_finished_jobs = max_finished_jobs
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="reports"
+        )
+        self._jobs: "OrderedDict[str, ReportJob]" = OrderedDict()
+        self._in_flight: Dict[Hashable, ReportJob] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def submit(self, key: Hashable, function: Callable, *args: Any) -> ReportJob:
+        """Submits a report build, reusing the in-flight job with the same key
+        (if there is one).
+
+        Args:
+            key (Hashable): the report's inputs.
+            function (Callable): the function that builds the report.
+            *args (Any): the function's arguments.
+
+        Raises:
+            ExecutorSaturatedError: raises ExecutorSaturatedError if all workers
+                are busy and the queue is full.
+
+        Returns:
+            ReportJob: the report's job.
+        """
+        with self._lock:
+            job = self._in_flight.get(key)
+
+            if job is not None:
+                self.coalesced += 1
+                return job
+
+            if len(self._in_flight) >= self.max_workers + self.max_queue_size:
+                self.rejected += 1
+                raise ExecutorSaturatedError(
+                    "The report jobs queue is full, try again later."
+                )
+
+            job = ReportJob(key=key, future=Future())
+            self._in_flight[key] = job
+            self._jobs[job.id] = job
+            self.submitted += 1
+
+        self._executor.submit(self._run, job, function, *args)
+        return job
+
+    def get(self, job_id: str) -> Optional[ReportJob]:
+        """Gets a job by its id.
+
+        Args:
+            job_id (str): the job's id.
+
+        Returns:
+            Optional[ReportJob]: the job or None if it doesn't exist (or if
+                it was already discarded).
+        """
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the manager's metrics.
+
+        Returns:
+            Dict[str, int]: the number of workers, and of in-flight, submitted,
+                coalesced and rejected jobs.
+        """
+        return {
+            "workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "in_flight": len(self._in_flight),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+    def _run(self, job: ReportJob, function: Callable, *args: Any) -> None:
+        """Runs a job, storing its result (or its error) in the job's future.
+
+        Args:
+            job (ReportJob): the job.
+            function (Callable): the function that builds the report.
+            *args (Any): the function's arguments.
+        """
+        if not job.future.set_running_or_notify_cancel():
+            self._finish(job)
+            return
+
+        job.started_at = time.time()
+
+        try:
+            result = function(*args)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning(f"The report job {job.id} has failed: {error}.")
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+        # the job leaves the in-flight jobs only once its result is set, so
+        # identical requests never start a new build in the meantime
+        self._finish(job)
+
+    def _finish(self, job: ReportJob) -> None:
+        """Marks a job as finished, discarding the oldest finished jobs.
+
+        Args:
+            job (ReportJob): the job.
+        """
+        job.finished_at = time.time()
+
+        with self._lock:
+            self._in_flight.pop(job.key, None)
+            finished_jobs = [
+                job_id
+                for job_id, other_job in self._jobs.items()
+                if other_job.finished_at is not None
+            ]
+
+            for job_id in finished_jobs[: -self.max_finished_jobs or None]:
+                del self._jobs[job_id]
@@ -0,0 +1,245 @@
+"""
+Stores the latency recorder, a low-overhead timing layer that aggregates the
+duration of each processing stage (data processing, model predictions and
+report builds) into histograms, which are exposed in the Prometheus format.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import nullcontext
+from typing import ContextManager, Dict, List, Optional, Sequence
+
+from ..config.api import api_settings
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# the durations of the stages run by the current request (used to build
+# the 'Server-Timing' header), shared with the inference executor's threads
+_request_timings: contextvars.ContextVar[
+    Optional[Dict[str, float]]
+] = contextvars.ContextVar("request_timings", default=None)
+_DISABLED_TIMER = nullcontext()
+
+
+class _LatencyHistogram:
+    """A stage's latency histogram (its counts aren't cumulative)."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, n_buckets: int) -> None:
+        """Histogram's instance initializer.
+
+        Args:
+            n_buckets (int): the number of buckets (including the '+Inf' one).
+        """
+        self.counts = [0] * n_buckets
+        self.total = 0.0
+        self.count = 0
+
+
+class _StageTimer:
+    """Measures a stage's duration (used as a context manager)."""
+
+    __slots__ = ("recorder", "stage", "start")
+
+    def __init__(self, recorder: "LatencyRecorder", stage: str) -> None:
+        """Timer's instance initializer.
+
+        Args:
+            recorder (LatencyRecorder): the recorder that aggregates the duration.
+            stage (str): the stage's name.
+        """
+        self.recorder = recorder
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> "_StageTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.recorder.observe(self.stage, time.perf_counter() - self.start)
+
+
+class LatencyRecorder:
+    """The latency recorder's class.
+
+    When it's disabled, `time` returns a shared no-op context manager, so the
+    instrumented code only pays for a function call.
+    """
+
+    def __init__(self, enabled: bool, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Recorder's instance initializer.
+
+        Args:
+            enabled (bool): whether the durations are recorded.
+            buckets (Sequence[float]): the histograms' upper bounds (in seconds).
+                Defaults to DEFAULT_BUCKETS.
+        """
+        self.enabled = enabled
+        self.buckets = sorted(buckets)
+
+        self._histograms: Dict[str, _LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def time(self, stage: str) -> ContextManager:
+        """Measures the duration of a stage.
+
+        Args:
+            stage (str): the stage's name (e.g., 'model.predict').
+
+        Returns:
+            ContextManager: the context manager that wraps the stage.
+        """
+        if not self.enabled:
+            return _DISABLED_TIMER
+
+        return _StageTimer(self, stage)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Records a stage's duration.
+
+        Args:
+            stage (str): the stage's name.
+            seconds (float): the duration (in seconds).
+        """
+        timings = _request_timings.get()
+
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+        bucket = bisect.bisect_left(self.buckets, seconds)
+
+        with self._lock:
+            histogram = self._histograms.get(stage)
+
+            if histogram is None:
+                histogram = _LatencyHistogram(len(self.buckets) + 1)
+                self._histograms[stage] = histogram
+
+            histogram.counts[bucket] += 1
+            histogram.total += seconds
+            histogram.count += 1
+
+    def start_request(self) -> None:
+        """Starts collecting the durations of the stages run by the current
+        request (and by the tasks it runs in the inference executor).
+        """
+        if self.enabled:
+            _request_timings.set({})
+
+    def end_request(self) -> None:
+        """Stops collecting the durations in the current context (e.g., in a
+        background task that was started by a request, whose context it copied).
+        """
+        _request_timings.set(None)
+
+    def request_timings(self) -> Optional[Dict[str, float]]:
+        """Returns the durations collected in the current context.
+
+        Returns:
+            Optional[Dict[str, float]]: the durations of each stage (in seconds)
+                or None if they aren't collected.
+        """
+        timings = _request_timings.get()
+        return dict(timings) if timings is not None else None
+
+    def add_request_timings(self, timings: Optional[Dict[str, float]]) -> None:
+        """Adds durations collected in another context (e.g., by a micro-batch
+        shared by many requests) to the current request's durations. They're
+        not added to the histograms again.
+
+        Args:
+            timings (Optional[Dict[str, float]]): the durations of each stage
+                (in seconds).
+        """
+        current = _request_timings.get()
+
+        if current is None or not timings:
+            return
+
+        for stage, seconds in timings.items():
+            current[stage] = current.get(stage, 0.0) + seconds
+
+    def server_timing(self, total: Optional[float] = None) -> Optional[str]:
+        """Builds the 'Server-Timing' header of the current request.
+
+        Args:
+            total (Optional[float]): the request's whole duration (in seconds).
+                Defaults to None.
+
+        Returns:
+            Optional[str]: the header's value (with the durations in
+                milliseconds) or None if the recorder is disabled.
+        """
+        timings = _request_timings.get()
+
+        if not self.enabled or timings is None:
+            return None
+
+        if total is not None:
+            timings = {**timings, "total": total}
+
+        return ", ".join(
+            f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timings.items()
+        )
+
+    def render_prometheus(self, name: str = "api_stage_duration_seconds") -> str:
+        """Renders the histograms in the Prometheus text format.
+
+        Args:
+            name (str): the metric's name. Defaults to 'api_stage_duration_seconds'.
+
+        Returns:
+            str: the histograms.
+        """
+        lines: List[str] = [
+            f"# HELP {name} The duration of each processing stage (in seconds).",
+            f"# TYPE {name} histogram",
+        ]
+
+        with self._lock:
+            histograms = {
+                stage: (list(histogram.counts), histogram.total, histogram.count)
+                for stage, histogram in sorted(self._histograms.items())
+            }
+
+        for stage, (counts, total, count) in histograms.items():
+            cumulative = 0
+
+            for bound, bucket_count in zip(self.buckets + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                )
+
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Removes all the recorded durations."""
+        with self._lock:
+            self._histograms.clear()
+
+
+latency_recorder = LatencyRecorder(enabled=api_settings.LATENCY_METRICS_ENABLED)
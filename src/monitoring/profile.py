@@ -0,0 +1,325 @@
+"""
+Stores the reference profile, the reference data's statistics (bin edges,
+histograms, quantiles, category frequencies, missing counts and class balance)
+calculated only once and persisted per model version, so the drift and quality
+computations don't rescan the reference data.
+"""
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List
+
+import joblib
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .window import fingerprint_dataframe
+
+PROFILE_FORMAT_VERSION = 1
+
+
+class ReferenceProfile:
+    """The reference profile's class."""
+
+    def __init__(self, attributes: Dict[str, Any]) -> None:
+        """Profile's instance initializer (use `ReferenceProfile.build` to
+        calculate a new profile).
+
+        Args:
+            attributes (Dict[str, Any]): the profile's statistics.
+        """
+        self.fingerprint: str = attributes["fingerprint"]
+        self.feature_names: List[str] = attributes["feature_names"]
+        self.labels: np.ndarray = attributes["labels"]
+        self.rows: int = attributes["rows"]
+
+        # the inner edges of each feature's bins (a value `x` falls into the
+        # bin `np.searchsorted(edges, x, side="right")`)
+        self.edges: List[np.ndarray] = attributes["edges"]
+        self.n_bins: int = attributes["n_bins"]
+        self.histograms: np.ndarray = attributes["histograms"]
+        self.probabilities: np.ndarray = attributes["probabilities"]
+        self.quantiles: np.ndarray = attributes["quantiles"]
+        self.category_frequencies: Dict[str, Dict[float, float]] = attributes[
+            "category_frequencies"
+        ]
+        self.minimums: np.ndarray = attributes["minimums"]
+        self.maximums: np.ndarray = attributes["maximums"]
+        self.missing_counts: Dict[str, int] = attributes["missing_counts"]
+        self.target_distribution: np.ndarray = attributes["target_distribution"]
+        self.prediction_distribution: np.ndarray = attributes["prediction_distribution"]
+
+    @classmethod
+    def build(
+        cls,
+        dataframe: pd.DataFrame,
+        features: List[str],
+        target_column: str,
+        prediction_column: str,
+        labels: np.ndarray,
+        n_bins: int = 10,
+        n_quantiles: int = 1000,
+    ) -> "ReferenceProfile":
+        """Calculates the profile of the reference data.
+
+        The binary features (e.g., the one hot encoded ones) are binned by
+        their values, while the other features are binned by the reference's
+        quantiles (so each bin holds roughly the same share of the reference).
+
+        Args:
+            dataframe (pd.DataFrame): the reference data (with the features,
+                the target and the predictions).
+            features (List[str]): the features' names (in order).
+            target_column (str): the target column's name.
+            prediction_column (str): the prediction column's name.
+            labels (np.ndarray): the classes' labels.
+            n_bins (int): the number of bins of the numerical features.
+                Defaults to 10.
+            n_quantiles (int): the number of quantiles kept per feature (used
+                to calculate the Kolmogorov-Smirnov statistic). Defaults to 1000.
+
+        Returns:
+            ReferenceProfile: the reference profile.
+        """
+        values = np.asarray(dataframe[features].values, dtype=np.float64)
+        probabilities = np.linspace(0, 1, n_quantiles + 1)
+        edges = []
+        category_frequencies = {}
+
+        for name, column in zip(features, values.T):
+            column = column[~np.isnan(column)]
+            categories, counts = np.unique(column, return_counts=True)
+
+            if len(categories) <= 2:
+                edges.append(categories[1:])
+                category_frequencies[name] = dict(
+                    zip(categories.tolist(), (counts / max(len(column), 1)).tolist())
+                )
+            else:
+                edges.append(
+                    np.unique(np.quantile(column, np.linspace(0, 1, n_bins + 1))[1:-1])
+                )
+
+        profile = cls(
+            {
+                "fingerprint": fingerprint_reference(
+                    dataframe, features, target_column, prediction_column, n_bins
+                ),
+                "feature_names": list(features),
+                "labels": np.asarray(labels),
+                "rows": len(dataframe),
+                "edges": edges,
+                "n_bins": max(len(feature_edges) for feature_edges in edges) + 1,
+                "histograms": None,
+                "probabilities": probabilities,
+                "quantiles": np.nanquantile(values, probabilities, axis=0).T,
+                "category_frequencies": category_frequencies,
+                "minimums": np.nanmin(values, axis=0),
+                "maximums": np.nanmax(values, axis=0),
+                "missing_counts": dataframe[
+                    features + [target_column, prediction_column]
+                ]
+                .isna()
+                .sum()
+                .to_dict(),
+                "target_distribution": None,
+                "prediction_distribution": None,
+            }
+        )
+        profile.histograms = profile.feature_histograms(values)
+        profile.target_distribution = profile.label_distribution(
+            dataframe[target_column].values
+        )
+        profile.prediction_distribution = profile.label_distribution(
+            dataframe[prediction_column].values
+        )
+        return profile
+
+    def feature_histograms(self, features: np.ndarray) -> np.ndarray:
+        """Calculates the share of rows (ignoring the missing values) that falls
+        into each feature's bins.
+
+        Args:
+            features (np.ndarray): the features.
+
+        Returns:
+            np.ndarray: the features' histograms (with shape (number of
+                features, number of bins), padded with zeros).
+        """
+        histograms = np.zeros((len(self.edges), self.n_bins))
+
+        for index, edges in enumerate(self.edges):
+            column = features[:, index]
+            column = column[~np.isnan(column)]
+            counts = np.bincount(
+                np.searchsorted(edges, column, side="right"), minlength=self.n_bins
+            )
+            histograms[index] = counts / max(len(column), 1)
+
+        return histograms
+
+    def label_counts(self, values: np.ndarray) -> np.ndarray:
+        """Counts each class' label.
+
+        Args:
+            values (np.ndarray): the labels (unknown labels are ignored).
+
+        Returns:
+            np.ndarray: the number of labels of each class.
+        """
+        codes = pd.Categorical(values, categories=self.labels).codes
+        return np.bincount(codes[codes >= 0], minlength=len(self.labels))
+
+    def label_distribution(self, values: np.ndarray) -> np.ndarray:
+        """Calculates the share of each class' label.
+
+        Args:
+            values (np.ndarray): the labels (unknown labels are ignored).
+
+        Returns:
+            np.ndarray: the share of each class' label.
+        """
+        counts = self.label_counts(values)
+        return counts / max(counts.sum(), 1)
+
+    def missing_share(self, column: str) -> float:
+        """Calculates the share of the reference's missing values of a column.
+
+        Args:
+            column (str): the column's name.
+
+        Returns:
+            float: the share of missing values.
+        """
+        return self.missing_counts.get(column, 0) / max(self.rows, 1)
+
+    def save(self, path: Path) -> None:
+        """Saves the profile (writing it to a temporary file that is atomically
+        renamed).
+
+        Args:
+            path (Path): the profile's file path.
+        """
+        path = Path(path)
+        os.makedirs(path.parent, exist_ok=True)
+        temporary_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+        try:
+            joblib.dump(
+                {"format_version": PROFILE_FORMAT_VERSION, **self.__dict__},
+                temporary_path,
+            )
+            os.replace(temporary_path, path)
+        finally:
+            if temporary_path.exists():
+                os.remove(temporary_path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ReferenceProfile":
+        """Loads a saved profile.
+
+        Args:
+            path (Path): the profile's file path.
+
+        Raises:
+            ValueError: raises ValueError if the profile was saved with another
+                format version.
+
+        Returns:
+            ReferenceProfile: the reference profile.
+        """
+        attributes = joblib.load(path)
+
+        if attributes.pop("format_version", None) != PROFILE_FORMAT_VERSION:
+            raise ValueError(f"The profile {path} has an unsupported format.")
+
+        return cls(attributes)
+
+
+def fingerprint_reference(
+    dataframe: pd.DataFrame,
+    features: List[str],
+    target_column: str,
+    prediction_column: str,
+    n_bins: int,
+) -> str:
+    """Calculates the fingerprint of the profile's inputs.
+
+    Args:
+        dataframe (pd.DataFrame): the reference data.
+        features (List[str]): the features' names (in order).
+        target_column (str): the target column's name.
+        prediction_column (str): the prediction column's name.
+        n_bins (int): the number of bins of the numerical features.
+
+    Returns:
+        str: the inputs' fingerprint.
+    """
+    return "|".join(
+        [
+            fingerprint_dataframe(
+                dataframe[features + [target_column, prediction_column]]
+            ),
+            str(n_bins),
+            str(PROFILE_FORMAT_VERSION),
+        ]
+    )
+
+
+def load_reference_profile(
+    dataframe: pd.DataFrame,
+    features: List[str],
+    target_column: str,
+    prediction_column: str,
+    labels: np.ndarray,
+    n_bins: int,
+    path: Path,
+) -> ReferenceProfile:
+    """Loads the saved reference profile or, if it doesn't exist or if the
+    reference data (or the predictions) changed, calculates and saves it.
+
+    Args:
+        dataframe (pd.DataFrame): the reference data (with the features,
+            the target and the predictions).
+        features (List[str]): the features' names (in order).
+        target_column (str): the target column's name.
+        prediction_column (str): the prediction column's name.
+        labels (np.ndarray): the classes' labels.
+        n_bins (int): the number of bins of the numerical features.
+        path (Path): the profile's file path (e.g., named after the model's
+            version).
+
+    Returns:
+        ReferenceProfile: the reference profile.
+    """
+    fingerprint = fingerprint_reference(
+        dataframe, features, target_column, prediction_column, n_bins
+    )
+
+    if Path(path).exists():
+        try:
+            profile = ReferenceProfile.load(path)
+
+            if profile.fingerprint == fingerprint:
+                logger.info(f"Loaded the reference profile from {path}.")
+                return profile
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning(f"Couldn't load the reference profile {path}: {error}.")
+
+    logger.info("Calculating the reference profile.")
+    profile = ReferenceProfile.build(
+        dataframe=dataframe,
+        features=features,
+        target_column=target_column,
+        prediction_column=prediction_column,
+        labels=labels,
+        n_bins=n_bins,
+    )
+
+    try:
+        profile.save(path)
+    except OSError as error:
+        logger.warning(f"Couldn't save the reference profile {path}: {error}.")
+
+    return profile
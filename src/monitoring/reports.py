@@ -0,0 +1,307 @@
+"""
+Stores the rendered reports cache, a content-addressed store on disk shared by
+the API's workers, and the ETag matching used to serve its reports.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from ..data.utils import hash_file, remove_file
+
+
+class CachedReport(NamedTuple):
+    """A rendered report stored in the reports cache."""
+
+    path: Path
+    etag: str
+    size: int
+
+
+class ReportCache:
+    """The rendered reports cache's class.
+
+    The reports are stored on disk in a content-addressed store (each file is
+    named after its content's hash, so it is never modified once written), and
+    each key points to a stored report. Every file is written to a temporary
+    file and atomically renamed, so concurrent builds (even from other workers
+    sharing the same folder) never expose a partially written report. The least
+    recently used reports are removed when the cache exceeds its size budget,
+    but only after they are older than the minimum age (so reports that might
+    still be streamed aren't removed).
+    """
+
+    def __init__(self, path: Path, max_bytes: int, min_age: float) -> None:
+        """Cache's instance initializer, which also registers the reports
+        already stored in the cache's folder (e.g., before a restart) and
+        removes the leftovers of interrupted builds.
+
+        Args:
+            path (Path): the folder where the reports are stored.
+            max_bytes (int): the maximum total size (in bytes) of the reports.
+            min_age (float): the minimum age (in seconds) of a report before it
+                can be removed.
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+
+        self._objects_path = Path.joinpath(self.path, "objects")
+        self._keys_path = Path.joinpath(self.path, "keys")
+        self._temporary_path = Path.joinpath(self.path, "tmp")
+        self._reports: "OrderedDict[str, CachedReport]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        for folder in [self._objects_path, self._keys_path, self._temporary_path]:
+            os.makedirs(folder, exist_ok=True)
+
+        for key_path in sorted(
+            self._keys_path.iterdir(), key=lambda key_path: key_path.stat().st_mtime
+        ):
+            self._load_key(key_path.name)
+
+        with self._lock:
+            self._evict()
+            self._remove_unreferenced()
+
+    def get(self, key: Tuple) -> Optional[CachedReport]:
+        """Gets a cached report (which might have been built by another worker).
+
+        Args:
+            key (Tuple): the report's inputs (e.g., the report type, the
+                window, the model's version and the dataset's fingerprint).
+
+        Returns:
+            Optional[CachedReport]: the cached report or None if it isn't cached.
+        """
+        hashed_key = _hash_key(key)
+
+        with self._lock:
+            report = self._reports.get(hashed_key) or self._load_key(hashed_key)
+
+            if report is None or not report.path.exists():
+                self.misses += 1
+                return None
+
+            self._reports.move_to_end(hashed_key)
+            self.hits += 1
+            return report
+
+    def temporary_path(self, suffix: str = ".html") -> Path:
+        """Creates a unique temporary path, where a report can be built before
+        being stored.
+
+        Args:
+            suffix (str): the path's suffix. Defaults to '.html'.
+
+        Returns:
+            Path: the temporary path (in the same file system as the store).
+        """
+        return Path.joinpath(self._temporary_path, f"{uuid.uuid4().hex}{suffix}")
+
+    def put(self, key: Tuple, report_path: Path) -> CachedReport:
+        """Stores a rendered report, moving it (atomically) into the store and
+        evicting the least recently used reports if the cache exceeds its
+        size budget.
+
+        Args:
+            key (Tuple): the report's inputs.
+            report_path (Path): the rendered report's path (e.g., a temporary
+                path), which is moved into the store.
+
+        Returns:
+            CachedReport: the cached report.
+        """
+        hashed_key = _hash_key(key)
+        content_hash = hash_file(str(report_path))
+        os.replace(report_path, self._object_path(content_hash))
+
+        key_path = Path.joinpath(self._keys_path, hashed_key)
+        temporary_path = self.temporary_path(suffix=".key")
+        temporary_path.write_text(content_hash, encoding="utf-8")
+        os.replace(temporary_path, key_path)
+
+        with self._lock:
+            report = self._add(hashed_key, content_hash)
+            self._evict()
+            return report
+
+    def publish(self, report: CachedReport, report_path: Path) -> None:
+        """Atomically copies a cached report to a fixed path (e.g., the latest
+        report of each type).
+
+        Args:
+            report (CachedReport): the cached report.
+            report_path (Path): the fixed path.
+        """
+        report_path = Path(report_path)
+        temporary_path = report_path.with_name(
+            f".{report_path.name}.{uuid.uuid4().hex}.tmp"
+        )
+
+        try:
+            shutil.copyfile(report.path, temporary_path)
+            os.replace(temporary_path, report_path)
+        finally:
+            remove_file(temporary_path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the cache's metrics.
+
+        Returns:
+            Dict[str, Any]: the cache's number of reports, size and counters.
+        """
+        return {
+            "reports": len(self._reports),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _object_path(self, content_hash: str) -> Path:
+        """Gets the path of a stored report.
+
+        Args:
+            content_hash (str): the report's content hash.
+
+        Returns:
+            Path: the stored report's path.
+        """
+        return Path.joinpath(self._objects_path, f"{content_hash}.html")
+
+    def _load_key(self, hashed_key: str) -> Optional[CachedReport]:
+        """Registers a key stored on disk (must be called while holding the
+        lock, or during initialization).
+
+        Args:
+            hashed_key (str): the report's hashed key.
+
+        Returns:
+            Optional[CachedReport]: the cached report or None if the key (or
+                its report) doesn't exist.
+        """
+        try:
+            content_hash = (
+                Path.joinpath(self._keys_path, hashed_key)
+                .read_text(encoding="utf-8")
+                .strip()
+            )
+        except FileNotFoundError:
+            return None
+
+        if not self._object_path(content_hash).exists():
+            return None
+
+        return self._add(hashed_key, content_hash)
+
+    def _add(self, hashed_key: str, content_hash: str) -> CachedReport:
+        """Registers a stored report (must be called while holding the lock,
+        or during initialization).
+
+        Args:
+            hashed_key (str): the report's hashed key.
+            content_hash (str): the report's content hash.
+
+        Returns:
+            CachedReport: the cached report.
+        """
+        previous = self._reports.pop(hashed_key, None)
+
+        if previous is not None:
+            self.size -= previous.size
+
+        object_path = self._object_path(content_hash)
+        report = CachedReport(
+            path=object_path,
+            etag=f'"{content_hash}"',
+            size=object_path.stat().st_size,
+        )
+        self._reports[hashed_key] = report
+        self.size += report.size
+        return report
+
+    def _evict(self) -> None:
+        """Removes the least recently used reports (older than the minimum
+        age) until the cache fits its size budget (must be called while
+        holding the lock)."""
+        now = time.time()
+
+        # the most recent report is always kept
+        for hashed_key, report in list(self._reports.items())[:-1]:
+            if self.size <= self.max_bytes:
+                break
+
+            try:
+                if now - report.path.stat().st_mtime < self.min_age:
+                    continue
+            except FileNotFoundError:
+                pass
+
+            del self._reports[hashed_key]
+            self.size -= report.size
+            self.evictions += 1
+
+            remove_file(Path.joinpath(self._keys_path, hashed_key))
+
+            if all(other.path != report.path for other in self._reports.values()):
+                remove_file(report.path)
+
+    def _remove_unreferenced(self) -> None:
+        """Removes the stored reports that no key points to and the leftovers
+        of interrupted builds, if they are older than the minimum age (must be
+        called while holding the lock)."""
+        now = time.time()
+        referenced = {report.path for report in self._reports.values()}
+
+        for folder in [self._objects_path, self._temporary_path]:
+            for file_path in folder.iterdir():
+                try:
+                    if (
+                        file_path not in referenced
+                        and now - file_path.stat().st_mtime >= self.min_age
+                    ):
+                        remove_file(file_path)
+                except FileNotFoundError:
+                    pass
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Checks if an 'If-None-Match' header matches an ETag (using the weak
+    comparison, as required for the 'If-None-Match' header).
+
+    Args:
+        if_none_match (Optional[str]): the 'If-None-Match' header's value.
+        etag (str): the ETag.
+
+    Returns:
+        bool: whether the header matches the ETag or not.
+    """
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+
+
+def _hash_key(key: Tuple) -> str:
+    """Calculates the hash of a report's key.
+
+    Args:
+        key (Tuple): the report's inputs.
+
+    Returns:
+        str: the key's hash.
+    """
+    return hashlib.sha256(json.dumps(key, default=str).encode()).hexdigest()
@@ -0,0 +1,373 @@
+"""
+Stores the drift sketches, mergeable summaries (counts aligned to the reference
+profile's bins and quantiles) of the processed rows, so the drift metrics of a
+window are calculated by merging the sketches of its buckets instead of
+rescanning its rows.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .profile import ReferenceProfile
+from .window import MonitoringWindow
+
+
+class DriftSketch:
+    """The drift sketch's class.
+
+    Every statistic is a count, so two sketches are merged by adding them.
+    The values are counted in the reference's bins (the histograms) and
+    between the reference's quantiles (both below and at or below each
+    quantile), which is enough to calculate the exact Kolmogorov-Smirnov
+    statistic against the reference's quantiles.
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        histograms: np.ndarray,
+        quantile_counts: np.ndarray,
+        missing_counts: np.ndarray,
+        out_of_range_counts: np.ndarray,
+        prediction_counts: np.ndarray,
+        target_counts: Optional[np.ndarray],
+    ) -> None:
+        """Sketch's instance initializer (use `DriftSketch.build` to summarize
+        a window).
+
+        Args:
+            rows (int): the number of rows.
+            histograms (np.ndarray): the number of values of each feature that
+                fall into each of the reference's bins.
+            quantile_counts (np.ndarray): the number of values of each feature
+                (with shape (2, number of features, number of quantiles + 1))
+                that are greater than exactly `i` of the reference's quantiles
+                (first row) or greater than or equal to exactly `i` of them
+                (second row).
+            missing_counts (np.ndarray): the number of missing values of each feature.
+            out_of_range_counts (np.ndarray): the number of values of each
+                feature outside the reference's range.
+            prediction_counts (np.ndarray): the number of predictions of each class.
+            target_counts (Optional[np.ndarray]): the number of target labels
+                of each class (None if the target is unknown).
+        """
+        self.rows = rows
+        self.histograms = histograms
+        self.quantile_counts = quantile_counts
+        self.missing_counts = missing_counts
+        self.out_of_range_counts = out_of_range_counts
+        self.prediction_counts = prediction_counts
+        self.target_counts = target_counts
+
+    @classmethod
+    def build(
+        cls,
+        profile: ReferenceProfile,
+        features: np.ndarray,
+        predictions: np.ndarray,
+        target: Optional[np.ndarray] = None,
+    ) -> "DriftSketch":
+        """Summarizes a processed window.
+
+        Args:
+            profile (ReferenceProfile): the reference profile.
+            features (np.ndarray): the window's features.
+            predictions (np.ndarray): the window's predicted labels.
+            target (Optional[np.ndarray]): the window's target labels (if
+                known). Defaults to None.
+
+        Returns:
+            DriftSketch: the window's sketch.
+        """
+        features = np.asarray(features, dtype=np.float64).reshape(
+            -1, len(profile.feature_names)
+        )
+        n_quantiles = profile.quantiles.shape[1]
+        histograms = np.zeros((len(profile.edges), profile.n_bins), np.int32)
+        quantile_counts = np.zeros((2, len(profile.edges), n_quantiles + 1), np.int32)
+
+        for index, edges in enumerate(profile.edges):
+            column = features[:, index]
+            column = column[~np.isnan(column)]
+            quantiles = profile.quantiles[index]
+            histograms[index] = np.bincount(
+                np.searchsorted(edges, column, side="right"), minlength=profile.n_bins
+            )
+
+            for side_index, side in enumerate(["left", "right"]):
+                quantile_counts[side_index, index] = np.bincount(
+                    np.searchsorted(quantiles, column, side=side),
+                    minlength=n_quantiles + 1,
+                )
+
+        return cls(
+            rows=len(features),
+            histograms=histograms,
+            quantile_counts=quantile_counts,
+            missing_counts=np.isnan(features).sum(axis=0),
+            out_of_range_counts=(
+                (features < profile.minimums) | (features > profile.maximums)
+            ).sum(axis=0),
+            prediction_counts=profile.label_counts(predictions),
+            target_counts=(
+                profile.label_counts(target) if target is not None else None
+            ),
+        )
+
+    @classmethod
+    def merge(cls, sketches: Iterable["DriftSketch"]) -> "DriftSketch":
+        """Merges many sketches (e.g., the sketches of a window's buckets).
+
+        Args:
+            sketches (Iterable[DriftSketch]): the sketches (at least one).
+
+        Returns:
+            DriftSketch: the merged sketch (whose target counts are None if
+                any sketch doesn't have them).
+        """
+        sketches = list(sketches)
+        target_counts = [sketch.target_counts for sketch in sketches]
+
+        def _sum(name: str) -> np.ndarray:
+            return np.sum(
+                [getattr(sketch, name) for sketch in sketches], axis=0, dtype=np.int64
+            )
+
+        return cls(
+            rows=sum(sketch.rows for sketch in sketches),
+            histograms=_sum("histograms"),
+            quantile_counts=_sum("quantile_counts"),
+            missing_counts=_sum("missing_counts"),
+            out_of_range_counts=_sum("out_of_range_counts"),
+            prediction_counts=_sum("prediction_counts"),
+            target_counts=(
+                np.sum(target_counts, axis=0, dtype=np.int64)
+                if all(counts is not None for counts in target_counts)
+                else None
+            ),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """The memory used by the sketch's arrays (in bytes).
+
+        Returns:
+            int: the sketch's size.
+        """
+        return sum(
+            array.nbytes
+            for array in [
+                self.histograms,
+                self.quantile_counts,
+                self.missing_counts,
+                self.out_of_range_counts,
+                self.prediction_counts,
+                self.target_counts,
+            ]
+            if array is not None
+        )
+
+
+class SketchWindows:
+    """The streaming drift sketches' class.
+
+    The rows (e.g., the requests' sequence numbers or the current dataset's
+    rows) are split into tumbling buckets of `bucket_size` rows, and each
+    complete bucket is summarized only once. A (sliding) window's sketch merges
+    the sketches of the buckets it covers with the sketches of its (partial)
+    first and last buckets, so only up to two partial buckets are scanned.
+    The sketches are discarded whenever the generation changes.
+    """
+
+    def __init__(self, bucket_size: int, max_buckets: int) -> None:
+        """Sketches' instance initializer.
+
+        Args:
+            bucket_size (int): the number of rows of each bucket.
+            max_buckets (int): the maximum number of kept bucket sketches (the
+                least recently used are discarded).
+        """
+        self.bucket_size = bucket_size
+        self.max_buckets = max_buckets
+
+        self._buckets: "OrderedDict[int, DriftSketch]" = OrderedDict()
+        self._generation: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.scanned_rows = 0
+
+    def sketch(
+        self,
+        start: int,
+        stop: int,
+        generation: str,
+        summarize: Callable[[int, int], DriftSketch],
+    ) -> DriftSketch:
+        """Gets the sketch of a window.
+
+        Args:
+            start (int): the window's first row.
+            stop (int): the window's last row (exclusive).
+            generation (str): the current generation (e.g., the model's version,
+                the artifacts' hashes and the data's fingerprint).
+            summarize (Callable[[int, int], DriftSketch]): the function that
+                summarizes the given rows.
+
+        Returns:
+            DriftSketch: the window's sketch.
+        """
+        first_bucket = -(-start // self.bucket_size)
+        stop_bucket = stop // self.bucket_size
+        sketches = []
+
+        if first_bucket >= stop_bucket:
+            return self._summarize(start, stop, summarize)
+
+        if start < first_bucket * self.bucket_size:
+            sketches.append(
+                self._summarize(start, first_bucket * self.bucket_size, summarize)
+            )
+
+        for bucket in range(first_bucket, stop_bucket):
+            sketches.append(self._get_bucket(bucket, generation, summarize))
+
+        if stop_bucket * self.bucket_size < stop:
+            sketches.append(
+                self._summarize(stop_bucket * self.bucket_size, stop, summarize)
+            )
+
+        return DriftSketch.merge(sketches)
+
+    def tumbling_bounds(
+        self, start: int, stop: int, window_size: int
+    ) -> Tuple[int, int]:
+        """Gets the bounds of the last complete buckets between two rows that
+        hold at least `window_size` rows (or as many complete buckets as there
+        are).
+
+        Args:
+            start (int): the first row (e.g., the oldest request kept).
+            stop (int): the last row (exclusive), e.g., the number of requests.
+            window_size (int): the window's minimum size.
+
+        Returns:
+            Tuple[int, int]: the window's first and last (exclusive) rows.
+        """
+        stop = stop // self.bucket_size * self.bucket_size
+        start = max(
+            -(-start // self.bucket_size) * self.bucket_size,
+            stop - -(-window_size // self.bucket_size) * self.bucket_size,
+        )
+        return min(start, stop), stop
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the sketches' metrics.
+
+        Returns:
+            Dict[str, Any]: the number of kept bucket sketches, their size and
+                the counters.
+        """
+        with self._lock:
+            nbytes = sum(sketch.nbytes for sketch in self._buckets.values())
+
+        return {
+            "bucket_size": self.bucket_size,
+            "buckets": len(self._buckets),
+            "max_buckets": self.max_buckets,
+            "bytes": nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "scanned_rows": self.scanned_rows,
+        }
+
+    def _get_bucket(
+        self,
+        bucket: int,
+        generation: str,
+        summarize: Callable[[int, int], DriftSketch],
+    ) -> DriftSketch:
+        """Gets the sketch of a complete bucket, summarizing it only if it
+        isn't kept.
+
+        Args:
+            bucket (int): the bucket's index.
+            generation (str): the current generation.
+            summarize (Callable[[int, int], DriftSketch]): the function that
+                summarizes the given rows.
+
+        Returns:
+            DriftSketch: the bucket's sketch.
+        """
+        with self._lock:
+            if generation != self._generation:
+                self._buckets.clear()
+                self._generation = generation
+
+            sketch = self._buckets.get(bucket)
+
+            if sketch is not None:
+                self._buckets.move_to_end(bucket)
+                self.hits += 1
+                return sketch
+
+            self.misses += 1
+
+        sketch = self._summarize(
+            bucket * self.bucket_size, (bucket + 1) * self.bucket_size, summarize
+        )
+
+        with self._lock:
+            if generation == self._generation:
+                self._buckets[bucket] = sketch
+
+                while len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+
+        return sketch
+
+    def _summarize(
+        self, start: int, stop: int, summarize: Callable[[int, int], DriftSketch]
+    ) -> DriftSketch:
+        """Summarizes the given rows, updating the scanned rows counter.
+
+        Args:
+            start (int): the first row.
+            stop (int): the last row (exclusive).
+            summarize (Callable[[int, int], DriftSketch]): the function that
+                summarizes the given rows.
+
+        Returns:
+            DriftSketch: the rows' sketch.
+        """
+        with self._lock:
+            self.scanned_rows += stop - start
+
+        return summarize(start, stop)
+
+
+def summarize_window(
+    profile: ReferenceProfile,
+    window: MonitoringWindow,
+    decode: Callable[[np.ndarray], np.ndarray],
+) -> DriftSketch:
+    """Summarizes a processed window.
+
+    Args:
+        profile (ReferenceProfile): the reference profile.
+        window (MonitoringWindow): the processed window (with the predicted
+            class indexes).
+        decode (Callable[[np.ndarray], np.ndarray]): the function that
+            transforms the class indexes into labels.
+
+    Returns:
+        DriftSketch: the window's sketch.
+    """
+    return DriftSketch.build(
+        profile=profile,
+        features=window.features,
+        predictions=decode(window.predictions),
+        target=window.target,
+    )
@@ -0,0 +1,181 @@
+"""
+Stores a cache of the processed windows of the current dataset (features,
+target and predictions), shared by the monitoring endpoints. The whole dataset
+is usually processed at once, so each window is just a slice of it.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class MonitoringWindow(NamedTuple):
+    """A processed window of the current dataset."""
+
+    features: np.ndarray
+    target: np.ndarray
+    predictions: np.ndarray
+
+
+class WindowCache:
+    """The processed windows cache's class.
+
+    The windows are keyed by their bounds, the generation (e.g., the model's
+    version and the artifacts' hashes) and the dataset's fingerprint, and
+    concurrent requests for the same window wait for a single computation.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Cache's instance initializer.
+
+        Args:
+            max_size (int): the maximum number of cached windows.
+        """
+        self.max_size = max_size
+
+        self._windows: "OrderedDict[Tuple, MonitoringWindow]" = OrderedDict()
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(
+        self,
+        bounds: Tuple[int, int],
+        generation: str,
+        fingerprint: str,
+        compute: Callable[[int, int], MonitoringWindow],
+    ) -> MonitoringWindow:
+        """Gets a processed window, computing it only if it isn't cached.
+
+        Args:
+            bounds (Tuple[int, int]): the window's first and last (exclusive) rows.
+            generation (str): the current generation.
+            fingerprint (str): the current dataset's fingerprint.
+            compute (Callable[[int, int], MonitoringWindow]): the function that
+                processes the window, given its bounds.
+
+        Returns:
+            MonitoringWindow: the processed window.
+        """
+        key = (bounds, generation, fingerprint)
+
+        with self._lock:
+            window = self._get_cached(key)
+
+            if window is not None:
+                return window
+
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                window = self._get_cached(key)
+
+                if window is not None:
+                    return window
+
+                self.misses += 1
+
+            try:
+                window = compute(*bounds)
+            except BaseException:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+                raise
+
+            # the window is cached and its lock is removed at once, so a new
+            # request either finds the window or waits on the same lock
+            with self._lock:
+                self._key_locks.pop(key, None)
+                self._windows[key] = window
+
+                while len(self._windows) > self.max_size:
+                    self._windows.popitem(last=False)
+                    self.evictions += 1
+
+        return window
+
+    def clear(self) -> None:
+        """Removes all the cached windows."""
+        with self._lock:
+            self._windows.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the cache's metrics.
+
+        Returns:
+            Dict[str, Any]: the cache's size and counters.
+        """
+        return {
+            "size": len(self._windows),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _get_cached(self, key: Tuple) -> Any:
+        """Gets a cached window, updating the hits counter (must be called
+        while holding the lock).
+
+        Args:
+            key (Tuple): the window's key.
+
+        Returns:
+            Any: the cached window or None if it isn't cached.
+        """
+        window = self._windows.get(key)
+
+        if window is not None:
+            self._windows.move_to_end(key)
+            self.hits += 1
+
+        return window
+
+
+def slice_window(window: MonitoringWindow, start: int, stop: int) -> MonitoringWindow:
+    """Slices a processed window without copying its arrays.
+
+    Args:
+        window (MonitoringWindow): the processed window (e.g., the whole dataset).
+        start (int): the slice's first row.
+        stop (int): the slice's last row (exclusive).
+
+    Returns:
+        MonitoringWindow: the sliced window (whose arrays are views).
+    """
+    return MonitoringWindow(*(array[start:stop] for array in window))
+
+
+def get_window_bounds(size: int, window_size: int) -> Tuple[int, int]:
+    """Gets the bounds of the first `window_size` rows of a dataset (with the
+    same semantics as `pd.DataFrame.head`).
+
+    Args:
+        size (int): the dataset's number of rows.
+        window_size (int): the window's size.
+
+    Returns:
+        Tuple[int, int]: the window's first and last (exclusive) rows.
+    """
+    return 0, len(range(size)[:window_size])
+
+
+def fingerprint_dataframe(dataframe: pd.DataFrame) -> str:
+    """Calculates the fingerprint of a dataframe's content.
+
+    Args:
+        dataframe (pd.DataFrame): the dataframe.
+
+    Returns:
+        str: the dataframe's hash.
+    """
+    return hashlib.sha256(
+        pd.util.hash_pandas_object(dataframe, index=True).values.tobytes()
+        + ",".join(map(str, dataframe.columns)).encode()
+    ).hexdigest()
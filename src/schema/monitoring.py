@@ -1,6 +1,8 @@
 """
 Monitoring's schema.
 """
+from typing import Literal, Optional
+
 from pydantic import BaseModel, field_validator
 
 
@@ -30,6 +32,19 @@ class Monitoring(BaseModel):
     Monitoring schema.
 
     window_size - The window size. Defaults to 300.
+    source - The current data's source: the current dataset's first
+        `window_size` rows ('dataset') or the last `window_size` requests
+        served by the API ('live'). Defaults to 'dataset'.
+    start_time - The live window's first timestamp (Unix time, in seconds).
+        Defaults to None.
+    end_time - The live window's last timestamp (exclusive). Defaults to None.
+    window_type - Whether the live window slides with every request ('sliding')
+        or is made of the last complete buckets of requests ('tumbling', which
+        only changes when a bucket is completed). Defaults to 'sliding'.
     """
 
     window_size: int = 300
+    source: Literal["dataset", "live"] = "dataset"
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
+    window_type: Literal["sliding", "tumbling"] = "sliding"
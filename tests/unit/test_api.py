@@ -1,16 +1,60 @@
 """
 Unit test cases to test the API code.
 """
+import asyncio
 import json
+import threading
+import time
 from pathlib import Path
 from typing import Dict
 
+import httpx
+import pandas as pd
+import pytest
 import requests
+from fastapi.testclient import TestClient
 
+from src.config.api import api_settings
+from src.config.settings import general_settings
+from src.data.streaming import WindowedReader
 from src.config.model import model_settings
 from src.config.reports import report_settings
+from src.model.batching import MicroBatcher
+from src.model.executor import InferenceExecutor
+from src.monitoring.buffer import TrafficBuffer
+from src.monitoring.latency import latency_recorder
 from . import CODE_VERSION
 
+PERSON = {
+    "Age": 24.443011,
+    "Height": 1.699998,
+    "Weight": 81.66995,
+    "Gender": "Male",
+    "family_history_with_overweight": "yes",
+    "CALC": "Sometimes",
+    "MTRANS": "Public_Transportation",
+    "FAVC": "yes",
+    "FCVC": 2,
+    "NCP": 2.983297,
+    "CH2O": 2.763573,
+    "FAF": 0,
+    "TUE": 1,
+    "CAEC": "Sometimes",
+    "SCC": "no",
+}
+
+
+@pytest.fixture(name="client", scope="module")
+def fixture_client() -> TestClient:
+    """
+    An in-process client of the API, used to test its behavior under specific
+    settings (the other cases use the running API).
+    """
+    # imported here, since it loads the model and the datasets
+    from src.api.main import app  # pylint: disable=import-outside-toplevel
+
+    return TestClient(app)
+
 
 def test_version_endpoint() -> None:
     """
@@ -90,6 +134,97 @@ def test_data_drift_report_endpoint() -> None:
     assert "text/html" in response.headers["content-type"]
     assert Path.exists(Path(path))
 
+    # the cached report isn't sent again if the client already has it
+    cached_response = requests.get(
+        f"http://prod:8000/monitor-data?window_size={window_size}",
+        timeout=100,
+        headers={**headers, "If-None-Match": response.headers["etag"]},
+    )
+
+    assert cached_response.status_code == 304
+    assert cached_response.headers["etag"] == response.headers["etag"]
+
+
+def test_drift_metrics_endpoint() -> None:
+    """
+    Unit case to test the API's drift metrics endpoint.
+    """
+    window_size = 300
+
+    response = requests.get(
+        f"http://prod:8000/monitor/metrics?window_size={window_size}", timeout=100
+    )
+    content = json.loads(response.text)
+
+    assert response.status_code == 200
+    assert content["rows"] == window_size
+    assert set(content["features"].keys()) == set(model_settings.FEATURES)
+    assert all(
+        metric in content["features"][model_settings.FEATURES[0]]
+        for metric in ["psi", "ks", "js_distance", "drifted"]
+    )
+    assert all(key in content for key in ["target", "prediction"])
+
+
+def test_live_monitoring_endpoints() -> None:
+    """
+    Unit case to test that the monitoring endpoints use the live traffic.
+    """
+    response = requests.post("http://prod:8000/predict", json=PERSON, timeout=100)
+    assert response.status_code == 200
+
+    response = requests.get(
+        "http://prod:8000/monitor/metrics?source=live&window_size=1", timeout=100
+    )
+    content = json.loads(response.text)
+
+    assert response.status_code == 200
+    assert content["window"]["source"] == "live"
+    assert content["rows"] == 1
+    assert "target" not in content
+
+    response = requests.get(
+        "http://prod:8000/monitor-model?source=live&window_size=1", timeout=100
+    )
+    assert response.status_code == 422
+
+
+def test_report_job_endpoints() -> None:
+    """
+    Unit case to test the API's report jobs endpoints.
+    """
+    window_size = 300
+
+    response = requests.post(
+        f"http://prod:8000/monitor-target?window_size={window_size}", timeout=100
+    )
+    job = json.loads(response.text)
+
+    assert response.status_code == 202
+    assert job["status"] in ["queued", "running", "succeeded"]
+
+    for _ in range(100):
+        job = json.loads(
+            requests.get(
+                f"http://prod:8000/reports/jobs/{job['job_id']}", timeout=100
+            ).text
+        )
+
+        if job["status"] in ["succeeded", "failed"]:
+            break
+
+        time.sleep(1)
+
+    response = requests.get(
+        f"http://prod:8000/reports/jobs/{job['job_id']}/result",
+        timeout=100,
+        headers={"Accept-Encoding": "identity"},
+    )
+
+    assert job["status"] == "succeeded"
+    assert response.status_code == 200
+    assert "text/html" in response.headers["content-type"]
+
 
 def test_data_quality_report_endpoint() -> None:
     """
@@ -144,3 +279,247 @@ def test_inference_endpoint() -> None:
     assert isinstance(content, Dict)
     assert all(dk in content.keys() for dk in desired_keys)
     assert content[desired_keys[0]] == desired_classes
+    assert "model.predict;dur=" in response.headers["Server-Timing"]
+
+    response = requests.post(
+        "http://prod:8000/predict?return_codes=true", json=data, timeout=100
+    )
+    content = json.loads(response.text)
+
+    assert response.status_code == 200
+    assert all(isinstance(code, int) for code in content[desired_keys[0]])
+
+
+def test_batch_inference_endpoint() -> None:
+    """
+    Unit case to test the API's batch inference endpoint.
+    """
+    desired_classes = ["Overweight_Level_II", None, "Overweight_Level_II"]
+    desired_keys = ["predictions", "errors"]
+
+    data = {
+        "Age": 24.443011,
+        "Height": 1.699998,
+        "Weight": 81.66995,
+        "Gender": "Male",
+        "family_history_with_overweight": "yes",
+        "CALC": "Sometimes",
+        "MTRANS": "Public_Transportation",
+        "FAVC": "yes",
+        "FCVC": 2,
+        "NCP": 2.983297,
+        "CH2O": 2.763573,
+        "FAF": 0,
+        "TUE": 1,
+        "CAEC": "Sometimes",
+        "SCC": "no",
+    }
+    invalid_data = {**data, "Age": -1}
+
+    response = requests.post(
+        "http://prod:8000/predict/batch",
+        json=[data, invalid_data, data],
+        timeout=100,
+    )
+    content = json.loads(response.text)
+
+    assert response.status_code == 200
+    assert isinstance(content, Dict)
+    assert all(dk in content.keys() for dk in desired_keys)
+    assert content[desired_keys[0]] == desired_classes
+    assert [error["index"] for error in content[desired_keys[1]]] == [1]
+
+    response = requests.post(
+        "http://prod:8000/predict/batch",
+        data="\n".join(json.dumps(d) for d in [data, invalid_data, data]),
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=100,
+    )
+    content = json.loads(response.text)
+
+    assert response.status_code == 200
+    assert content[desired_keys[0]] == desired_classes
+
+
+def test_stats_endpoint() -> None:
+    """
+    Unit case to test the API's statistics endpoint.
+    """
+    desired_keys = ["artifacts", "micro_batching"]
+
+    response = requests.get("http://prod:8000/stats", timeout=100)
+    content = json.loads(response.text)
+
+    assert response.status_code == 200
+    assert isinstance(content, Dict)
+    assert all(dk in content.keys() for dk in desired_keys)
+
+
+def test_metrics_endpoint() -> None:
+    """
+    Unit case to test the API's Prometheus metrics endpoint.
+    """
+    response = requests.get("http://prod:8000/metrics", timeout=100)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE api_stage_duration_seconds histogram" in response.text
+
+
+def test_inference_executor_saturation(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Unit case to test that the inference endpoint returns a 503 response (with
+    the 'Retry-After' header) when the inference executor is saturated.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=0)
+    monkeypatch.setattr("src.api.main.inference_executor", executor)
+    monkeypatch.setattr(api_settings, "PREDICTION_CACHE_ENABLED", False)
+    monkeypatch.setattr(api_settings, "MICRO_BATCHING_ENABLED", False)
+
+    # the executor's only worker is kept busy
+    release = threading.Event()
+    busy = threading.Thread(
+        target=asyncio.run, args=(executor.run(release.wait, 30),), daemon=True
+    )
+    busy.start()
+
+    while executor.stats()["pending"] == 0:
+        time.sleep(0.01)
+
+    try:
+        response = client.post("/predict", json=PERSON)
+    finally:
+        release.set()
+        busy.join(timeout=30)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(
+        api_settings.INFERENCE_RETRY_AFTER_SECONDS
+    )
+    assert executor.stats()["rejected"] == 1
+
+    response = client.post("/predict", json=PERSON)
+
+    assert response.status_code == 200
+
+
+def test_live_window_fingerprint(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Unit case to test that the live traffic windows of different traffic
+    buffers (e.g., after a restart or in another worker) don't share the
+    reports cache's keys, even if their sequence numbers are the same.
+    """
+    # imported here, since it loads the model and the datasets
+    from src.api.main import (  # pylint: disable=import-outside-toplevel
+        _window_fingerprint,
+    )
+
+    window = ("live", (0, 10))
+    fingerprint = _window_fingerprint(window)
+
+    assert _window_fingerprint(window) == fingerprint
+    assert _window_fingerprint(("dataset", (0, 10))) != fingerprint
+
+    monkeypatch.setattr(
+        "src.api.main.traffic_buffer",
+        TrafficBuffer(
+            capacity=10, numerical_columns=["Age"], categorical_columns=["Gender"]
+        ),
+    )
+
+    assert _window_fingerprint(window) != fingerprint
+
+
+def test_micro_batching_server_timing(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Unit case to test that, with micro-batching enabled, each request's
+    'Server-Timing' header has the stages of its own batch.
+    """
+    # imported here, since it loads the model and the datasets
+    from src.api.main import (  # pylint: disable=import-outside-toplevel
+        inference_executor,
+        loaded_model,
+    )
+
+    monkeypatch.setattr(api_settings, "MICRO_BATCHING_ENABLED", True)
+    monkeypatch.setattr(api_settings, "PREDICTION_CACHE_ENABLED", False)
+    monkeypatch.setattr(latency_recorder, "enabled", True)
+    monkeypatch.setattr(
+        "src.api.main.micro_batcher",
+        MicroBatcher(
+            model=loaded_model,
+            executor=inference_executor,
+            max_batch_size=4,
+            max_wait_time=0.001,
+        ),
+    )
+
+    # the requests are sent in the same event loop, where the scheduler's task
+    # keeps running between them
+    async def _send() -> list:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=client.app), base_url="http://test"
+        ) as async_client:
+            return [await async_client.post("/predict", json=PERSON) for _ in range(3)]
+
+    for response in asyncio.run(_send()):
+        assert response.status_code == 200
+        assert "model.predict;dur=" in response.headers["Server-Timing"]
+        assert "processing.artifacts;dur=" in response.headers["Server-Timing"]
+
+
+def test_streamed_dataset_changes(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """
+    Unit case to test that the monitoring endpoints see the rows appended to
+    the streamed current dataset, and a rewritten file, without a restart.
+    """
+    # imported here, since it loads the model and the datasets
+    from src.api import numerical_columns  # pylint: disable=import-outside-toplevel
+
+    rows = pd.read_csv(
+        Path.joinpath(general_settings.DATA_PATH, general_settings.CURRENT_FILE_NAME)
+    )
+    path = tmp_path / "current.csv"
+    rows.iloc[:100].to_csv(path, index=False)
+
+    def _stream(csv_path: Path) -> None:
+        monkeypatch.setattr(
+            "src.api.main.current_dataset",
+            WindowedReader(
+                path=csv_path,
+                dtype={column: "float64" for column in numerical_columns},
+                index_stride=16,
+            ),
+        )
+
+    def _metrics() -> Dict:
+        response = client.get("/monitor/metrics?window_size=1000000")
+        assert response.status_code == 200
+        return response.json()
+
+    monkeypatch.setattr(api_settings, "MONITORING_STREAM_CURRENT_DATA", True)
+    _stream(path)
+    assert _metrics()["window"]["stop"] == 100
+
+    # appending rows (as the daily-growing file does)
+    rows.iloc[100:150].to_csv(path, index=False, header=False, mode="a")
+    appended_metrics = _metrics()
+    assert appended_metrics["window"]["stop"] == 150
+
+    # rewriting the file in place, with other rows
+    rows.iloc[150:300].to_csv(path, index=False)
+    rewritten_metrics = _metrics()
+
+    # the metrics are the same as the ones of a new reader of the same rows
+    expected_path = tmp_path / "expected.csv"
+    rows.iloc[150:300].to_csv(expected_path, index=False)
+    _stream(expected_path)
+
+    assert rewritten_metrics == _metrics()
+    assert rewritten_metrics != appended_metrics
@@ -6,13 +6,18 @@ import pathlib
 import re
 
 # import boto3
+import joblib
 import pandas as pd
 import pandas.api.types as ptypes
 import numpy as np
+import pytest
 
 # from src.config.aws import aws_credentials
 from src.config.settings import general_settings
 from src.data.processing import (
+    _data_processing_steps,
+    data_processing_inference,
+    data_processing_record,
     _categorize_numerical_columns,
     _change_height_units,
     _create_bmi_feature,
@@ -25,7 +30,9 @@ from src.data.processing import (
     _scale_numerical_columns,
     _transform_numerical_columns,
 )
-from src.data.utils import download_dataset, load_feature
+from src.data.columnar import load_columnar_dataset
+from src.data.streaming import WindowedReader, iter_dataset_chunks
+from src.data.utils import ArtifactRegistry, download_dataset, load_feature
 from .. import dataset
 
 
@@ -108,6 +115,55 @@ def test_create_ibw_feature():
     assert isinstance(_dataset["IBW"].dtype, type(np.dtype("float64")))
 
 
+def _calculate_bsa_rowwise(dataframe: pd.DataFrame) -> pd.Series:
+    """
+    Row-wise reference implementation of the BSA feature (Schlich's formula).
+    """
+
+    def _calculate_bsa(gender: str, height: float, weight: float) -> float:
+        if gender == "Female":
+            return 0.000975482 * (weight**0.46) * (height**1.08)
+
+        return 0.000579479 * (weight**0.38) * (height**1.24)
+
+    return dataframe.apply(
+        lambda x: _calculate_bsa(x["Gender"], x["Height"], x["Weight"]), axis=1
+    )
+
+
+def _calculate_ibw_rowwise(dataframe: pd.DataFrame) -> pd.Series:
+    """
+    Row-wise reference implementation of the IBW feature (B. J. Devine's formula).
+    """
+
+    def _calculate_ibw(gender: str, height: float) -> float:
+        if gender == "Female":
+            return 45.5 + 0.9 * (height - 152)
+
+        return 50 + 0.9 * (height - 152)
+
+    return dataframe.apply(lambda x: _calculate_ibw(x["Gender"], x["Height"]), axis=1)
+
+
+@pytest.mark.parametrize("n_rows", [1, 1_000, 100_000])
+def test_vectorized_bsa_ibw_parity(n_rows: int):
+    """
+    Unit case to test that the vectorized BSA and IBW features match the
+    row-wise formulas (their timings are measured by `benchmarks.preprocessing`).
+    """
+    _dataset = dataset.sample(n=n_rows, replace=True, random_state=42)
+    _dataset = _change_height_units(_dataset.reset_index(drop=True))
+
+    expected_bsa = _calculate_bsa_rowwise(_dataset)
+    expected_ibw = _calculate_ibw_rowwise(_dataset)
+
+    _dataset = _create_bsa_feature(dataframe=_dataset)
+    _dataset = _create_ibw_feature(dataframe=_dataset)
+
+    np.testing.assert_allclose(_dataset["BSA"].values, expected_bsa.values, rtol=1e-12)
+    np.testing.assert_allclose(_dataset["IBW"].values, expected_ibw.values, rtol=1e-12)
+
+
 def test_create_pal_feature():
     """
     Unit case to test the function that creates the Physical Activity Level (PAL) feature.
@@ -240,6 +296,174 @@ def test_encode_categorical_columns():
         assert _dataset.shape[1] != _dataset2.shape[1]
 
 
+def test_data_processing_feature_plan():
+    """
+    Unit case to test that the feature plan matches the step by step data
+    processing pipeline, without modifying the given dataframe.
+    """
+    _dataset = dataset.drop(columns=["id", general_settings.TARGET_COLUMN])
+    original = _dataset.copy()
+
+    expected = _data_processing_steps(dataframe=_dataset.copy())
+    features = data_processing_inference(dataframe=_dataset)
+
+    assert features.shape == expected.shape
+    assert _dataset.equals(original)
+    np.testing.assert_allclose(features, expected.astype(np.float64), rtol=1e-12)
+
+
+def test_data_processing_record():
+    """
+    Unit case to test that the single record (pandas-free) data processing
+    matches the dataframe-based data processing pipeline.
+    """
+    _dataset = dataset.drop(columns=["id", general_settings.TARGET_COLUMN])
+    _dataset = _dataset.sample(n=500, random_state=42).reset_index(drop=True)
+    records = _dataset.to_dict(orient="records")
+
+    expected = _data_processing_steps(dataframe=_dataset.copy())
+    features = np.concatenate([data_processing_record(record) for record in records])
+
+    assert features.shape == expected.shape
+    np.testing.assert_allclose(features, expected.astype(np.float64), rtol=1e-9)
+
+
+def test_artifact_registry(tmp_path: pathlib.Path):
+    """
+    Unit case to test the registry that keeps the loaded artifacts in memory.
+    """
+    registry = ArtifactRegistry()
+    joblib.dump(np.array([1, 2, 3]), tmp_path / "bins.pkl")
+
+    first = registry.load(path=tmp_path, feature_name="bins")
+    second = registry.load(path=tmp_path, feature_name="bins")
+
+    assert first is second
+    assert registry.stats()["misses"] == 1
+    assert registry.stats()["hits"] == 1
+
+    # touching the file without changing its content must not reload it
+    stat = os.stat(tmp_path / "bins.pkl")
+    os.utime(tmp_path / "bins.pkl", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert registry.load(path=tmp_path, feature_name="bins") is first
+    assert registry.stats()["reloads"] == 0
+
+    joblib.dump(np.array([4, 5, 6, 7]), tmp_path / "bins.pkl")
+    os.utime(
+        tmp_path / "bins.pkl", ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9)
+    )
+    third = registry.load(path=tmp_path, feature_name="bins")
+
+    assert third.tolist() == [4, 5, 6, 7]
+    assert registry.stats()["reloads"] == 1
+    assert registry.fingerprint(path=tmp_path, feature_name="bins") != ""
+
+
+def test_columnar_dataset(tmp_path: pathlib.Path):
+    """
+    Unit case to test the columnar cache that replaces parsing the CSV datasets.
+    """
+    csv_path = tmp_path / "dataset.csv"
+    cache_path = tmp_path / "columnar"
+    dataset.head(100).to_csv(csv_path, index=False)
+    expected = pd.read_csv(csv_path)
+
+    built = load_columnar_dataset(path=csv_path, cache_path=cache_path)
+    cached = load_columnar_dataset(path=csv_path, cache_path=cache_path)
+    categorical = load_columnar_dataset(
+        path=csv_path, cache_path=cache_path, categorical=True
+    )
+
+    pd.testing.assert_frame_equal(built, expected)
+    pd.testing.assert_frame_equal(cached, expected)
+    assert isinstance(categorical["Gender"].dtype, pd.CategoricalDtype)
+    assert categorical["Gender"].astype(object).tolist() == expected["Gender"].tolist()
+
+    # touching the file without changing its content must not rebuild it
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    files = sorted(p.name for p in (cache_path / "dataset").glob("*.npy"))
+
+    pd.testing.assert_frame_equal(
+        load_columnar_dataset(path=csv_path, cache_path=cache_path), expected
+    )
+    assert sorted(p.name for p in (cache_path / "dataset").glob("*.npy")) == files
+
+    dataset.head(50).to_csv(csv_path, index=False)
+    changed = load_columnar_dataset(path=csv_path, cache_path=cache_path)
+
+    assert changed.shape[0] == 50
+    assert set(p.name for p in (cache_path / "dataset").glob("*.npy")).isdisjoint(files)
+
+
+def test_streaming_readers(tmp_path: pathlib.Path):
+    """
+    Unit case to test the chunked and the windowed dataset readers.
+    """
+    csv_path = tmp_path / "dataset.csv"
+    dataset.head(250).to_csv(csv_path, index=False)
+    expected = pd.read_csv(csv_path)
+
+    chunks = list(
+        iter_dataset_chunks(path=csv_path, chunk_size=100, usecols=["Age", "Gender"])
+    )
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks), expected[["Gender", "Age"]], check_like=True
+    )
+
+    reader = WindowedReader(
+        path=csv_path,
+        dtype={"Age": "float64", "Height": "float64"},
+        index_stride=32,
+    )
+
+    assert len(reader) == 250
+    assert reader.stats()["index_bytes"] == 8 * 8
+
+    for start, stop in [(0, 10), (31, 33), (100, 250), (240, 300)]:
+        pd.testing.assert_frame_equal(
+            reader.read(start, stop),
+            expected.iloc[start:stop].astype({"Age": "float64"}),
+            check_index_type=False,
+        )
+
+    assert reader.read(5, 5).empty
+
+    # the rows appended to the file are indexed on refresh
+    dataset.iloc[250:260].to_csv(csv_path, mode="a", header=False, index=False)
+
+    assert reader.refresh()
+    assert len(reader) == 260
+    assert not reader.refresh()
+
+
+def test_encode_categorical_columns_parity():
+    """
+    Unit case to test that the index-based encoding matches the fitted
+    encoders, including the unknown categories.
+    """
+    _dataset = dataset.drop(columns=["id", general_settings.TARGET_COLUMN])
+    _dataset = _dataset.head(1_000).copy()
+    _dataset.loc[:9, "MTRANS"] = "Unknown_Transportation"
+    categorical_columns = _dataset.select_dtypes(include="object").columns.tolist()
+
+    encoders = load_feature(
+        path=general_settings.ARTIFACTS_PATH, feature_name="features_ohe"
+    )
+    _dataset2 = _encode_categorical_columns(dataframe=_dataset, encoders=encoders)
+
+    for column in categorical_columns:
+        expected = encoders[column].transform(_dataset[column].values.reshape(-1, 1))
+        names = [f"{column}_{n}" for n in encoders[column].get_feature_names_out()]
+
+        np.testing.assert_array_equal(_dataset2[names].values, expected)
+
+    assert _dataset2.loc[:9, [c for c in _dataset2 if "MTRANS_" in c]].sum().sum() == 0
+
+
 def test_load_dataset():
     """
     Unit case to test the function that loads the original, raw dataset.
@@ -1,16 +1,28 @@
 """
 Unit test cases to test the model functions code.
 """
-# import numpy as np
+import asyncio
+import pathlib
+import threading
+import time
+
+import numpy as np
 import pandas as pd
+import pytest
 
 # from sklearn.metrics import f1_score
 from lightgbm import LGBMClassifier
 
 from src.config.model import model_settings
-from src.data.processing import data_processing_inference
+from src.config.settings import general_settings
+from src.data.processing import data_processing_inference, data_processing_record
+from src.data.utils import load_feature
+from src.model.batch_score import _describe_run, _prepare_parts, batch_score
+from src.model.batching import MicroBatcher
+from src.model.cache import PredictionCache
+from src.model.executor import ExecutorSaturatedError, InferenceExecutor
 from src.model.inference import ModelServe
-from .. import loaded_model
+from .. import dataset, loaded_model
 
 
 def test_load_model() -> None:
@@ -54,3 +66,225 @@ def test_prediction() -> None:
 
     assert isinstance(prediction, str)
     assert prediction == correct_prediction
+
+
+def test_prediction_decoding() -> None:
+    """
+    Unit case to test decoding the predicted class indexes into their labels.
+    """
+    _dataset = dataset.drop(columns=["id", general_settings.TARGET_COLUMN])
+    features = data_processing_inference(_dataset.head(1_000))
+
+    codes = loaded_model.predict(features, transform_to_str=False)
+    labels = loaded_model.predict(features, transform_to_str=True)
+
+    label_encoder = load_feature(
+        path=general_settings.ARTIFACTS_PATH, feature_name="label_ohe"
+    )
+    one_hot = np.zeros((codes.size, len(label_encoder.classes_)))
+    one_hot[np.arange(codes.size), codes] = 1
+
+    assert labels.tolist() == loaded_model.decode(codes).tolist()
+    assert labels.tolist() == label_encoder.inverse_transform(one_hot).tolist()
+
+
+def test_prediction_cache() -> None:
+    """
+    Unit case to test the prediction cache's hits, evictions and invalidations.
+    """
+    cache = PredictionCache(max_size=2, ttl=60)
+    records = [{"Age": float(age), "Gender": "Male"} for age in range(3)]
+
+    assert cache.get(records[0], "v1") is None
+
+    cache.put(records[0], "v1", 0)
+    cache.put(records[1], "v1", 1)
+    assert cache.get(dict(reversed(list(records[0].items()))), "v1") == 0
+
+    # the least recently used record is evicted
+    cache.put(records[2], "v1", 2)
+    assert cache.get(records[1], "v1") is None
+    assert cache.get(records[2], "v1") == 2
+
+    # a new generation (e.g., a new model version) clears the cache
+    assert cache.get(records[0], "v2") is None
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["invalidations"] == 1
+
+
+class _StubModel:  # pylint: disable=too-few-public-methods
+    """
+    A stand-in for the model, which "predicts" the sum of each row's features
+    and keeps the size of each predicted batch.
+    """
+
+    def __init__(self) -> None:
+        self.batch_sizes = []
+
+    def predict(self, features: np.ndarray, **_) -> np.ndarray:
+        """
+        Returns the sum of each row's features.
+        """
+        self.batch_sizes.append(len(features))
+        return features.sum(axis=1)
+
+
+def test_micro_batcher() -> None:
+    """
+    Unit case to test the micro-batching scheduler's flushes (when the batch is
+    full and when the maximum wait time is reached) and its metrics.
+    """
+    records = (
+        dataset.drop(columns=["id", general_settings.TARGET_COLUMN])
+        .head(5)
+        .to_dict("records")
+    )
+    expected = [data_processing_record(record).sum() for record in records]
+
+    async def _predict(batcher: MicroBatcher, records: list) -> tuple:
+        start = time.perf_counter()
+        predictions = await asyncio.gather(
+            *(batcher.predict(record) for record in records)
+        )
+        return predictions, time.perf_counter() - start
+
+    # the batch is flushed as soon as it's full (not after the maximum wait time)
+    model = _StubModel()
+    batcher = MicroBatcher(
+        model=model,
+        executor=InferenceExecutor(max_workers=1, max_queue_size=4),
+        max_batch_size=4,
+        max_wait_time=30,
+    )
+    predictions, elapsed = asyncio.run(_predict(batcher, records[:4]))
+
+    assert elapsed < 30
+    assert model.batch_sizes == [4]
+    np.testing.assert_allclose(predictions, expected[:4])
+
+    stats = batcher.stats()
+    assert stats["requests"] == 4
+    assert stats["batches"] == 1
+    assert stats["batch_sizes"] == {4: 1}
+    assert stats["wait_time_seconds"]["max"] < 30
+
+    # a single request is flushed after the maximum wait time
+    model = _StubModel()
+    batcher = MicroBatcher(
+        model=model,
+        executor=InferenceExecutor(max_workers=1, max_queue_size=4),
+        max_batch_size=4,
+        max_wait_time=0.05,
+    )
+    predictions, elapsed = asyncio.run(_predict(batcher, records[4:]))
+
+    assert elapsed >= 0.045
+    assert model.batch_sizes == [1]
+    np.testing.assert_allclose(predictions, expected[4:])
+
+    stats = batcher.stats()
+    assert stats["batch_sizes"] == {1: 1}
+    assert stats["wait_time_seconds"]["max"] >= 0.045
+    assert stats["wait_time_seconds"]["buckets"]["0.025"] == 0
+    assert stats["wait_time_seconds"]["buckets"]["+Inf"] == 1
+
+
+def test_inference_executor() -> None:
+    """
+    Unit case to test the inference executor's bound, which keeps counting a
+    task while its thread runs, even if the awaiting request was cancelled.
+    """
+    executor = InferenceExecutor(max_workers=1, max_queue_size=0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def _block() -> str:
+        started.set()
+        release.wait(timeout=30)
+        return "done"
+
+    async def _run() -> None:
+        task = asyncio.ensure_future(executor.run(_block))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 30)
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(_block)
+
+        # cancelling the request doesn't free the busy worker
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert executor.stats()["pending"] == 1
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(_block)
+
+        release.set()
+
+        while executor.stats()["pending"]:
+            await asyncio.sleep(0.01)
+
+        assert await executor.run(_block) == "done"
+
+    asyncio.run(_run())
+
+    stats = executor.stats()
+    assert stats["pending"] == 0
+    assert stats["completed"] == 2
+    assert stats["rejected"] == 2
+
+
+def test_batch_score(tmp_path: pathlib.Path) -> None:
+    """
+    Unit case to test the offline batch scoring, including resuming an
+    interrupted run and counting rows with quoted line breaks.
+    """
+    input_path = tmp_path / "current.csv"
+    output_path = tmp_path / "predictions.csv"
+    _dataset = dataset.drop(columns=["id"]).head(250)
+    _dataset["notes"] = "first line\nsecond line"
+    _dataset.to_csv(input_path, index=False)
+
+    expected = loaded_model.predict(
+        data_processing_inference(
+            _dataset.drop(columns=[general_settings.TARGET_COLUMN, "notes"])
+        )
+    )
+
+    # simulating an interrupted run, whose second chunk was already scored
+    completed = _prepare_parts(
+        tmp_path / "parts", _describe_run(input_path, chunk_size=100)
+    )
+    part = _dataset.iloc[100:200].assign(prediction="already_scored")
+    part.to_csv(tmp_path / "parts" / "part_000001.csv", index=False)
+
+    rows = batch_score(
+        input_path=input_path,
+        output_path=output_path,
+        chunk_size=100,
+        workers=2,
+        parts_path=tmp_path / "parts",
+    )
+    predictions = pd.read_csv(output_path)
+
+    assert rows == 250
+    assert completed == set()
+    assert not (tmp_path / "parts").exists()
+    assert predictions.shape[0] == 250
+    assert (predictions["notes"] == "first line\nsecond line").all()
+    assert (predictions["prediction"].iloc[100:200] == "already_scored").all()
+    assert predictions["prediction"].iloc[:100].tolist() == expected[:100].tolist()
+    assert predictions["prediction"].iloc[200:].tolist() == expected[200:].tolist()
+
+    # a dataset without rows is rejected before anything is written
+    input_path.write_text(",".join(_dataset.columns) + "\n", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        batch_score(
+            input_path=input_path,
+            output_path=tmp_path / "empty.csv",
+            parts_path=tmp_path / "parts",
+        )
+
+    assert not (tmp_path / "empty.csv").exists()
+    assert not (tmp_path / "parts").exists()
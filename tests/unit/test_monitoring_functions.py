@@ -0,0 +1,506 @@
+"""
+Unit test cases to test the monitoring functions code.
+"""
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.monitoring.buffer import TrafficBuffer
+from src.monitoring.drift import (
+    calculate_drift_metrics,
+    calculate_sketch_drift_metrics,
+    jensen_shannon_distance,
+    population_stability_index,
+)
+from src.monitoring.jobs import ReportJobManager
+from src.monitoring.latency import LatencyRecorder
+from src.monitoring.profile import ReferenceProfile, load_reference_profile
+from src.monitoring.reports import ReportCache, etag_matches
+from src.monitoring.sketch import DriftSketch, SketchWindows
+from src.monitoring.window import (
+    MonitoringWindow,
+    WindowCache,
+    fingerprint_dataframe,
+    get_window_bounds,
+    slice_window,
+)
+
+
+def test_window_cache() -> None:
+    """
+    Unit case to test that a processed window is computed only once per key.
+    """
+    calls = []
+
+    def _compute(start: int, stop: int) -> MonitoringWindow:
+        calls.append((start, stop))
+        return MonitoringWindow(
+            features=np.zeros((stop - start, 2)),
+            target=np.zeros(stop - start),
+            predictions=np.zeros(stop - start, dtype=int),
+        )
+
+    cache = WindowCache(max_size=1)
+    windows = [
+        cache.get((0, 10), "v1", "fingerprint", _compute),
+        cache.get((0, 10), "v1", "fingerprint", _compute),
+    ]
+
+    assert windows[0] is windows[1]
+    assert calls == [(0, 10)]
+
+    # a new generation is a new key (and the old one is evicted)
+    cache.get((0, 10), "v2", "fingerprint", _compute)
+    assert calls == [(0, 10), (0, 10)]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_window_cache_concurrency() -> None:
+    """
+    Unit case to test that concurrent requests for the same window wait for a
+    single computation, and that a failed computation can be retried.
+    """
+    calls = []
+
+    def _compute(start: int, stop: int) -> MonitoringWindow:
+        calls.append((start, stop))
+        time.sleep(0.05)
+
+        if len(calls) == 1:
+            raise ValueError("The window couldn't be processed.")
+
+        return MonitoringWindow(
+            features=np.zeros((stop - start, 2)),
+            target=np.zeros(stop - start),
+            predictions=np.zeros(stop - start, dtype=int),
+        )
+
+    cache = WindowCache(max_size=2)
+
+    try:
+        cache.get((0, 10), "v1", "fingerprint", _compute)
+    except ValueError:
+        pass
+
+    windows = []
+    threads = [
+        threading.Thread(
+            target=lambda: windows.append(
+                cache.get((0, 10), "v1", "fingerprint", _compute)
+            )
+        )
+        for _ in range(8)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 2
+    assert len(windows) == 8
+    assert all(window is windows[0] for window in windows)
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["hits"] == 7
+    assert not cache._key_locks  # pylint: disable=protected-access
+
+
+def test_window_bounds_and_fingerprint() -> None:
+    """
+    Unit case to test the window bounds (same as `pd.DataFrame.head`) and the
+    dataframe's fingerprint.
+    """
+    dataframe = pd.DataFrame({"a": range(10), "b": list("abcdefghij")})
+
+    for window_size in [1, 5, 10, 300, -3]:
+        start, stop = get_window_bounds(len(dataframe), window_size)
+        assert dataframe.iloc[start:stop].equals(dataframe.head(window_size))
+
+    assert fingerprint_dataframe(dataframe) == fingerprint_dataframe(dataframe.copy())
+    assert fingerprint_dataframe(dataframe) != fingerprint_dataframe(
+        dataframe.assign(a=dataframe["a"] + 1)
+    )
+
+
+def test_slice_window() -> None:
+    """
+    Unit case to test that slicing a processed window doesn't copy its arrays.
+    """
+    window = MonitoringWindow(
+        features=np.arange(20, dtype=float).reshape(10, 2),
+        target=np.arange(10),
+        predictions=np.arange(10),
+    )
+    sliced = slice_window(window, *get_window_bounds(10, 4))
+
+    for array, sliced_array in zip(window, sliced):
+        assert len(sliced_array) == 4
+        assert np.shares_memory(array, sliced_array)
+        assert np.array_equal(array[:4], sliced_array)
+
+
+def test_report_cache(tmp_path: Path) -> None:
+    """
+    Unit case to test the reports cache's store, ETags and size budget.
+    """
+    report_path = Path.joinpath(tmp_path, "report.html")
+    cache = ReportCache(path=Path.joinpath(tmp_path, "cache"), max_bytes=10, min_age=0)
+
+    report_path.write_text("<html>1</html>", encoding="utf-8")
+    report = cache.put(("data_drift", (0, 300), "v1"), report_path)
+
+    # the report is moved into the content-addressed store
+    assert not report_path.exists()
+    assert report.path.name == report.etag.strip('"') + ".html"
+
+    assert cache.get(("data_drift", (0, 300), "v1")) == report
+    assert cache.get(("data_drift", (0, 300), "v2")) is None
+    assert etag_matches(report.etag, report.etag)
+    assert etag_matches(f'W/{report.etag}, "other"', report.etag)
+    assert not etag_matches('"other"', report.etag)
+
+    # the least recently used report is removed when the budget is exceeded
+    report_path.write_text("<html>2</html>", encoding="utf-8")
+    other_report = cache.put(("data_drift", (0, 500), "v1"), report_path)
+
+    assert other_report.etag != report.etag
+    assert cache.get(("data_drift", (0, 300), "v1")) is None
+    assert not report.path.exists()
+    assert cache.stats()["evictions"] == 1
+
+    # the stored reports are kept after a restart
+    assert (
+        ReportCache(
+            path=Path.joinpath(tmp_path, "cache"), max_bytes=100, min_age=0
+        ).get(("data_drift", (0, 500), "v1"))
+        == other_report
+    )
+
+
+def test_report_jobs() -> None:
+    """
+    Unit case to test that identical in-flight report jobs are coalesced.
+    """
+    manager = ReportJobManager(max_workers=1, max_queue_size=1, max_finished_jobs=1)
+    release = threading.Event()
+
+    jobs = [manager.submit(("data_drift", (0, 300)), release.wait) for _ in range(2)]
+    other_job = manager.submit(("data_drift", (0, 500)), lambda: "other")
+
+    assert jobs[0] is jobs[1]
+    assert jobs[0].status in ["queued", "running"]
+    assert other_job.status == "queued"
+
+    release.set()
+
+    assert jobs[0].future.result(timeout=10) is True
+    assert other_job.future.result(timeout=10) == "other"
+    assert manager.stats()["coalesced"] == 1
+
+    # only the most recent finished job is kept
+    assert manager.get(jobs[0].id) is None
+    assert manager.get(other_job.id).to_dict()["status"] == "succeeded"
+
+
+def test_report_job_waiters() -> None:
+    """
+    Unit case to test that cancelling one of the requests waiting for a
+    coalesced report job doesn't cancel the job for the other requests.
+    """
+    manager = ReportJobManager(max_workers=1, max_queue_size=1, max_finished_jobs=1)
+    release = threading.Event()
+    job = manager.submit(("data_drift", (0, 300)), release.wait)
+
+    async def _wait() -> List:
+        waiters = [asyncio.create_task(job.wait()) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        waiters[0].cancel()
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*waiters, return_exceptions=True)
+
+    results = asyncio.run(_wait())
+
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1] is True
+    assert job.to_dict()["status"] == "succeeded"
+    assert job.to_dict()["finished_at"] is not None
+    assert manager.stats()["in_flight"] == 0
+
+
+def test_report_cache_publish(tmp_path: Path) -> None:
+    """
+    Unit case to test publishing a cached report to a fixed path.
+    """
+    cache = ReportCache(path=Path.joinpath(tmp_path, "cache"), max_bytes=100, min_age=0)
+    latest_path = Path.joinpath(tmp_path, "data_drift.html")
+
+    for content in ["<html>1</html>", "<html>2</html>"]:
+        report_path = cache.temporary_path()
+        report_path.write_text(content, encoding="utf-8")
+        cache.publish(cache.put(("data_drift", content), report_path), latest_path)
+
+        assert latest_path.read_text(encoding="utf-8") == content
+
+    # no temporary files are left behind
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "cache",
+        "data_drift.html",
+    ]
+    assert not list(Path.joinpath(tmp_path, "cache", "tmp").iterdir())
+
+
+def test_drift_metrics() -> None:
+    """
+    Unit case to test the drift metrics against a reference.
+    """
+    rng = np.random.default_rng(42)
+    labels = np.array(["a", "b", "c"])
+    reference_features = np.c_[rng.normal(size=20_000), rng.integers(0, 2, 20_000)]
+    reference = ReferenceProfile.build(
+        dataframe=pd.DataFrame(
+            {
+                "numerical": reference_features[:, 0],
+                "binary": reference_features[:, 1],
+                "target": rng.choice(labels, 20_000),
+                "prediction": rng.choice(labels, 20_000),
+            }
+        ),
+        features=["numerical", "binary"],
+        target_column="target",
+        prediction_column="prediction",
+        labels=labels,
+    )
+
+    same = calculate_drift_metrics(
+        profile=reference,
+        features=reference_features[:5_000],
+        target=rng.choice(labels, 5_000),
+        predictions=rng.choice(labels, 5_000),
+    )
+    shifted_features = np.c_[rng.normal(1, size=500), np.ones(500)]
+    shifted_features[0, 0] = np.nan
+    shifted = calculate_drift_metrics(
+        profile=reference,
+        features=shifted_features,
+        target=None,
+        predictions=np.full(500, "a"),
+    )
+
+    assert same["share_of_drifted_features"] == 0.0
+    assert shifted["share_of_drifted_features"] == 1.0
+    assert "target" not in shifted
+    assert shifted["prediction"]["current"] == {"a": 1.0, "b": 0.0, "c": 0.0}
+    assert shifted["features"]["numerical"]["missing_share"] == 1 / 500
+    assert shifted["features"]["binary"]["out_of_range_share"] == 0.0
+
+    for index, name in enumerate(["numerical", "binary"]):
+        assert same["features"][name]["psi"] < 0.01
+        assert shifted["features"][name]["js_distance"] > 0.3
+        assert np.isclose(
+            shifted["features"][name]["ks"],
+            stats.ks_2samp(
+                reference_features[:, index], shifted_features[1:, index]
+            ).statistic,
+            atol=1e-2,
+        )
+
+    # identical distributions have no drift, disjoint ones have the largest distance
+    distributions = np.array([[0.5, 0.5, 0.0], [0.0, 0.0, 1.0]])
+    assert np.allclose(population_stability_index(distributions, distributions), 0)
+    assert np.allclose(jensen_shannon_distance(*distributions), 1)
+
+
+def test_reference_profile(tmp_path: Path) -> None:
+    """
+    Unit case to test saving the reference profile and loading it again.
+    """
+    rng = np.random.default_rng(42)
+    labels = np.array(["a", "b"])
+    dataframe = pd.DataFrame(
+        {
+            "numerical": rng.normal(size=1_000),
+            "binary": rng.integers(0, 2, 1_000).astype(float),
+            "target": rng.choice(labels, 1_000),
+            "prediction": rng.choice(labels, 1_000),
+        }
+    )
+    dataframe.loc[0, "numerical"] = np.nan
+    path = Path.joinpath(tmp_path, "profiles", "reference_profile.pkl")
+    arguments = {
+        "features": ["numerical", "binary"],
+        "target_column": "target",
+        "prediction_column": "prediction",
+        "labels": labels,
+        "n_bins": 10,
+        "path": path,
+    }
+
+    profile = load_reference_profile(dataframe=dataframe, **arguments)
+    loaded_profile = load_reference_profile(dataframe=dataframe, **arguments)
+
+    assert path.exists()
+    assert loaded_profile is not profile
+    assert np.array_equal(loaded_profile.histograms, profile.histograms)
+    assert profile.missing_counts["numerical"] == 1
+    assert profile.histograms.shape == (2, 10)
+    assert set(profile.category_frequencies.keys()) == {"binary"}
+    assert np.isclose(profile.target_distribution.sum(), 1)
+
+    # the profile is calculated again when the reference data changes
+    changed_profile = load_reference_profile(
+        dataframe=dataframe.assign(numerical=dataframe["numerical"] + 1), **arguments
+    )
+    assert changed_profile.fingerprint != profile.fingerprint
+
+
+def test_traffic_buffer(tmp_path: Path) -> None:
+    """
+    Unit case to test that the traffic buffer keeps the most recent requests
+    (in order) and saves the overwritten ones.
+    """
+    buffer = TrafficBuffer(
+        capacity=4,
+        numerical_columns=["Age"],
+        categorical_columns=["Gender"],
+        spill_path=tmp_path,
+        spill_block_size=2,
+    )
+
+    for index in range(7):
+        buffer.append(
+            {"Age": index + 0.1, "Gender": ["Male", "Female"][index % 2]}, index
+        )
+
+    assert buffer.select() == (3, 7)
+    assert buffer.select(last=2) == (5, 7)
+
+    requests = buffer.read(*buffer.select())
+    # the numerical fields are stored without losing precision, so the features
+    # derived from them are the ones that were served
+    assert requests.records["Age"].tolist() == [3.1, 4.1, 5.1, 6.1]
+    assert requests.records["Gender"].tolist() == ["Female", "Male", "Female", "Male"]
+    assert requests.predictions.tolist() == [3, 4, 5, 6]
+    assert np.all(np.diff(requests.timestamps) >= 0)
+
+    # the time range is applied before selecting the last requests
+    assert buffer.select(start_time=requests.timestamps[-1] + 1) == (7, 7)
+    assert buffer.select(last=2, end_time=requests.timestamps[0]) == (3, 3)
+
+    # the requests that were already overwritten are skipped
+    assert len(buffer.read(0, 7).records) == 4
+
+    buffer.close()
+    spilled = pd.read_csv(Path.joinpath(tmp_path, "traffic_2.csv"))
+    assert spilled["Age"].tolist() == [2.1, 3.1]
+    assert spilled["sequence_number"].tolist() == [2, 3]
+    assert buffer.stats()["spilled"] == 4
+
+
+def test_drift_sketches() -> None:
+    """
+    Unit case to test that merging the sketches of a window's buckets gives
+    the same drift metrics as scanning the window's rows.
+    """
+    rng = np.random.default_rng(42)
+    labels = np.array(["a", "b"])
+    reference = ReferenceProfile.build(
+        dataframe=pd.DataFrame(
+            {
+                "numerical": rng.normal(size=5_000),
+                "binary": rng.integers(0, 2, 5_000).astype(float),
+                "target": rng.choice(labels, 5_000),
+                "prediction": rng.choice(labels, 5_000),
+            }
+        ),
+        features=["numerical", "binary"],
+        target_column="target",
+        prediction_column="prediction",
+        labels=labels,
+    )
+    features = np.c_[rng.normal(0.5, size=1_000), rng.integers(0, 2, 1_000)]
+    features[3, 0] = np.nan
+    predictions = rng.choice(labels, 1_000)
+
+    def _summarize(start: int, stop: int) -> DriftSketch:
+        return DriftSketch.build(
+            profile=reference,
+            features=features[start:stop],
+            predictions=predictions[start:stop],
+        )
+
+    sketches = SketchWindows(bucket_size=100, max_buckets=10)
+    expected = calculate_drift_metrics(
+        profile=reference,
+        features=features[50:950],
+        target=None,
+        predictions=predictions[50:950],
+    )
+
+    for _ in range(2):
+        sketch = sketches.sketch(
+            start=50, stop=950, generation="first", summarize=_summarize
+        )
+        metrics = calculate_sketch_drift_metrics(profile=reference, sketch=sketch)
+
+        assert metrics["rows"] == 900
+        assert metrics["prediction"] == expected["prediction"]
+        assert all(
+            np.isclose(metrics["features"][name][metric], value)
+            for name in ["numerical", "binary"]
+            for metric, value in expected["features"][name].items()
+        )
+
+    # the complete buckets are summarized only once (per generation)
+    assert sketches.stats()["misses"] == 8
+    assert sketches.stats()["hits"] == 8
+    assert sketches.stats()["scanned_rows"] == 800 + 2 * 100
+
+    sketches.sketch(start=0, stop=100, generation="second", summarize=_summarize)
+    assert sketches.stats()["buckets"] == 1
+
+    assert sketches.tumbling_bounds(start=50, stop=950, window_size=250) == (600, 900)
+    assert sketches.tumbling_bounds(start=50, stop=950, window_size=5_000) == (100, 900)
+    assert sketches.tumbling_bounds(start=0, stop=50, window_size=100) == (0, 0)
+
+
+def test_latency_recorder() -> None:
+    """
+    Unit case to test the latency histograms and the 'Server-Timing' header.
+    """
+    recorder = LatencyRecorder(enabled=True, buckets=[0.001, 0.01])
+    recorder.start_request()
+
+    for seconds in [0.0005, 0.001, 0.005, 0.5]:
+        recorder.observe("model.predict", seconds)
+
+    with recorder.time("processing.numerical"):
+        pass
+
+    metrics = recorder.render_prometheus(name="stage_seconds")
+    assert 'stage_seconds_bucket{stage="model.predict",le="0.001"} 2' in metrics
+    assert 'stage_seconds_bucket{stage="model.predict",le="0.01"} 3' in metrics
+    assert 'stage_seconds_bucket{stage="model.predict",le="+Inf"} 4' in metrics
+    assert 'stage_seconds_count{stage="model.predict"} 4' in metrics
+    assert 'stage_seconds_count{stage="processing.numerical"} 1' in metrics
+
+    server_timing = recorder.server_timing(total=1.0)
+    assert server_timing.startswith("model.predict;dur=506.500, processing.numerical")
+    assert server_timing.endswith("total;dur=1000.000")
+
+    # nothing is recorded when the recorder is disabled
+    disabled_recorder = LatencyRecorder(enabled=False)
+
+    with disabled_recorder.time("model.predict"):
+        pass
+
+    assert "model.predict" not in disabled_recorder.render_prometheus()
+    assert disabled_recorder.server_timing() is None